@@ -5,6 +5,12 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+Запуск: gunicorn TaskPulse.asgi:application -k uvicorn_worker.UvicornWorker --workers 3
+
+Асинхронные view (long-poll событий, Telegram-вебхук) ждут Redis и брокер
+в event loop, не занимая поток; синхронные DRF-view Django выполняет
+в пуле потоков, как и под WSGI.
 """
 
 import os
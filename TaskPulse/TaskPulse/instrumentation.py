@@ -0,0 +1,294 @@
+"""TaskPulse/instrumentation.py"""
+"""
+Инструментирование запросов: общее время, время и число SQL-запросов,
+повторяющиеся запросы (N+1) и время внешних вызовов (Telegram, SMTP).
+Результат — заголовок Server-Timing, строка лога на запрос и сводка по view.
+"""
+
+import logging
+import random
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.mail.backends.smtp import EmailBackend
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpRequest, HttpResponse
+
+logger = logging.getLogger("taskpulse.requests")
+
+# (%s, %s, %s) -> (%s...): IN-списки разной длины дают один отпечаток
+IN_LIST_RE = re.compile(r"\(\s*%s(?:\s*,\s*%s)+\s*\)")
+# числовые литералы в сыром SQL
+NUMBER_RE = re.compile(r"\b\d+\b")
+
+
+def fingerprint(sql: str) -> str:
+    """Отпечаток SQL без значений параметров."""
+
+    return NUMBER_RE.sub("?", IN_LIST_RE.sub("(%s...)", sql))
+
+
+class RequestMetrics:
+    """Метрики одного запроса."""
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.total_ms = 0.0
+        self.db_ms = 0.0
+        self.queries = 0
+        self.fingerprints: Counter = Counter()
+        self.outbound_ms: Dict[str, float] = defaultdict(float)
+        self.outbound_calls: Counter = Counter()
+
+    def record_query(self, execute: Callable, sql: str, params: Any, many: bool, context: Dict) -> Any:
+        """execute_wrapper соединения: замеряет каждый SQL-запрос."""
+
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_ms += (time.perf_counter() - started) * 1000
+            self.queries += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    def record_outbound(self, kind: str, duration_ms: float) -> None:
+        self.outbound_ms[kind] += duration_ms
+        self.outbound_calls[kind] += 1
+
+    def duplicates(self, threshold: int) -> Dict[str, int]:
+        """Запросы, повторившиеся не меньше threshold раз — кандидаты в N+1."""
+
+        return {sql: count for sql, count in self.fingerprints.items() if count >= threshold}
+
+    def finish(self) -> None:
+        self.total_ms = (time.perf_counter() - self.started) * 1000
+
+    def server_timing(self, duplicates: int) -> str:
+        parts = [
+            f"total;dur={self.total_ms:.1f}",
+            f'db;dur={self.db_ms:.1f};desc="{self.queries} queries, {duplicates} duplicated"',
+        ]
+        parts.extend(
+            f'{kind};dur={duration:.1f};desc="{self.outbound_calls[kind]} calls"'
+            for kind, duration in self.outbound_ms.items()
+        )
+        return ", ".join(parts)
+
+
+_current: ContextVar[Optional[RequestMetrics]] = ContextVar("taskpulse_request_metrics", default=None)
+
+
+def current_metrics() -> Optional[RequestMetrics]:
+    """Метрики текущего запроса или None, если он не инструментируется."""
+
+    return _current.get()
+
+
+def _record_query(execute: Callable, sql: str, params: Any, many: bool, context: Dict) -> Any:
+    """
+    Общий execute_wrapper всех соединений: пишет запрос в метрики текущего
+    запроса, если он инструментируется. ContextVar переживает sync_to_async,
+    поэтому под ASGI учитываются и запросы из потоков синхронных view.
+    """
+
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics.record_query(execute, sql, params, many, context)
+
+
+def install_query_hook(connection: Any, **kwargs: Any) -> None:
+    """Подключает _record_query к соединению один раз (в т.ч. после переподключения)."""
+
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+connection_created.connect(install_query_hook)
+
+
+@contextmanager
+def timed_outbound(kind: str) -> Iterator[None]:
+    """Засекает внешний вызов (telegram, smtp) в метриках текущего запроса."""
+
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.record_outbound(kind, (time.perf_counter() - started) * 1000)
+
+
+class InstrumentedSMTPBackend(EmailBackend):
+    """SMTP-бэкенд, который учитывает время отправки писем в метриках запроса."""
+
+    def send_messages(self, email_messages):
+        with timed_outbound("smtp"):
+            return super().send_messages(email_messages)
+
+
+class ViewStats:
+    """Накопительная статистика по view в процессе; периодически пишется в лог."""
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.views: Dict[str, Dict[str, float]] = {}
+        self.requests = 0
+
+    def record(self, view: str, metrics: RequestMetrics, duplicates: int) -> None:
+        with self.lock:
+            stats = self.views.setdefault(
+                view,
+                {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "db_ms": 0.0, "queries": 0, "duplicates": 0},
+            )
+            stats["count"] += 1
+            stats["total_ms"] += metrics.total_ms
+            stats["max_ms"] = max(stats["max_ms"], metrics.total_ms)
+            stats["db_ms"] += metrics.db_ms
+            stats["queries"] += metrics.queries
+            stats["duplicates"] += duplicates
+            self.requests += 1
+
+    def snapshot(self, reset: bool = False) -> Dict[str, Dict[str, float]]:
+        """Средние значения по каждому view."""
+
+        with self.lock:
+            views = self.views
+            if reset:
+                self.views, self.requests = {}, 0
+            else:
+                views = {view: dict(stats) for view, stats in views.items()}
+
+        return {
+            view: {
+                "count": stats["count"],
+                "avg_ms": round(stats["total_ms"] / stats["count"], 1),
+                "max_ms": round(stats["max_ms"], 1),
+                "avg_db_ms": round(stats["db_ms"] / stats["count"], 1),
+                "avg_queries": round(stats["queries"] / stats["count"], 1),
+                "duplicates": stats["duplicates"],
+            }
+            for view, stats in views.items()
+        }
+
+    def flush_every(self, every: int) -> None:
+        """Пишет сводку в лог и обнуляет её каждые every запросов."""
+
+        if every <= 0 or self.requests < every:
+            return
+        summary = self.snapshot(reset=True)
+        if summary:
+            logger.info("request summary", extra={"view_stats": summary})
+
+
+view_stats = ViewStats()
+
+
+def _view_name(request: HttpRequest) -> str:
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unresolved"
+    return match.view_name or match.route or "unresolved"
+
+
+class RequestMetricsMiddleware:
+    """
+    Выборочно (REQUEST_METRICS_SAMPLE_RATE) инструментирует запросы,
+    если включено REQUEST_METRICS_ENABLED. Неотобранные запросы проходят
+    почти без накладных расходов. Работает и под WSGI, и под ASGI.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable[[HttpRequest], Any]) -> None:
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> Any:
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self._sampled():
+            return self.get_response(request)
+
+        metrics, token = self._start()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, metrics)
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        if not self._sampled():
+            return await self.get_response(request)
+
+        metrics, token = self._start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, metrics)
+
+    @staticmethod
+    def _sampled() -> bool:
+        if not getattr(settings, "REQUEST_METRICS_ENABLED", False):
+            return False
+        return random.random() < getattr(settings, "REQUEST_METRICS_SAMPLE_RATE", 0.1)
+
+    @staticmethod
+    def _start():
+        # соединения, открытые до импорта модуля, сигнал connection_created не застал
+        for connection in connections.all(initialized_only=True):
+            install_query_hook(connection)
+        metrics = RequestMetrics()
+        return metrics, _current.set(metrics)
+
+    def _finish(self, request: HttpRequest, response: HttpResponse, metrics: RequestMetrics) -> HttpResponse:
+        metrics.finish()
+        self._report(request, response, metrics)
+        return response
+
+    @staticmethod
+    def _report(request: HttpRequest, response: HttpResponse, metrics: RequestMetrics) -> None:
+        view = _view_name(request)
+        duplicates = metrics.duplicates(getattr(settings, "REQUEST_METRICS_DUPLICATE_THRESHOLD", 3))
+
+        if getattr(settings, "REQUEST_METRICS_SERVER_TIMING", True):
+            response["Server-Timing"] = metrics.server_timing(len(duplicates))
+
+        fields = {
+            "view": view,
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "total_ms": round(metrics.total_ms, 1),
+            "db_ms": round(metrics.db_ms, 1),
+            "queries": metrics.queries,
+            "duplicates": len(duplicates),
+            **{f"{kind}_ms": round(duration, 1) for kind, duration in metrics.outbound_ms.items()},
+        }
+        logger.info(
+            " ".join(f"{key}={value}" for key, value in fields.items()),
+            extra={"request_metrics": fields},
+        )
+        for sql, count in duplicates.items():
+            logger.warning(
+                "possible N+1 in %s: %s× %s", view, count, sql[:300],
+                extra={"request_metrics": {"view": view, "count": count, "sql": sql}},
+            )
+
+        view_stats.record(view, metrics, len(duplicates))
+        view_stats.flush_every(getattr(settings, "REQUEST_METRICS_SUMMARY_EVERY", 1000))
@@ -49,8 +49,11 @@ if not SECRET_KEY and not DEBUG:
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN", "")
 TELEGRAM_WEBHOOK_SECRET = os.getenv("TELEGRAM_WEBHOOK_SECRET", "")
 TELEGRAM_BOT_NAME = os.getenv("TELEGRAM_BOT_NAME", "pulse_zone_tech_bot")
+# Сколько процессов отправляют в Bot API (дочерние процессы Celery-воркера, см. --concurrency
+# в docker-compose.yml): лимит ~30 сообщений/с на бота делится между ними поровну
+TELEGRAM_API_SENDER_PROCESSES = int(os.getenv("TELEGRAM_API_SENDER_PROCESSES", "4"))
 
-EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
+EMAIL_BACKEND = "TaskPulse.instrumentation.InstrumentedSMTPBackend"
 EMAIL_HOST = os.getenv("EMAIL_HOST", "smtp.mail.ru")
 EMAIL_PORT = int(os.getenv("EMAIL_PORT", "465"))
 
@@ -78,6 +81,7 @@ INSTALLED_APPS = [
     # TaskPUle
     "rest_framework",
     "rest_framework.authtoken",
+    "adrf",
     "django_filters",
     "accounts.apps.AccountsConfig",
     "integrations",
@@ -90,7 +94,7 @@ REST_FRAMEWORK = {
     # "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     # "PAGE_SIZE": 20,
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.TokenAuthentication",
+        "accounts.authentication.CachedTokenAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
@@ -112,14 +116,69 @@ CELERY_RESULT_BACKEND = CELERY_BROKER_URL
 CELERY_TASK_ALWAYS_EAGER = os.getenv("CELERY_TASK_ALWAYS_EAGER", "False").lower() in ("1", "true", "yes")
 CELERY_TASK_EAGER_PROPAGATES = os.getenv("CELERY_TASK_EAGER_PROPAGATES", "False").lower() in ("1", "true", "yes")
 
+# Уведомления о задачах: True — через Celery после коммита, False — синхронно в запросе
+TASKS_NOTIFICATIONS_ASYNC = os.getenv("TASKS_NOTIFICATIONS_ASYNC", "True").lower() in ("1", "true", "yes")
+
+# Сколько напоминаний о дедлайнах одновременно ждут ответа Bot API (асинхронный клиент)
+TASKS_REMINDER_CONCURRENCY = int(os.getenv("TASKS_REMINDER_CONCURRENCY", "32"))
+# Через сколько минут аренда напоминания (воркер упал до отправки) истекает и его забирают снова
+TASKS_REMINDER_LEASE_MINUTES = int(os.getenv("TASKS_REMINDER_LEASE_MINUTES", "5"))
+
+# Отчёты и сводка по сотрудникам читают KPI из материализованной TaskKpiMonthly
+TASKS_KPI_FROM_ROLLUP = os.getenv("TASKS_KPI_FROM_ROLLUP", "True").lower() in ("1", "true", "yes")
+
+# Канал событий для веб-клиента: redis — Redis Streams, local — память процесса (тесты, dev)
+TASKS_EVENTS_BACKEND = os.getenv("TASKS_EVENTS_BACKEND", "redis")
+TASKS_EVENTS_REDIS_URL = os.getenv("TASKS_EVENTS_REDIS_URL", CELERY_BROKER_URL)
+# Сколько секунд long-poll запрос ждёт новых событий
+TASKS_EVENTS_LONGPOLL_TIMEOUT = int(os.getenv("TASKS_EVENTS_LONGPOLL_TIMEOUT", "25"))
+# Потолок ожидания под WSGI: там long-poll держит синхронный воркер (0 — ответ сразу)
+TASKS_EVENTS_LONGPOLL_WSGI_TIMEOUT = float(os.getenv("TASKS_EVENTS_LONGPOLL_WSGI_TIMEOUT", "1"))
+
+# Кэш: тот же Redis, что у Celery, отдельная база
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/1")
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": CACHE_REDIS_URL,
+        "KEY_PREFIX": "taskpulse",
+    }
+}
+# Кэш карточек задач и списков кабинетов с ETag: включение и время жизни ответа в секундах
+TASKS_CACHE_ENABLED = os.getenv("TASKS_CACHE_ENABLED", "True").lower() in ("1", "true", "yes")
+TASKS_CACHE_TTL = int(os.getenv("TASKS_CACHE_TTL", "300"))
+
+# Кэш token-аутентификации: время жизни в Redis и в памяти процесса (секунды), размер LRU процесса
+AUTH_TOKEN_CACHE_TTL = int(os.getenv("AUTH_TOKEN_CACHE_TTL", "60"))
+AUTH_TOKEN_LOCAL_TTL = int(os.getenv("AUTH_TOKEN_LOCAL_TTL", "5"))
+AUTH_TOKEN_LOCAL_SIZE = int(os.getenv("AUTH_TOKEN_LOCAL_SIZE", "1024"))
+
+# Метрики запросов (время, SQL, N+1, Telegram/SMTP): включение и доля инструментируемых запросов
+REQUEST_METRICS_ENABLED = os.getenv("REQUEST_METRICS_ENABLED", "False").lower() in ("1", "true", "yes")
+REQUEST_METRICS_SAMPLE_RATE = float(os.getenv("REQUEST_METRICS_SAMPLE_RATE", "0.1"))
+# Отдавать метрики клиенту в заголовке Server-Timing
+REQUEST_METRICS_SERVER_TIMING = os.getenv("REQUEST_METRICS_SERVER_TIMING", "True").lower() in ("1", "true", "yes")
+# Сколько одинаковых запросов за запрос считать подозрением на N+1
+REQUEST_METRICS_DUPLICATE_THRESHOLD = int(os.getenv("REQUEST_METRICS_DUPLICATE_THRESHOLD", "3"))
+# Через сколько инструментированных запросов писать сводку по view
+REQUEST_METRICS_SUMMARY_EVERY = int(os.getenv("REQUEST_METRICS_SUMMARY_EVERY", "1000"))
+
 CELERY_BEAT_SCHEDULE = {
     "tasks.send_due_soon_reminders": {
         "task": "tasks.tasks_reminders.send_due_soon_reminders",
         "schedule": crontab(minute="*/1"),  # каждые 10 минут
+        # не копим запуски, которые воркеры не успели взять за минуту
+        "options": {"expires": 60},
+    },
+    "tasks.mark_overdue_tasks": {
+        "task": "tasks.tasks_reminders.mark_overdue_tasks",
+        "schedule": crontab(minute="*/5"),
+        "options": {"expires": 300},
     },
 }
 
 MIDDLEWARE = [
+    "TaskPulse.instrumentation.RequestMetricsMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -170,6 +229,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "TaskPulse.wsgi.application"
+ASGI_APPLICATION = "TaskPulse.asgi.application"
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
@@ -0,0 +1,159 @@
+"""accounts/authentication.py"""
+"""
+Token-аутентификация с кэшем token → user: LRU в памяти процесса
+на несколько секунд поверх Redis на минуту. На попадании в кэш
+запроса к Token/User нет. В Redis лежат поля пользователя без хэша
+пароля; при обращении к password он догружается из базы.
+"""
+
+import copy
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import router
+from django.db.models.fields.files import FieldFile
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+logger = logging.getLogger(__name__)
+
+
+class LocalLRU:
+    """Потокобезопасный LRU с TTL записей."""
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self.items: OrderedDict = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self.lock:
+            item = self.items.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self.items[key]
+                return None
+            self.items.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        with self.lock:
+            self.items[key] = (time.monotonic() + ttl, value)
+            self.items.move_to_end(key)
+            while len(self.items) > self.maxsize:
+                self.items.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self.lock:
+            self.items.pop(key, None)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.items.clear()
+
+
+local_tokens = LocalLRU(getattr(settings, "AUTH_TOKEN_LOCAL_SIZE", 1024))
+
+
+def _cache_key(token_key: str) -> str:
+    # сам токен в ключах Redis не храним
+    return "auth:token:" + hashlib.sha256(token_key.encode()).hexdigest()
+
+
+def _cache():
+    return caches[getattr(settings, "AUTH_TOKEN_CACHE_ALIAS", "default")]
+
+
+# поля, которые не кладём в общий кэш
+UNCACHED_USER_FIELDS = frozenset({"password"})
+
+
+def _user_state(user: Any) -> Dict[str, Any]:
+    """Значения полей пользователя для кэша: без пароля, файлы — только путём."""
+
+    state = {}
+    for field in user._meta.concrete_fields:
+        if field.attname in UNCACHED_USER_FIELDS:
+            continue
+        value = getattr(user, field.attname)
+        # FieldFile тянет за собой весь экземпляр пользователя
+        state[field.attname] = value.name if isinstance(value, FieldFile) else value
+    return state
+
+
+def _user_from_state(state: Dict[str, Any]) -> Any:
+    """Пользователь из кэша; отсутствующие поля (password) — отложенные."""
+
+    user_model = get_user_model()
+    names = [
+        field.attname for field in user_model._meta.concrete_fields if field.attname in state
+    ]
+    return user_model.from_db(
+        router.db_for_read(user_model), names, [state[name] for name in names]
+    )
+
+
+def invalidate_tokens(token_keys: Iterable[str]) -> None:
+    """Убирает токены из обоих кэшей (в других процессах LRU доживёт свой короткий TTL)."""
+
+    token_keys = list(token_keys)
+    for token_key in token_keys:
+        local_tokens.delete(token_key)
+    if not token_keys:
+        return
+    try:
+        _cache().delete_many([_cache_key(token_key) for token_key in token_keys])
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("Auth token cache invalidation failed: %s", exc)
+
+
+def invalidate_user_tokens(user_id: int) -> None:
+    """Сбрасывает кэш всех токенов пользователя (смена пароля, деактивация, правка профиля)."""
+
+    invalidate_tokens(Token.objects.filter(user_id=user_id).values_list("key", flat=True))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication, который читает Token + User из кэша."""
+
+    def authenticate_credentials(self, key: str) -> Tuple[Any, Token]:
+        user = local_tokens.get(key)
+        if user is None:
+            user = self._shared_get(key)
+            if user is None:
+                # неверный токен или неактивный пользователь — AuthenticationFailed, в кэш не попадает
+                user, _token = super().authenticate_credentials(key)
+                self._shared_set(key, user)
+            local_tokens.set(key, user, getattr(settings, "AUTH_TOKEN_LOCAL_TTL", 5))
+
+        # копия: запрос может менять request.user, кэшированный объект общий
+        user = copy.copy(user)
+        return user, Token(key=key, user=user)
+
+    @staticmethod
+    def _shared_get(key: str) -> Optional[Any]:
+        try:
+            state = _cache().get(_cache_key(key))
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("Auth token cache unavailable: %s", exc)
+            return None
+        # не словарь — запись старого формата, считаем промахом
+        return _user_from_state(state) if isinstance(state, dict) else None
+
+    @staticmethod
+    def _shared_set(key: str, user: Any) -> None:
+        try:
+            _cache().set(
+                _cache_key(key), _user_state(user), getattr(settings, "AUTH_TOKEN_CACHE_TTL", 60)
+            )
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("Auth token cache unavailable: %s", exc)
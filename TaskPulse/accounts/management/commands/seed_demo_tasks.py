@@ -30,7 +30,7 @@ class Command(BaseCommand):
         Безопасно создаёт TelegramProfile для пользователя
         """
         try:
-            from integrations.telegram.models import TelegramProfile
+            from integrations.models import TelegramProfile
         except Exception:
             return  # интеграции нет — просто пропускаем
 
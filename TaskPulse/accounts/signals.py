@@ -2,9 +2,12 @@
 
 from django.conf import settings
 from django.core.mail import send_mail
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
 
+from .authentication import invalidate_tokens, invalidate_user_tokens
 from .models import EmailVerificationToken, Invitation, User
 from .utils import send_verification_email
 
@@ -23,6 +26,27 @@ def send_email_verification(sender, instance: User, created, **kwargs):
         send_verification_email(instance, token)
 
 
+@receiver(post_save, sender=User)
+def invalidate_cached_auth(sender, instance: User, created, **kwargs):
+    """
+    Любое сохранение пользователя (смена пароля, деактивация, правка профиля)
+    сбрасывает закэшированную token-аутентификацию после коммита: до него
+    параллельный запрос положил бы в кэш старую строку заново.
+    """
+
+    if not created:
+        user_id = instance.pk
+        transaction.on_commit(lambda: invalidate_user_tokens(user_id))
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance: Token, **kwargs):
+    """Удалённый токен (выход, отзыв) сразу перестаёт приниматься из кэша."""
+
+    key = instance.key
+    transaction.on_commit(lambda: invalidate_tokens([key]))
+
+
 @receiver(post_save, sender=Invitation)
 def send_invitation_email(sender, instance: Invitation, created, **kwargs):
     """
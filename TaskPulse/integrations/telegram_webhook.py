@@ -7,6 +7,7 @@ import logging
 import re
 from typing import Any, Dict, Optional
 
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.http import HttpRequest, JsonResponse, HttpResponseForbidden
 from django.utils import timezone
@@ -193,8 +194,12 @@ def handle_telegram_update(update: Dict[str, Any]) -> None:
 
 
 @csrf_exempt
-def telegram_webhook(request: HttpRequest, secret: str) -> JsonResponse:
-    """Обработчик вебхука Telegram: быстро принять update и отправить в Celery."""
+async def telegram_webhook(request: HttpRequest, secret: str) -> JsonResponse:
+    """
+    Обработчик вебхука Telegram: быстро принять update и отправить в Celery.
+    Асинхронный: постановка в очередь (запрос к брокеру) идёт в пуле потоков,
+    event loop под ASGI не блокируется.
+    """
 
     expected_secret = _get_setting("TELEGRAM_WEBHOOK_SECRET")
     if expected_secret and secret != expected_secret:
@@ -214,7 +219,7 @@ def telegram_webhook(request: HttpRequest, secret: str) -> JsonResponse:
         # Важно: импорт здесь, чтобы не было циклических импортов.
         from .tasks import process_telegram_update  # pylint: disable=import-outside-toplevel
 
-        process_telegram_update.delay(update)
+        await sync_to_async(process_telegram_update.delay, thread_sensitive=False)(update)
     except Exception:  # noqa: BLE001
         logger.exception("Failed to enqueue Telegram update to Celery")
 
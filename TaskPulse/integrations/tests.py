@@ -1,3 +1,102 @@
 """integrations/tests.py"""
 
-# Create your tests here.
+from unittest import mock
+
+import requests
+from asgiref.sync import async_to_sync
+from django.test import SimpleTestCase, override_settings
+
+from .utils_telegram import (
+    GLOBAL_RATE_PER_SEC,
+    AsyncTelegramClient,
+    TelegramClient,
+    TelegramSendResult,
+    asend_telegram_message,
+    get_telegram_client,
+)
+
+
+def _response(status_code: int, body: dict) -> mock.Mock:
+    response = mock.Mock(status_code=status_code, text=str(body))
+    response.json.return_value = body
+    return response
+
+
+class TelegramClientRetryTests(SimpleTestCase):
+    """Повторы Bot API: 429 ждёт retry_after, 5xx и сетевые ошибки — экспоненциальная пауза."""
+
+    def setUp(self):
+        self.client = TelegramClient("token", max_retries=3, backoff=0.5)
+        sleep_patcher = mock.patch("integrations.utils_telegram.time.sleep")
+        self.sleep = sleep_patcher.start()
+        self.addCleanup(sleep_patcher.stop)
+
+    def _call(self, *responses):
+        with mock.patch.object(self.client.session, "post", side_effect=responses) as post:
+            result = self.client.call("sendMessage", {"chat_id": 1, "text": "привет"})
+        return result, post
+
+    def test_429_waits_retry_after(self):
+        result, post = self._call(
+            _response(429, {"ok": False, "parameters": {"retry_after": 7}}),
+            _response(200, {"ok": True, "result": {"message_id": 42}}),
+        )
+
+        self.assertTrue(result.ok)
+        self.assertEqual((result.attempts, result.message_id), (2, 42))
+        self.assertEqual(post.call_count, 2)
+        self.sleep.assert_called_once_with(7.0)
+
+    def test_5xx_and_network_errors_back_off(self):
+        result, _post = self._call(
+            _response(502, {"ok": False, "description": "Bad Gateway"}),
+            requests.ConnectionError("reset"),
+            _response(200, {"ok": True, "result": {"message_id": 1}}),
+        )
+
+        self.assertTrue(result.ok)
+        self.assertEqual(result.attempts, 3)
+        self.assertEqual([call.args[0] for call in self.sleep.call_args_list], [0.5, 1.0])
+
+    def test_gives_up_after_max_retries(self):
+        result, post = self._call(*[_response(500, {"ok": False})] * 4)
+
+        self.assertFalse(result.ok)
+        self.assertEqual((result.status_code, result.attempts), (500, 4))
+        self.assertEqual(post.call_count, 4)
+
+    def test_4xx_is_not_retried(self):
+        result, post = self._call(_response(403, {"ok": False, "description": "bot was blocked"}))
+
+        self.assertFalse(result.ok)
+        self.assertEqual(result.description, "bot was blocked")
+        self.assertEqual(post.call_count, 1)
+        self.sleep.assert_not_called()
+
+    def test_global_rate_is_split_between_processes(self):
+        client = TelegramClient("token", sender_processes=3)
+
+        self.assertEqual(client.limiter.global_bucket.rate, GLOBAL_RATE_PER_SEC / 3)
+
+
+@override_settings(TELEGRAM_BOT_TOKEN="token")
+class AsyncTelegramSendTests(SimpleTestCase):
+    """Разовая асинхронная отправка: клиент на вызов закрывается, лимитер общий на процесс."""
+
+    def test_one_off_send_closes_client(self):
+        limiters = []
+
+        async def send_message(client, chat_id, text, reply_markup=None):
+            limiters.append(client.limiter)
+            return TelegramSendResult(ok=True, message_id=1)
+
+        with (
+            mock.patch.object(AsyncTelegramClient, "send_message", send_message),
+            mock.patch.object(AsyncTelegramClient, "aclose", autospec=True) as aclose,
+        ):
+            # под WSGI каждый async_to_sync — новый event loop
+            for _ in range(2):
+                self.assertTrue(async_to_sync(asend_telegram_message)(1, "привет").ok)
+
+        self.assertEqual(aclose.await_count, 2)
+        self.assertEqual(limiters, [get_telegram_client().limiter] * 2)
@@ -1,40 +1,414 @@
 """integrations/utils_telegram.py"""
 
+import asyncio
 import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Optional
 
+import httpx
 import requests
 from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+from TaskPulse.instrumentation import timed_outbound
 
 logger = logging.getLogger(__name__)
 
+TELEGRAM_API_BASE = "https://api.telegram.org"
+
+# Лимиты Bot API: ~30 сообщений в секунду на бота и 1 сообщение в секунду в один чат.
+# Ограничитель живёт в памяти процесса, поэтому общий лимит бота делится
+# на число отправляющих процессов (TELEGRAM_API_SENDER_PROCESSES).
+GLOBAL_RATE_PER_SEC = 30
+PER_CHAT_RATE_PER_SEC = 1
+
+
+@dataclass
+class TelegramSendResult:
+    """Результат вызова Bot API."""
+
+    ok: bool
+    status_code: Optional[int] = None
+    description: str = ""
+    retry_after: Optional[int] = None
+    message_id: Optional[int] = None
+    attempts: int = 0
+
+
+class TokenBucket:
+    """
+    Потокобезопасный token bucket: rate токенов в секунду, не больше capacity.
+    Считает только отправки своего процесса. Доля лимита бота рассчитана на
+    TELEGRAM_API_SENDER_PROCESSES процессов Celery; веб-процессы (вебхук,
+    разовые отправки из запросов) в это число не входят и шлют сверх него.
+    """
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Забирает токен и возвращает, сколько секунд нужно подождать до его появления."""
+
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+
+class TelegramRateLimiter:
+    """
+    Лимит бота + отдельный лимит на каждый чат в пределах одного процесса.
+    Чтобы соблюсти лимит на всего бота, клиенту передаётся число процессов,
+    и каждый получает свою долю global_rate.
+    """
+
+    # чаты, не писавшие дольше этого времени, выкидываем из словаря
+    CHAT_BUCKET_TTL = 60.0
+
+    def __init__(self, global_rate: float, per_chat_rate: float) -> None:
+        self.global_bucket = TokenBucket(global_rate, global_rate)
+        self.per_chat_rate = per_chat_rate
+        self.chat_buckets: dict[Any, TokenBucket] = {}
+        self.lock = threading.Lock()
+
+    def _chat_bucket(self, chat_id: Any) -> TokenBucket:
+        with self.lock:
+            bucket = self.chat_buckets.get(chat_id)
+            if bucket is None:
+                if len(self.chat_buckets) > 10_000:
+                    stale_before = time.monotonic() - self.CHAT_BUCKET_TTL
+                    self.chat_buckets = {
+                        key: value
+                        for key, value in self.chat_buckets.items()
+                        if value.updated_at >= stale_before
+                    }
+                bucket = TokenBucket(self.per_chat_rate, 1)
+                self.chat_buckets[chat_id] = bucket
+            return bucket
+
+    def reserve(self, chat_id: Any) -> float:
+        """Забирает место в обоих лимитах и возвращает, сколько секунд ждать до отправки."""
+
+        return max(self._chat_bucket(chat_id).reserve(), self.global_bucket.reserve())
+
+    def wait(self, chat_id: Any) -> None:
+        """Блокирует поток, пока отправка в chat_id не уложится в оба лимита."""
+
+        delay = self.reserve(chat_id)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def await_slot(self, chat_id: Any) -> None:
+        """То же, что wait(), но не блокирует event loop."""
+
+        delay = self.reserve(chat_id)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class BaseTelegramClient:
+    """Общие настройки и разбор ответов Bot API для синхронного и асинхронного клиентов."""
+
+    def __init__(
+            self,
+            token: str,
+            *,
+            timeout: float = 5,
+            max_retries: int = 3,
+            backoff: float = 0.5,
+            pool_size: int = 10,
+            sender_processes: int = 1,
+            limiter: Optional[TelegramRateLimiter] = None,
+    ) -> None:
+        self.token = token
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.pool_size = pool_size
+        # общий limiter — лимит на несколько клиентов одного процесса
+        self.limiter = limiter or TelegramRateLimiter(
+            GLOBAL_RATE_PER_SEC / max(1, sender_processes), PER_CHAT_RATE_PER_SEC
+        )
+
+    def _url(self, method: str) -> str:
+        return f"{TELEGRAM_API_BASE}/bot{self.token}/{method}"
+
+    def _retry_delay(self, attempt: int) -> float:
+        return self.backoff * 2 ** (attempt - 1)
+
+    @staticmethod
+    def _network_error(method: str, attempt: int, result: TelegramSendResult, exc: Exception) -> None:
+        result.status_code = None
+        result.description = str(exc)
+        logger.warning("Telegram API %s network error (attempt %s): %s", method, attempt, exc)
+
+    @staticmethod
+    def _handle_response(
+            method: str,
+            attempt: int,
+            result: TelegramSendResult,
+            status_code: int,
+            body: dict,
+            text: str,
+    ) -> bool:
+        """
+        Заполняет result по ответу Bot API. True — результат окончательный
+        (успех или ошибка, которую повтор не исправит), False — стоит повторить.
+        """
+
+        result.status_code = status_code
+        result.description = body.get("description", "") or text[:200]
+        if status_code == 200 and body.get("ok", True):
+            result.ok = True
+            result.message_id = (body.get("result") or {}).get("message_id")
+            return True
+
+        if status_code == 429:
+            result.retry_after = (body.get("parameters") or {}).get("retry_after")
+        elif status_code < 500:
+            # 400/403 и т.п. — повтор не поможет (бот заблокирован, чат не найден)
+            logger.warning("Telegram API %s error %s: %s", method, status_code, result.description)
+            return True
+
+        logger.warning(
+            "Telegram API %s temporary error %s (attempt %s): %s",
+            method,
+            status_code,
+            attempt,
+            result.description,
+        )
+        return False
+
+    @staticmethod
+    def _message_payload(chat_id: int, text: str, reply_markup: dict | None) -> dict:
+        """Тело запроса sendMessage."""
+
+        payload: dict = {
+            "chat_id": chat_id,
+            "text": text,
+            "parse_mode": "HTML",
+        }
+        if reply_markup is not None:
+            payload["reply_markup"] = reply_markup
+        return payload
+
+
+class TelegramClient(BaseTelegramClient):
+    """
+    Клиент Bot API: общий requests.Session с пулом keep-alive соединений,
+    ограничение частоты и повторы при 429/5xx/сетевых ошибках.
+    """
+
+    def __init__(self, token: str, **kwargs: Any) -> None:
+        super().__init__(token, **kwargs)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+
+    def call(self, method: str, payload: dict, chat_id: Any = None) -> TelegramSendResult:
+        """Вызывает метод Bot API, соблюдая лимиты и повторяя временные ошибки."""
+
+        result = TelegramSendResult(ok=False)
+
+        for attempt in range(1, self.max_retries + 2):
+            result.attempts = attempt
+            if chat_id is not None:
+                self.limiter.wait(chat_id)
+
+            delay = self._retry_delay(attempt)
+            try:
+                with timed_outbound("telegram"):
+                    resp = self.session.post(self._url(method), json=payload, timeout=self.timeout)
+            except requests.RequestException as exc:
+                self._network_error(method, attempt, result, exc)
+            else:
+                try:
+                    body = resp.json()
+                except ValueError:
+                    body = {}
+                if self._handle_response(method, attempt, result, resp.status_code, body, resp.text):
+                    return result
+                if resp.status_code == 429 and result.retry_after:
+                    delay = float(result.retry_after)
+
+            if attempt <= self.max_retries:
+                time.sleep(delay)
+
+        logger.error("Telegram API %s failed after %s attempts", method, result.attempts)
+        return result
+
+    def send_message(
+            self, chat_id: int, text: str, reply_markup: dict | None = None
+    ) -> TelegramSendResult:
+        """sendMessage с HTML-разметкой."""
+
+        return self.call("sendMessage", self._message_payload(chat_id, text, reply_markup), chat_id=chat_id)
+
+
+class AsyncTelegramClient(BaseTelegramClient):
+    """
+    Асинхронный клиент Bot API на httpx.AsyncClient: ожидание ответа,
+    лимитов и пауз между повторами не занимает поток, поэтому одна
+    корутинная рассылка держит сотни медленных вызовов одновременно.
+    Привязан к event loop, в котором создан: используется как
+    async with в пределах одного вызова, чтобы пул соединений
+    закрывался вместе с ним.
+    """
+
+    def __init__(self, token: str, **kwargs: Any) -> None:
+        super().__init__(token, **kwargs)
+        self.http = httpx.AsyncClient(
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size),
+        )
+
+    async def call(self, method: str, payload: dict, chat_id: Any = None) -> TelegramSendResult:
+        """Вызывает метод Bot API, соблюдая лимиты и повторяя временные ошибки."""
+
+        result = TelegramSendResult(ok=False)
+
+        for attempt in range(1, self.max_retries + 2):
+            result.attempts = attempt
+            if chat_id is not None:
+                await self.limiter.await_slot(chat_id)
+
+            delay = self._retry_delay(attempt)
+            try:
+                with timed_outbound("telegram"):
+                    resp = await self.http.post(self._url(method), json=payload)
+            except httpx.HTTPError as exc:
+                self._network_error(method, attempt, result, exc)
+            else:
+                try:
+                    body = resp.json()
+                except ValueError:
+                    body = {}
+                if self._handle_response(method, attempt, result, resp.status_code, body, resp.text):
+                    return result
+                if resp.status_code == 429 and result.retry_after:
+                    delay = float(result.retry_after)
+
+            if attempt <= self.max_retries:
+                await asyncio.sleep(delay)
+
+        logger.error("Telegram API %s failed after %s attempts", method, result.attempts)
+        return result
+
+    async def send_message(
+            self, chat_id: int, text: str, reply_markup: dict | None = None
+    ) -> TelegramSendResult:
+        """sendMessage с HTML-разметкой."""
+
+        return await self.call(
+            "sendMessage", self._message_payload(chat_id, text, reply_markup), chat_id=chat_id
+        )
+
+    async def aclose(self) -> None:
+        await self.http.aclose()
+
+    async def __aenter__(self) -> "AsyncTelegramClient":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+
+def client_options() -> dict:
+    """Таймаут, повторы и размер пула клиентов Bot API из settings."""
+
+    return {
+        "timeout": getattr(settings, "TELEGRAM_API_TIMEOUT", 5),
+        "max_retries": getattr(settings, "TELEGRAM_API_MAX_RETRIES", 3),
+        "pool_size": getattr(settings, "TELEGRAM_API_POOL_SIZE", 10),
+        "sender_processes": getattr(settings, "TELEGRAM_API_SENDER_PROCESSES", 1),
+    }
+
+
+_client: Optional[TelegramClient] = None
+_client_lock = threading.Lock()
+
+
+def get_telegram_client() -> Optional[TelegramClient]:
+    """Общий на процесс клиент Bot API (None, если токен не настроен)."""
+
+    global _client  # pylint: disable=global-statement
+
+    bot_token = getattr(settings, "TELEGRAM_BOT_TOKEN", None)
+    if not bot_token:
+        return None
+
+    if _client is None or _client.token != bot_token:
+        with _client_lock:
+            if _client is None or _client.token != bot_token:
+                _client = TelegramClient(bot_token, **client_options())
+    return _client
+
+
+def new_async_telegram_client() -> Optional[AsyncTelegramClient]:
+    """
+    Новый асинхронный клиент Bot API (None, если токен не настроен).
+    Закрывать через async with: под WSGI каждый async_to_sync — свой
+    event loop, кэшировать клиент между вызовами нельзя. Ограничитель
+    общий с синхронным клиентом процесса, так что лимиты бота соблюдаются.
+    """
+
+    client = get_telegram_client()
+    if client is None:
+        return None
+    return AsyncTelegramClient(client.token, limiter=client.limiter, **client_options())
+
 
 def send_telegram_message(
         chat_id: int, text: str, reply_markup: dict | None = None
-) -> None:
+) -> TelegramSendResult:
     """Отправляет сообщение пользователю в Telegram через Bot API."""
 
-    bot_token = getattr(settings, "TELEGRAM_BOT_TOKEN", None)
-    if not bot_token:
+    client = get_telegram_client()
+    if client is None:
         logger.warning("TELEGRAM_BOT_TOKEN не настроен, сообщение не отправлено")
-        return
+        return TelegramSendResult(ok=False, description="TELEGRAM_BOT_TOKEN is not configured")
 
-    url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
+    try:
+        return client.send_message(chat_id, text, reply_markup=reply_markup)
+    except Exception as exc:  # noqa: BLE001
+        logger.exception("Ошибка при отправке сообщения в Telegram")
+        return TelegramSendResult(ok=False, description=str(exc))
 
-    payload: dict = {
-        "chat_id": chat_id,
-        "text": text,
-        "parse_mode": "HTML",
-    }
 
-    if reply_markup is not None:
-        payload["reply_markup"] = reply_markup
+async def asend_telegram_message(
+        chat_id: int,
+        text: str,
+        reply_markup: dict | None = None,
+        client: Optional[AsyncTelegramClient] = None,
+) -> TelegramSendResult:
+    """
+    Асинхронный вариант send_telegram_message. client — открытый клиент
+    (пакетная рассылка); без него клиент создаётся и закрывается на вызов.
+    """
+
+    if client is None:
+        client = new_async_telegram_client()
+        if client is None:
+            logger.warning("TELEGRAM_BOT_TOKEN не настроен, сообщение не отправлено")
+            return TelegramSendResult(ok=False, description="TELEGRAM_BOT_TOKEN is not configured")
+        async with client:
+            return await asend_telegram_message(chat_id, text, reply_markup, client=client)
 
     try:
-        resp = requests.post(url, json=payload, timeout=5)
-        if resp.status_code != 200:
-            logger.warning("Telegram API sendMessage error %s: %s", resp.status_code, resp.text)
-    except Exception:  # noqa: BLE001
+        return await client.send_message(chat_id, text, reply_markup=reply_markup)
+    except Exception as exc:  # noqa: BLE001
         logger.exception("Ошибка при отправке сообщения в Telegram")
+        return TelegramSendResult(ok=False, description=str(exc))
 
 
 def build_task_link(task_id: int) -> str:
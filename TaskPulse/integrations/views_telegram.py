@@ -203,7 +203,11 @@ class TelegramWebhookView(APIView):
         new_due = base_dt + timedelta(days=1)
 
         task.due_at = new_due
-        task.save(update_fields=["due_at"])
+        task.save(
+            update_fields=["due_at"],
+            changed_by=user,
+            change_reason="Продление на 1 день через Telegram.",
+        )
 
         TaskActionLog.log_action(
             task=task,
@@ -1,6 +1,8 @@
 """tasks/filters.py"""
 
 import django_filters
+from rest_framework.filters import BaseFilterBackend
+from rest_framework.settings import api_settings
 
 from .models import Task
 
@@ -8,7 +10,8 @@ from .models import Task
 class TaskFilter(django_filters.FilterSet):
     """Фильтры для списка задач:"""
 
-    name = django_filters.CharFilter(field_name="title", lookup_expr="icontains")
+    # поиск по названию: полнотекстовый индекс, только лексемы с весом A (title)
+    name = django_filters.CharFilter(method="filter_name")
 
     assignee = django_filters.CharFilter(method="filter_assignee")
 
@@ -23,6 +26,13 @@ class TaskFilter(django_filters.FilterSet):
         model = Task
         fields = ["status", "priority", "name", "position"]
 
+    def filter_name(self, queryset, _name, value):
+        """Слова из value по префиксу в названии задачи."""
+
+        if not value:
+            return queryset
+        return queryset.search(value, weights="A", ranked=False)
+
     def filter_assignee(self, queryset, _name, value):
         """Позволяет сделать:"""
 
@@ -36,3 +46,29 @@ class TaskFilter(django_filters.FilterSet):
             return queryset.filter(assignee_id=int(value))
 
         return queryset
+
+
+def is_ranked_search(request) -> bool:
+    """?search= без ?ordering=: выдача сортируется по релевантности."""
+
+    params = request.query_params
+    return bool(params.get(api_settings.SEARCH_PARAM, "").strip()) and (
+        api_settings.ORDERING_PARAM not in params
+    )
+
+
+class FullTextSearchFilter(BaseFilterBackend):
+    """
+    ?search=... — полнотекстовый поиск по search_vector.
+    Ставится после OrderingFilter: без явного ?ordering= результаты
+    сортируются по релевантности.
+    """
+
+    search_param = api_settings.SEARCH_PARAM
+
+    def filter_queryset(self, request, queryset, view):
+        text = request.query_params.get(self.search_param, "").strip()
+        if not text:
+            return queryset
+
+        return queryset.search(text, ranked=is_ranked_search(request))
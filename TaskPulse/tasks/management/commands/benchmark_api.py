@@ -0,0 +1,73 @@
+# taskpulse/tasks/management/commands/benchmark_api.py
+
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks.services.benchmark import DEFAULT_BUDGETS, dump_report, run_benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        "Сквозной бенчмарк API: p50/p95 задержки, число SQL-запросов и размер ответа "
+        "по ключевым эндпоинтам. Падает, если превышен хотя бы один бюджет. "
+        "Запускать на наборе seed_load_data; изменения откатываются."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=20, help="Замеров на сценарий.")
+        parser.add_argument("--warmup", type=int, default=2, help="Прогревочных вызовов на сценарий.")
+        parser.add_argument("--output", help="Файл для JSON-отчёта.")
+        parser.add_argument("--budgets", help="JSON-файл с бюджетами поверх встроенных.")
+        parser.add_argument(
+            "--only",
+            nargs="+",
+            choices=sorted(DEFAULT_BUDGETS),
+            help="Запустить только указанные сценарии.",
+        )
+        parser.add_argument(
+            "--no-fail",
+            action="store_true",
+            help="Не завершаться ошибкой при превышении бюджетов.",
+        )
+
+    def handle(self, *args, **options):
+        if options["iterations"] < 1:
+            raise CommandError("--iterations должен быть больше нуля.")
+
+        budgets = None
+        if options["budgets"]:
+            with open(options["budgets"], encoding="utf-8") as fh:
+                budgets = json.load(fh)
+
+        try:
+            report = run_benchmarks(
+                iterations=options["iterations"],
+                warmup=options["warmup"],
+                budgets=budgets,
+                only=options["only"],
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc)) from exc
+
+        if options["output"]:
+            dump_report(report, options["output"])
+
+        self.stdout.write(
+            f"{'сценарий':<24}{'p50, мс':>10}{'p95, мс':>10}{'запросы':>10}{'байты':>12}"
+        )
+        for result in report["results"]:
+            line = (
+                f"{result['name']:<24}{result['p50_ms']:>10.1f}{result['p95_ms']:>10.1f}"
+                f"{result['queries']:>10}{result['bytes']:>12}"
+            )
+            if result["violations"]:
+                line = self.style.ERROR(f"{line}  {', '.join(result['violations'])}")
+            self.stdout.write(line)
+
+        if report["passed"]:
+            self.stdout.write(self.style.SUCCESS("Все бюджеты соблюдены."))
+        elif options["no_fail"]:
+            self.stdout.write(self.style.WARNING("Есть превышения бюджетов."))
+        else:
+            raise CommandError("Превышены бюджеты производительности.")
@@ -0,0 +1,16 @@
+# taskpulse/tasks/management/commands/rebuild_kpi_rollup.py
+
+from django.core.management.base import BaseCommand
+
+from tasks.services.kpi import rebuild_kpi_rollup
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересобирает KPI-сводку TaskKpiMonthly по всем задачам. "
+        "Запускать после массовых правок задач в обход Task.save()."
+    )
+
+    def handle(self, *args, **options):
+        rows = rebuild_kpi_rollup()
+        self.stdout.write(self.style.SUCCESS(f"KPI-сводка пересобрана: {rows} строк."))
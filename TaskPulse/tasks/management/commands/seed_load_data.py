@@ -0,0 +1,470 @@
+# taskpulse/tasks/management/commands/seed_load_data.py
+
+import random
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from itertools import accumulate
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import OuterRef, Q, Subquery
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.utils import timezone
+
+from integrations.models import TelegramProfile
+from tasks.models import (
+    Conversation,
+    Task,
+    TaskActionLog,
+    TaskAttachment,
+    TaskChangeLog,
+    TaskMessage,
+)
+from tasks.services.kpi import rebuild_kpi_rollup
+
+User = get_user_model()
+
+
+@contextmanager
+def signals_suppressed():
+    """
+    Отключает обработчики сигналов задач, сообщений и пользователей:
+    никаких писем, Telegram-уведомлений, событий и пересчёта сводок по одной строке.
+    """
+
+    from accounts.signals import send_email_verification
+    from tasks import signals as task_signals
+
+    receivers = [
+        (post_save, send_email_verification, User),
+        (pre_save, task_signals.store_old_status, Task),
+        (post_save, task_signals.task_post_save, Task),
+        (post_delete, task_signals.task_post_delete, Task),
+        (post_save, task_signals.task_message_post_save, TaskMessage),
+    ]
+    for signal, receiver, sender in receivers:
+        signal.disconnect(receiver, sender=sender)
+    try:
+        yield
+    finally:
+        for signal, receiver, sender in receivers:
+            signal.connect(receiver, sender=sender)
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """Отключает auto_now/auto_now_add, чтобы bulk_create сохранил сгенерированные даты."""
+
+    saved = []
+    for model in models:
+        for field in model._meta.concrete_fields:
+            if getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False):
+                saved.append((field, field.auto_now, field.auto_now_add))
+                field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    help = (
+        "Генерирует нагрузочный набор данных: компании с создателями и исполнителями, "
+        "задачи с журналами, действиями, сообщениями и метаданными вложений. "
+        "Всё пишется bulk_create пачками с отключёнными сигналами."
+    )
+
+    LOAD_EMAIL_DOMAIN = "load.example.com"
+    LOAD_PASSWORD = "Load12345!"
+    TELEGRAM_ID_START = 8_000_000_000
+
+    TITLES = [
+        "Подготовить отчёт",
+        "Согласовать план работ",
+        "Проверить входящие заявки",
+        "Обновить документацию",
+        "Провести встречу с клиентом",
+        "Собрать статусы по проекту",
+        "Разобрать блокеры",
+        "Подготовить презентацию",
+        "Review the contract draft",
+        "Update the onboarding checklist",
+    ]
+    MESSAGES = [
+        "Принято, беру в работу.",
+        "Когда нужен результат?",
+        "Приложил черновик, посмотрите.",
+        "Есть вопрос по срокам.",
+        "Готово, проверьте, пожалуйста.",
+        "Нужно уточнить у клиента.",
+        "OK, will do.",
+    ]
+
+    def add_arguments(self, parser):
+        parser.add_argument("--companies", type=int, default=20)
+        parser.add_argument("--creators", type=int, default=2, help="Создателей в компании")
+        parser.add_argument("--executors", type=int, default=50, help="Исполнителей в компании")
+        parser.add_argument("--tasks", type=int, default=100_000, help="Всего задач")
+        parser.add_argument(
+            "--messages", type=float, default=2.0, help="Сообщений на задачу в среднем"
+        )
+        parser.add_argument("--days", type=int, default=365, help="Глубина истории в днях")
+        parser.add_argument(
+            "--telegram-share",
+            type=float,
+            default=0.5,
+            help="Доля исполнителей с привязанным Telegram",
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument(
+            "--reset",
+            action="store_true",
+            help=f"Удалить ранее сгенерированные данные (@{self.LOAD_EMAIL_DOMAIN})",
+        )
+
+    def handle(self, *args, **options):
+        if options["companies"] < 1 or options["creators"] < 1 or options["executors"] < 1:
+            raise CommandError("--companies, --creators и --executors должны быть >= 1")
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size должен быть >= 1")
+
+        self.rng = random.Random(options["seed"])
+        self.now = timezone.now()
+        self.batch_size = options["batch_size"]
+        started = time.monotonic()
+
+        with signals_suppressed():
+            if options["reset"]:
+                self._reset()
+
+            companies = self._create_users(
+                options["companies"],
+                options["creators"],
+                options["executors"],
+                options["telegram_share"],
+            )
+            with explicit_timestamps(
+                    Task, TaskChangeLog, TaskActionLog, TaskMessage, TaskAttachment
+            ):
+                counts = self._create_tasks(
+                    companies, options["tasks"], options["messages"], options["days"]
+                )
+
+        self._finish_conversations()
+        kpi_rows = rebuild_kpi_rollup()
+
+        users = sum(len(creators) + len(executors) for creators, executors in companies)
+        self.stdout.write(self.style.SUCCESS(
+            f"Готово за {time.monotonic() - started:.1f} с: {users} пользователей, "
+            f"{counts['tasks']} задач, {counts['changes']} изменений, "
+            f"{counts['actions']} действий, {counts['messages']} сообщений, "
+            f"{counts['attachments']} вложений, {kpi_rows} строк KPI-сводки."
+        ))
+
+    # --- пользователи ---
+
+    def _reset(self) -> None:
+        """Удаляет сгенерированные данные пачками задач, не загружая их в память целиком."""
+
+        users = User.objects.filter(email__endswith=f"@{self.LOAD_EMAIL_DOMAIN}")
+        deleted = 0
+        while True:
+            ids = list(
+                Task.objects.filter(creator__in=users).values_list("id", flat=True)[
+                    : self.batch_size
+                ]
+            )
+            if not ids:
+                break
+            with transaction.atomic():
+                Task.objects.filter(id__in=ids).delete()
+            deleted += len(ids)
+
+        Conversation.objects.filter(Q(user_low__in=users) | Q(user_high__in=users)).delete()
+        users_count, _ = users.delete()
+        self.stdout.write(f"Удалено задач: {deleted}, объектов пользователей: {users_count}.")
+
+    def _create_users(self, companies_count, creators_count, executors_count, telegram_share):
+        """Создаёт пользователей компаний; возвращает [(создатели, исполнители), ...]."""
+
+        password = make_password(self.LOAD_PASSWORD)
+        users = []
+        for company in range(1, companies_count + 1):
+            for role, count in (
+                    (User.Role.CREATOR, creators_count),
+                    (User.Role.EXECUTOR, executors_count),
+            ):
+                for n in range(1, count + 1):
+                    users.append(
+                        User(
+                            email=f"{role.lower()}{n}.c{company}@{self.LOAD_EMAIL_DOMAIN}",
+                            password=password,
+                            full_name=f"{role.label} {n} / компания {company}",
+                            company=f"Load Company {company}",
+                            position="Руководитель" if role == User.Role.CREATOR else "Специалист",
+                            role=role,
+                            email_verified=True,
+                        )
+                    )
+        users = User.objects.bulk_create(users, batch_size=self.batch_size)
+
+        companies = {}
+        for user in users:
+            creators, executors = companies.setdefault(user.company, ([], []))
+            (creators if user.role == User.Role.CREATOR else executors).append(user.id)
+
+        profiles = [
+            TelegramProfile(
+                user_id=user.id,
+                telegram_user_id=self.TELEGRAM_ID_START + user.id,
+                chat_id=self.TELEGRAM_ID_START + user.id,
+            )
+            for user in users
+            if user.role == User.Role.EXECUTOR and self.rng.random() < telegram_share
+        ]
+        TelegramProfile.objects.bulk_create(profiles, batch_size=self.batch_size)
+
+        self.stdout.write(f"Пользователей: {len(users)}, профилей Telegram: {len(profiles)}.")
+        return list(companies.values())
+
+    # --- задачи и связанные строки ---
+
+    def _create_tasks(self, companies, total, messages_avg, days):
+        """Генерирует задачи пачками; на каждую пачку — по одному bulk_create на таблицу."""
+
+        # нагрузка неравномерна: вес компании и исполнителя — распределение Парето
+        company_weights = list(accumulate(self.rng.paretovariate(1.5) for _ in companies))
+        executor_weights = [
+            list(accumulate(self.rng.paretovariate(1.2) for _ in executors))
+            for _creators, executors in companies
+        ]
+        company_indexes = range(len(companies))
+
+        counts = {"tasks": 0, "changes": 0, "actions": 0, "messages": 0, "attachments": 0}
+        conversations = {}
+
+        while counts["tasks"] < total:
+            size = min(self.batch_size, total - counts["tasks"])
+            tasks = []
+            for _ in range(size):
+                company = self.rng.choices(company_indexes, cum_weights=company_weights)[0]
+                creators, executors = companies[company]
+                assignee_id = (
+                    self.rng.choices(executors, cum_weights=executor_weights[company])[0]
+                    if self.rng.random() < 0.95
+                    else None
+                )
+                tasks.append(self._build_task(self.rng.choice(creators), assignee_id, days))
+
+            with transaction.atomic():
+                tasks = Task.objects.bulk_create(tasks)
+                self._ensure_conversations(tasks, conversations)
+
+                changes, actions, messages, attachments = [], [], [], []
+                for task in tasks:
+                    changes.extend(self._build_changes(task))
+                    actions.extend(self._build_actions(task))
+                    messages.extend(self._build_messages(task, messages_avg, conversations))
+                    attachments.extend(self._build_attachments(task))
+
+                TaskChangeLog.objects.bulk_create(changes, batch_size=self.batch_size)
+                TaskActionLog.objects.bulk_create(actions, batch_size=self.batch_size)
+                TaskMessage.objects.bulk_create(messages, batch_size=self.batch_size)
+                TaskAttachment.objects.bulk_create(attachments, batch_size=self.batch_size)
+
+            counts["tasks"] += len(tasks)
+            counts["changes"] += len(changes)
+            counts["actions"] += len(actions)
+            counts["messages"] += len(messages)
+            counts["attachments"] += len(attachments)
+            self.stdout.write(f"  задач: {counts['tasks']}/{total}")
+
+        return counts
+
+    def _build_task(self, creator_id, assignee_id, days) -> Task:
+        rng = self.rng
+        created_at = self.now - timedelta(seconds=rng.uniform(0, days * 86400))
+
+        # срок: обычно несколько дней, изредка недели; у 10% задач срока нет
+        due_at = None
+        if rng.random() < 0.9:
+            due_at = created_at + timedelta(hours=max(rng.lognormvariate(4.5, 1.0), 1))
+
+        if due_at is not None and due_at < self.now:
+            status = Task.Status.DONE if rng.random() < 0.8 else Task.Status.OVERDUE
+        else:
+            status = rng.choices(
+                [Task.Status.NEW, Task.Status.IN_PROGRESS, Task.Status.DONE], [5, 4, 1]
+            )[0]
+
+        if status == Task.Status.DONE:
+            # 75% выполненных — в срок
+            limit = due_at if due_at is not None and rng.random() < 0.75 else self.now
+            updated_at = created_at + (min(limit, self.now) - created_at) * rng.random()
+        else:
+            updated_at = created_at + (self.now - created_at) * rng.random() * 0.5
+
+        return Task(
+            title=rng.choice(self.TITLES),
+            description=f"Сгенерировано для нагрузочного теста, {rng.randint(1, 10_000)}",
+            executor_comment="Сделано, файл приложен." if status == Task.Status.DONE else "",
+            priority=rng.choices(Task.Priority.values, [2, 6, 2])[0],
+            status=status,
+            due_at=due_at,
+            creator_id=creator_id,
+            assignee_id=assignee_id if status != Task.Status.NEW or rng.random() < 0.9 else None,
+            created_at=created_at,
+            updated_at=updated_at,
+            reminder_sent_at=due_at - timedelta(minutes=15) if due_at and due_at < self.now else None,
+        )
+
+    def _build_changes(self, task):
+        path = {
+            Task.Status.NEW: [],
+            Task.Status.IN_PROGRESS: [Task.Status.IN_PROGRESS],
+            Task.Status.DONE: [Task.Status.IN_PROGRESS, Task.Status.DONE],
+            Task.Status.OVERDUE: [Task.Status.OVERDUE],
+        }[task.status]
+
+        changes = []
+        old_status = Task.Status.NEW
+        for step, new_status in enumerate(path, start=1):
+            changes.append(
+                TaskChangeLog(
+                    task_id=task.id,
+                    changed_by_id=task.assignee_id,
+                    field="status",
+                    old_value=old_status,
+                    new_value=new_status,
+                    reason=Task.TRACKED_REASONS["status"],
+                    changed_at=task.created_at + (task.updated_at - task.created_at) * step / len(path),
+                )
+            )
+            old_status = new_status
+        return changes
+
+    def _build_actions(self, task):
+        if not task.assignee_id or not task.due_at or self.rng.random() >= 0.2:
+            return []
+
+        if self.rng.random() < 0.6:
+            return [
+                TaskActionLog(
+                    task_id=task.id,
+                    user_id=task.assignee_id,
+                    action=TaskActionLog.Action.CONFIRM_ON_TIME,
+                    created_at=task.created_at + (task.updated_at - task.created_at) / 2,
+                )
+            ]
+        return [
+            TaskActionLog(
+                task_id=task.id,
+                user_id=task.assignee_id,
+                action=TaskActionLog.Action.EXTEND_DUE_1D,
+                comment="Нужен ещё день.",
+                old_due_at=task.due_at - timedelta(days=1),
+                new_due_at=task.due_at,
+                created_at=task.created_at + (task.updated_at - task.created_at) / 2,
+            )
+        ]
+
+    def _ensure_conversations(self, tasks, conversations) -> None:
+        """Создаёт недостающие диалоги пар из пачки задач (ключ — Conversation.pair)."""
+
+        missing = {
+            Conversation.pair(task.creator_id, task.assignee_id)
+            for task in tasks
+            if task.assignee_id
+        } - conversations.keys()
+        if not missing:
+            return
+
+        existing = Conversation.objects.filter(
+            user_low_id__in={low for low, _high in missing},
+            user_high_id__in={high for _low, high in missing},
+        ).values_list("user_low_id", "user_high_id", "id")
+        for low, high, conversation_id in existing:
+            conversations[(low, high)] = conversation_id
+
+        created = Conversation.objects.bulk_create(
+            [
+                Conversation(user_low_id=low, user_high_id=high)
+                for low, high in missing - conversations.keys()
+            ]
+        )
+        for conversation in created:
+            conversations[(conversation.user_low_id, conversation.user_high_id)] = conversation.id
+
+    def _build_messages(self, task, messages_avg, conversations):
+        if not task.assignee_id or messages_avg <= 0:
+            return []
+
+        # геометрическое распределение со средним messages_avg: много коротких чатов, мало длинных
+        count = 0
+        while self.rng.random() < messages_avg / (messages_avg + 1):
+            count += 1
+
+        conversation_id = conversations[Conversation.pair(task.creator_id, task.assignee_id)]
+        span = (self.now - task.created_at).total_seconds()
+        moments = sorted(self.rng.uniform(0, span) for _ in range(count))
+        return [
+            TaskMessage(
+                task_id=task.id,
+                conversation_id=conversation_id,
+                sender_id=task.creator_id if self.rng.random() < 0.5 else task.assignee_id,
+                text=self.rng.choice(self.MESSAGES),
+                created_at=task.created_at + timedelta(seconds=moment),
+            )
+            for moment in moments
+        ]
+
+    def _build_attachments(self, task):
+        attachments = []
+        if self.rng.random() < 0.2:
+            attachments.append(
+                TaskAttachment(
+                    task_id=task.id,
+                    file=f"task_attachments/{task.id}/brief.pdf",
+                    kind=TaskAttachment.Kind.GENERAL,
+                    uploaded_by_id=task.creator_id,
+                    created_at=task.created_at,
+                )
+            )
+        if task.status == Task.Status.DONE and self.rng.random() < 0.5:
+            attachments.append(
+                TaskAttachment(
+                    task_id=task.id,
+                    file=f"task_attachments/{task.id}/result.xlsx",
+                    kind=TaskAttachment.Kind.RESULT,
+                    uploaded_by_id=task.assignee_id,
+                    created_at=task.updated_at,
+                )
+            )
+        return attachments
+
+    def _finish_conversations(self) -> None:
+        """Проставляет диалогам указатели на последнее сообщение и задачу двумя UPDATE."""
+
+        load_conversations = Conversation.objects.filter(
+            user_low__email__endswith=f"@{self.LOAD_EMAIL_DOMAIN}"
+        )
+        last_message = TaskMessage.objects.filter(conversation=OuterRef("pk")).order_by("-id")
+        load_conversations.update(
+            last_message=Subquery(last_message.values("id")[:1]),
+            last_message_at=Subquery(last_message.values("created_at")[:1]),
+        )
+        load_conversations.update(
+            last_task=Subquery(
+                Task.objects.filter(
+                    Q(creator=OuterRef("user_low"), assignee=OuterRef("user_high"))
+                    | Q(creator=OuterRef("user_high"), assignee=OuterRef("user_low"))
+                )
+                .order_by("-id")
+                .values("id")[:1]
+            )
+        )
@@ -0,0 +1,81 @@
+# Generated by Django 5.2.8 on 2026-10-18 09:27
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, F, Q
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+
+def fill_kpi_rollup(apps, schema_editor):
+    """Первичное заполнение сводки по уже существующим задачам."""
+
+    Task = apps.get_model("tasks", "Task")
+    TaskKpiMonthly = apps.get_model("tasks", "TaskKpiMonthly")
+
+    done_q = Q(status="done")
+    on_time_q = done_q & (Q(due_at__isnull=True) | Q(updated_at__lte=F("due_at")))
+
+    rows = (
+        Task.objects.filter(assignee__isnull=False)
+        .annotate(month=TruncMonth("due_at"))
+        .values("creator_id", "assignee_id", "month", "priority")
+        .annotate(
+            total=Count("id"),
+            done=Count("id", filter=done_q),
+            done_on_time=Count("id", filter=on_time_q),
+        )
+        .order_by()
+    )
+
+    objs = []
+    for row in rows:
+        month = row["month"]
+        if month is not None:
+            if timezone.is_aware(month):
+                month = timezone.localtime(month)
+            month = month.date()
+        objs.append(
+            TaskKpiMonthly(
+                creator_id=row["creator_id"],
+                assignee_id=row["assignee_id"],
+                month=month,
+                priority=row["priority"],
+                total=row["total"],
+                done=row["done"],
+                done_on_time=row["done_on_time"],
+                done_late=row["done"] - row["done_on_time"],
+            )
+        )
+    TaskKpiMonthly.objects.bulk_create(objs, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0012_remove_task_completed_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskKpiMonthly',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(blank=True, null=True)),
+                ('priority', models.CharField(choices=[('low', 'Low'), ('medium', 'Medium'), ('high', 'High')], max_length=10)),
+                ('total', models.IntegerField(default=0)),
+                ('done', models.IntegerField(default=0)),
+                ('done_on_time', models.IntegerField(default=0)),
+                ('done_late', models.IntegerField(default=0)),
+                ('assignee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('creator', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['assignee', 'month'], name='idx_task_kpi_assignee_month')],
+                'constraints': [models.UniqueConstraint(fields=('creator', 'assignee', 'month', 'priority'), name='uniq_task_kpi_monthly_bucket', nulls_distinct=False)],
+            },
+        ),
+        migrations.RunPython(fill_kpi_rollup, migrations.RunPython.noop),
+    ]
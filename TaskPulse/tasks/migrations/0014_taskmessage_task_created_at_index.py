@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-18 06:31
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0013_taskkpimonthly'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='taskmessage',
+            index=models.Index(fields=['task', 'created_at'], name='idx_task_message_task_time'),
+        ),
+    ]
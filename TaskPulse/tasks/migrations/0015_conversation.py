@@ -0,0 +1,98 @@
+# Generated by Django 5.2.8 on 2026-10-18 06:35
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Q
+
+
+def fill_conversations(apps, schema_editor):
+    """Создаёт диалоги для существующих пар и привязывает к ним сообщения."""
+
+    Task = apps.get_model("tasks", "Task")
+    TaskMessage = apps.get_model("tasks", "TaskMessage")
+    Conversation = apps.get_model("tasks", "Conversation")
+
+    last_tasks = {}
+    rows = (
+        Task.objects.filter(assignee__isnull=False)
+        .order_by("id")
+        .values_list("id", "creator_id", "assignee_id")
+    )
+    for task_id, creator_id, assignee_id in rows:
+        last_tasks[tuple(sorted((creator_id, assignee_id)))] = task_id
+
+    Conversation.objects.bulk_create(
+        [
+            Conversation(user_low_id=low, user_high_id=high, last_task_id=task_id)
+            for (low, high), task_id in last_tasks.items()
+        ],
+        batch_size=1000,
+    )
+
+    for conversation_id, low, high in Conversation.objects.values_list(
+        "id", "user_low_id", "user_high_id"
+    ):
+        pair_tasks = Task.objects.filter(
+            Q(creator_id=low, assignee_id=high) | Q(creator_id=high, assignee_id=low)
+        ).values("id")
+        TaskMessage.objects.filter(task_id__in=pair_tasks).update(
+            conversation_id=conversation_id
+        )
+        last = (
+            TaskMessage.objects.filter(conversation_id=conversation_id)
+            .order_by("-id")
+            .values("id", "created_at")
+            .first()
+        )
+        if last:
+            Conversation.objects.filter(pk=conversation_id).update(
+                last_message_id=last["id"],
+                last_message_at=last["created_at"],
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0014_taskmessage_task_created_at_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Conversation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_message_at', models.DateTimeField(blank=True, null=True)),
+                ('unread_low', models.PositiveIntegerField(default=0)),
+                ('unread_high', models.PositiveIntegerField(default=0)),
+                ('last_message', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='tasks.taskmessage')),
+                ('last_task', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='tasks.task')),
+                ('user_high', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('user_low', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='taskmessage',
+            name='conversation',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='messages', to='tasks.conversation'),
+        ),
+        migrations.AddIndex(
+            model_name='taskmessage',
+            index=models.Index(fields=['conversation', 'created_at'], name='idx_task_message_conv_time'),
+        ),
+        migrations.AddIndex(
+            model_name='conversation',
+            index=models.Index(fields=['user_low', '-last_message_at'], name='idx_conv_low_last'),
+        ),
+        migrations.AddIndex(
+            model_name='conversation',
+            index=models.Index(fields=['user_high', '-last_message_at'], name='idx_conv_high_last'),
+        ),
+        migrations.AddConstraint(
+            model_name='conversation',
+            constraint=models.UniqueConstraint(fields=('user_low', 'user_high'), name='uniq_conversation_pair'),
+        ),
+        migrations.RunPython(fill_conversations, migrations.RunPython.noop),
+    ]
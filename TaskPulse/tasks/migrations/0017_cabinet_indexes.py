@@ -0,0 +1,55 @@
+# Generated by Django 5.2.8 on 2026-10-18 06:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0016_search_vector'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['creator', '-updated_at'], name='idx_task_creator_updated'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['creator', 'status', '-updated_at'], name='idx_task_creator_status_upd'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['creator', 'due_at'], name='idx_task_creator_due'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['assignee', '-updated_at'], name='idx_task_assignee_updated'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['assignee', 'status', '-updated_at'], name='idx_task_assignee_status_upd'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['-updated_at', '-id'], name='idx_task_updated_id'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('status__in', ['new', 'in_progress'])), fields=['due_at'], name='idx_task_open_due'),
+        ),
+        # одиночные индексы FK удаляются после создания составных
+        migrations.AlterField(
+            model_name='task',
+            name='assignee',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='assigned_tasks', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='task',
+            name='creator',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='created_tasks', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-18 07:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0017_cabinet_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='task',
+            name='idx_task_creator_updated',
+        ),
+        migrations.RemoveIndex(
+            model_name='task',
+            name='idx_task_assignee_updated',
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['creator', '-updated_at'], include=('id',), name='idx_task_creator_updated'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['assignee', '-updated_at'], include=('id',), name='idx_task_assignee_updated'),
+        ),
+    ]
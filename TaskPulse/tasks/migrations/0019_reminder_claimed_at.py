@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 07:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0018_visible_to_covering_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='reminder_claimed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
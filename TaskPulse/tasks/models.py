@@ -2,12 +2,18 @@
 
 import uuid
 from datetime import datetime
-from typing import Optional
+from typing import Any, Optional
 
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.contrib.postgres.expressions import ArraySubquery
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models, transaction
+from django.db.models import Case, F, Lookup, Q, When
 from django.utils import timezone
 
+from tasks.services.search import message_search_vector, search_queryset, task_search_vector
+
 User = get_user_model()
 
 
@@ -27,6 +33,79 @@ def task_message_upload_to(instance, filename):
     return f"task_messages/{folder}/{unique}_{filename}"
 
 
+def _change_log_value(value: Any) -> Optional[str]:
+    """Приводит значение поля задачи к строке для TaskChangeLog."""
+
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+class EqualsAny(Lookup):
+    """lhs = ANY(rhs): сравнение с массивом, например ArraySubquery."""
+
+    lookup_name = "any"
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs} = ANY({rhs})", [*lhs_params, *rhs_params]
+
+
+class TaskQuerySet(models.QuerySet):
+    """QuerySet задач с типовыми аннотациями для списков."""
+
+    def with_result_file(self) -> "TaskQuerySet":
+        """
+        Аннотирует путь последнего файла-результата (result_file_name)
+        подзапросом, чтобы сериализатор не делал запрос на каждую задачу.
+        """
+
+        latest_result = (
+            TaskAttachment.objects.filter(
+                task=models.OuterRef("pk"),
+                kind=TaskAttachment.Kind.RESULT,
+            )
+            .order_by("-created_at")
+            .values("file")[:1]
+        )
+        return self.annotate(result_file_name=models.Subquery(latest_result))
+
+    def visible_to(self, user) -> "TaskQuerySet":
+        """
+        Задачи, где пользователь — создатель или исполнитель.
+        Id собираются UNION двух index-only выборок по (creator, updated_at)
+        и (assignee, updated_at), дальше — поиск строк по первичному ключу.
+        Через = ANY(ARRAY(...)): с IN (...) планировщик на крупных
+        пользователях выбирает hash join с полным чтением таблицы.
+        """
+
+        if user is None or not user.is_authenticated:
+            return self.none()
+
+        visible_ids = (
+            self.model.objects.filter(creator_id=user.pk)
+            .order_by()
+            .values("pk")
+            .union(self.model.objects.filter(assignee_id=user.pk).order_by().values("pk"))
+        )
+        return self.filter(EqualsAny(F("pk"), ArraySubquery(visible_ids)))
+
+    def search(self, text: str, weights: str = "", ranked: bool = True) -> "TaskQuerySet":
+        """Полнотекстовый поиск по search_vector (см. services.search)."""
+
+        return search_queryset(self, text, weights=weights, ranked=ranked)
+
+
+class DeferSearchVectorManager(models.Manager):
+    """Менеджер, который не выбирает search_vector: он нужен только в WHERE/ORDER BY поиска."""
+
+    def get_queryset(self):
+        return super().get_queryset().defer("search_vector")
+
+
 class Task(models.Model):
     """Модель задачи."""
 
@@ -48,16 +127,24 @@ class Task(models.Model):
     title = models.CharField(max_length=200)
     description = models.TextField(blank=True)
     executor_comment = models.TextField(blank=True)
+    # tsvector по title/description/executor_comment, пересчитывается самой БД
+    search_vector = models.GeneratedField(
+        expression=task_search_vector(),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
     priority = models.CharField(
         max_length=10,
         choices=Priority.choices,
         default=Priority.MEDIUM,
     )
     due_at = models.DateTimeField(null=True, blank=True)
+    # одиночные индексы FK не нужны: их покрывают составные индексы ниже
     creator = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
         related_name="created_tasks",
+        db_index=False,
     )
     assignee = models.ForeignKey(
         User,
@@ -65,6 +152,7 @@ class Task(models.Model):
         null=True,
         blank=True,
         related_name="assigned_tasks",
+        db_index=False,
     )
     status = models.CharField(
         max_length=20,
@@ -74,12 +162,127 @@ class Task(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     reminder_sent_at = models.DateTimeField(null=True, blank=True)
+    # аренда напоминания воркером: истёкшая (воркер упал до отправки) забирается заново
+    reminder_claimed_at = models.DateTimeField(null=True, blank=True)
+
+    objects = DeferSearchVectorManager.from_queryset(TaskQuerySet)()
+
+    # Поля, изменения которых пишутся в TaskChangeLog, и причины по умолчанию.
+    TRACKED_FIELDS: tuple[str, ...] = ("priority", "status", "due_at")
+    TRACKED_REASONS: dict[str, str] = {
+        "priority": "Изменение приоритета",
+        "status": "Изменение статуса",
+        "due_at": "Изменение срока",
+    }
+    # Всё, что запоминается при загрузке: журнал изменений + ключ KPI-сводки.
+    SNAPSHOT_FIELDS: tuple[str, ...] = TRACKED_FIELDS + (
+        "creator_id",
+        "assignee_id",
+        "updated_at",
+    )
 
     def __str__(self) -> str:
         """Возвращает человеко-читаемое строковое представление задачи."""
 
         return f"[{self.get_priority_display()}] {self.title} ({self.get_status_display()})"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Загружает задачу из БД и запоминает исходные значения отслеживаемых полей."""
+
+        instance = super().from_db(db, field_names, values)
+        instance._snapshot_tracked()
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None) -> None:
+        """Перечитывает задачу из БД и обновляет снимок отслеживаемых полей."""
+
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        self._snapshot_tracked(fields)
+
+    @staticmethod
+    def _field_in(name: str, fields) -> bool:
+        """Проверяет, входит ли поле (по имени или attname) в список fields."""
+
+        return fields is None or name in fields or name.removesuffix("_id") in fields
+
+    def _snapshot_tracked(self, fields=None) -> None:
+        """
+        Запоминает текущие значения отслеживаемых полей как исходные.
+        Отложенные (deferred) поля не трогаем: в БД они не менялись.
+        """
+
+        deferred = self.get_deferred_fields()
+        original = self.__dict__.setdefault("_original_values", {})
+        for name in self.SNAPSHOT_FIELDS:
+            if not self._field_in(name, fields) or name in deferred:
+                continue
+            original[name] = getattr(self, name)
+
+    def _load_original(self) -> dict[str, Any]:
+        """
+        Возвращает снимок исходных значений. БД читается только для полей,
+        которых нет в снимке (задача создана вручную с pk или через only()/defer()).
+        """
+
+        original = self.__dict__.setdefault("_original_values", {})
+        missing = [name for name in self.SNAPSHOT_FIELDS if name not in original]
+        if missing:
+            row = Task.objects.filter(pk=self.pk).values(*missing).first()
+            if row is not None:
+                original.update(row)
+        return original
+
+    def get_original_value(self, field: str) -> Any:
+        """Значение отслеживаемого поля на момент загрузки (или последнего save)."""
+
+        return self.__dict__.get("_original_values", {}).get(field)
+
+    def _collect_changes(self, update_fields=None) -> list[tuple[str, Any, Any]]:
+        """Сравнивает текущие значения отслеживаемых полей со снимком."""
+
+        original = self._load_original()
+        deferred = self.get_deferred_fields()
+
+        changes: list[tuple[str, Any, Any]] = []
+        for name in self.TRACKED_FIELDS:
+            if not self._field_in(name, update_fields) or name in deferred:
+                continue
+            if name not in original:
+                continue
+            old_value = original[name] or None
+            new_value = getattr(self, name) or None
+            if old_value != new_value:
+                changes.append((name, old_value, new_value))
+        return changes
+
+    @classmethod
+    def kpi_bucket(cls, values: dict[str, Any]) -> Optional[tuple]:
+        """
+        Ключ и флаги задачи в KPI-сводке TaskKpiMonthly:
+        (creator_id, assignee_id, month, priority, is_done, is_on_time).
+        Задачи без исполнителя в сводку не попадают.
+        """
+
+        if not values.get("assignee_id"):
+            return None
+
+        due_at = values.get("due_at")
+        updated_at = values.get("updated_at")
+        is_done = values.get("status") == cls.Status.DONE
+        is_on_time = is_done and (
+            due_at is None or (updated_at is not None and updated_at <= due_at)
+        )
+        month = timezone.localtime(due_at).date().replace(day=1) if due_at else None
+        return (
+            values.get("creator_id"),
+            values["assignee_id"],
+            month,
+            values.get("priority"),
+            is_done,
+            is_on_time,
+        )
+
     def mark_overdue(self) -> bool:
         """Помечает задачу просроченной, если дедлайн прошёл."""
 
@@ -88,57 +291,62 @@ class Task(models.Model):
                 and timezone.now() > self.due_at
                 and self.status != self.Status.DONE
         ):
-            old_status = self.status
             self.status = self.Status.OVERDUE
-            self.save(update_fields=["status", "updated_at"])
-            TaskChangeLog.log(
-                task=self,
-                field="status",
-                old_value=old_status,
-                new_value=self.status,
-                reason="Автоматическая пометка просрочки",
+            self.save(
+                update_fields=["status", "updated_at"],
+                change_reason="Автоматическая пометка просрочки",
             )
             return True
         return False
 
-    def save(self, *args, **kwargs) -> None:
-        """Сохраняет задачу и при необходимости логирует изменения."""
+    def save(
+            self,
+            *args,
+            changed_by: Optional[User] = None,
+            change_reason: str = "",
+            **kwargs,
+    ) -> None:
+        """
+        Сохраняет задачу и логирует изменения отслеживаемых полей
+        одним bulk_create, без повторного чтения строки из БД.
+        Если изменился ключ или флаги задачи в KPI-сводке — обновляет её,
+        при создании или смене исполнителя — диалог пары (Conversation).
+        """
 
+        update_fields = kwargs.get("update_fields")
         is_create = self.pk is None
-
-        old: Optional["Task"] = None
-        if not is_create:
-            old = Task.objects.only("priority", "status", "due_at").get(pk=self.pk)
+        changes = [] if is_create else self._collect_changes(update_fields)
+        original = {} if is_create else self._load_original()
+        old_bucket = None if is_create else self.kpi_bucket(original)
+        old_assignee_id = original.get("assignee_id")
 
         super().save(*args, **kwargs)
 
-        if old:
-            if old.priority != self.priority:
-                TaskChangeLog.log(
-                    task=self,
-                    field="priority",
-                    old_value=old.priority,
-                    new_value=self.priority,
-                    reason="Изменение приоритета",
-                )
-            if old.status != self.status:
-                TaskChangeLog.log(
-                    task=self,
-                    changed_by=None,
-                    field="status",
-                    old_value=old.status,
-                    new_value=self.status,
-                    reason="Изменение статуса",
-                )
-            if (old.due_at or None) != (self.due_at or None):
-                TaskChangeLog.log(
-                    task=self,
-                    changed_by=None,
-                    field="due_at",
-                    old_value=old.due_at.isoformat() if old.due_at else None,
-                    new_value=self.due_at.isoformat() if self.due_at else None,
-                    reason="Изменение срока",
-                )
+        if changes:
+            TaskChangeLog.objects.bulk_create(
+                [
+                    TaskChangeLog(
+                        task=self,
+                        changed_by=changed_by,
+                        field=name,
+                        old_value=_change_log_value(old_value),
+                        new_value=_change_log_value(new_value),
+                        reason=change_reason or self.TRACKED_REASONS[name],
+                    )
+                    for name, old_value, new_value in changes
+                ]
+            )
+
+        self._snapshot_tracked(update_fields)
+
+        new_bucket = self.kpi_bucket(self.__dict__["_original_values"])
+        if new_bucket != old_bucket:
+            TaskKpiMonthly.apply_change(old_bucket, new_bucket)
+
+        if (self.assignee_id or old_assignee_id) and (
+                is_create or self.assignee_id != old_assignee_id
+        ):
+            Conversation.sync_task(self, old_assignee_id)
 
     class Meta:
         """Метаданные модели Task."""
@@ -152,6 +360,37 @@ class Task(models.Model):
                 fields=["priority", "status"], name="idx_task_priority_status"
             ),
             models.Index(fields=["due_at"], name="idx_task_due"),
+            GinIndex(fields=["search_vector"], name="idx_task_search"),
+            # кабинет создателя: creator + [status] + сортировка;
+            # id в INCLUDE — index-only scan в TaskQuerySet.visible_to
+            models.Index(
+                fields=["creator", "-updated_at"],
+                name="idx_task_creator_updated",
+                include=["id"],
+            ),
+            models.Index(
+                fields=["creator", "status", "-updated_at"],
+                name="idx_task_creator_status_upd",
+            ),
+            models.Index(fields=["creator", "due_at"], name="idx_task_creator_due"),
+            # кабинет исполнителя: assignee + [status] + сортировка
+            models.Index(
+                fields=["assignee", "-updated_at"],
+                name="idx_task_assignee_updated",
+                include=["id"],
+            ),
+            models.Index(
+                fields=["assignee", "status", "-updated_at"],
+                name="idx_task_assignee_status_upd",
+            ),
+            # /api/tasks/ с курсорной пагинацией по (-updated_at, -id)
+            models.Index(fields=["-updated_at", "-id"], name="idx_task_updated_id"),
+            # пометка просрочки: только незавершённые задачи
+            models.Index(
+                fields=["due_at"],
+                name="idx_task_open_due",
+                condition=Q(status__in=["new", "in_progress"]),
+            ),
         ]
 
     @property
@@ -163,9 +402,16 @@ class Task(models.Model):
     def last_result_file_url(self) -> Optional[str]:
         """
         URL последнего файла-результата от исполнителя,
-        если такой есть.
+        если такой есть. Если задача загружена через
+        Task.objects.with_result_file(), запроса в БД не будет.
         """
 
+        if hasattr(self, "result_file_name"):
+            if not self.result_file_name:
+                return None
+            storage = TaskAttachment._meta.get_field("file").storage
+            return storage.url(self.result_file_name)
+
         result = (
             self.attachments
             .filter(kind=TaskAttachment.Kind.RESULT)
@@ -220,6 +466,80 @@ class TaskAttachment(models.Model):
         ordering = ("-created_at",)
 
 
+class TaskKpiMonthly(models.Model):
+    """
+    Материализованная KPI-сводка: счётчики задач по
+    (создатель, исполнитель, месяц дедлайна, приоритет).
+    Обновляется инкрементально из Task.save()/удаления задачи,
+    полностью пересобирается командой rebuild_kpi_rollup.
+    """
+
+    creator = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="+",
+    )
+    assignee = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="+",
+    )
+    # Первое число месяца дедлайна; NULL — задачи без дедлайна.
+    month = models.DateField(null=True, blank=True)
+    priority = models.CharField(max_length=10, choices=Task.Priority.choices)
+    total = models.IntegerField(default=0)
+    done = models.IntegerField(default=0)
+    done_on_time = models.IntegerField(default=0)
+    done_late = models.IntegerField(default=0)
+
+    def __str__(self) -> str:
+        """Возвращает строковое представление строки сводки."""
+
+        return f"KPI[{self.assignee_id} {self.month} {self.priority}]: {self.done}/{self.total}"
+
+    @classmethod
+    def apply_change(cls, old_bucket: Optional[tuple], new_bucket: Optional[tuple]) -> None:
+        """Переносит задачу из старой ячейки сводки в новую (ячейки — Task.kpi_bucket)."""
+
+        with transaction.atomic():
+            for bucket, sign in ((old_bucket, -1), (new_bucket, 1)):
+                if bucket is None:
+                    continue
+                creator_id, assignee_id, month, priority, is_done, is_on_time = bucket
+                key = {
+                    "creator_id": creator_id,
+                    "assignee_id": assignee_id,
+                    "month": month,
+                    "priority": priority,
+                }
+                if sign > 0:
+                    cls.objects.get_or_create(**key)
+                # при уменьшении строку не создаём: её может уже не быть
+                # (например, каскадное удаление пользователя)
+                cls.objects.filter(**key).update(
+                    total=F("total") + sign,
+                    done=F("done") + sign * is_done,
+                    done_on_time=F("done_on_time") + sign * is_on_time,
+                    done_late=F("done_late") + sign * (is_done and not is_on_time),
+                )
+
+    class Meta:
+        """Метаданные KPI-сводки."""
+
+        constraints = [
+            models.UniqueConstraint(
+                fields=["creator", "assignee", "month", "priority"],
+                name="uniq_task_kpi_monthly_bucket",
+                nulls_distinct=False,
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["assignee", "month"], name="idx_task_kpi_assignee_month"
+            ),
+        ]
+
+
 class TaskChangeLog(models.Model):
     """Журнал изменений задачи."""
 
@@ -393,14 +713,54 @@ class TaskMessage(models.Model):
         null=True,
     )
 
+    search_vector = models.GeneratedField(
+        expression=message_search_vector(),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+
+    # диалог пары создатель ↔ исполнитель, заполняется при создании сообщения
+    conversation = models.ForeignKey(
+        "Conversation",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="messages",
+    )
+
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = DeferSearchVectorManager()
+
     class Meta:
         ordering = ("created_at",)
+        indexes = [
+            models.Index(
+                fields=["task", "created_at"], name="idx_task_message_task_time"
+            ),
+            models.Index(
+                fields=["conversation", "created_at"],
+                name="idx_task_message_conv_time",
+            ),
+            GinIndex(fields=["search_vector"], name="idx_task_message_search"),
+        ]
 
     def __str__(self) -> str:
         return f"Message #{self.pk} for task {self.task_id} from {self.sender_id}"
 
+    def save(self, *args, **kwargs) -> None:
+        """Привязывает новое сообщение к диалогу пары и обновляет его указатели."""
+
+        is_create = self._state.adding
+        with transaction.atomic():
+            if is_create and self.conversation_id is None and self.task.assignee_id:
+                self.conversation = Conversation.get_or_create_for_pair(
+                    self.task.creator_id, self.task.assignee_id
+                )
+            super().save(*args, **kwargs)
+            if is_create and self.conversation_id:
+                self.conversation.register_message(self)
+
     @property
     def sender_name(self) -> str:
         return self.sender.full_name or self.sender.email
@@ -412,3 +772,201 @@ class TaskMessage(models.Model):
     @property
     def is_from_executor(self) -> bool:
         return self.sender_id == self.task.assignee_id
+
+
+class Conversation(models.Model):
+    """
+    Диалог пары пользователей (создатель ↔ исполнитель) по всем их задачам.
+    Пара хранится упорядоченно: user_low_id < user_high_id. Указатели на
+    последнее сообщение/задачу и счётчики непрочитанного обновляются
+    при создании сообщений и задач.
+    """
+
+    user_low = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="+",
+    )
+    user_high = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="+",
+    )
+    # последняя созданная общая задача — в неё пишется сообщение без явного task
+    last_task = models.ForeignKey(
+        Task,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    last_message = models.ForeignKey(
+        TaskMessage,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    last_message_at = models.DateTimeField(null=True, blank=True)
+    unread_low = models.PositiveIntegerField(default=0)
+    unread_high = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        """Метаданные диалога."""
+
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user_low", "user_high"], name="uniq_conversation_pair"
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["user_low", "-last_message_at"], name="idx_conv_low_last"
+            ),
+            models.Index(
+                fields=["user_high", "-last_message_at"], name="idx_conv_high_last"
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"Conversation {self.user_low_id} ↔ {self.user_high_id}"
+
+    @staticmethod
+    def pair(user_a_id: int, user_b_id: int) -> tuple[int, int]:
+        """Упорядоченная пара id пользователей."""
+
+        return (user_a_id, user_b_id) if user_a_id <= user_b_id else (user_b_id, user_a_id)
+
+    @classmethod
+    def for_pair(cls, user_a_id: int, user_b_id: int) -> Optional["Conversation"]:
+        """Диалог пары или None, если его ещё нет."""
+
+        low, high = cls.pair(user_a_id, user_b_id)
+        return cls.objects.filter(user_low_id=low, user_high_id=high).first()
+
+    @classmethod
+    def get_or_create_for_pair(cls, user_a_id: int, user_b_id: int) -> "Conversation":
+        """Диалог пары; создаётся при первом обращении."""
+
+        low, high = cls.pair(user_a_id, user_b_id)
+        conversation, _created = cls.objects.get_or_create(user_low_id=low, user_high_id=high)
+        return conversation
+
+    @staticmethod
+    def pair_tasks(user_a_id: int, user_b_id: int) -> models.QuerySet:
+        """Общие задачи пары: один создатель, другой исполнитель."""
+
+        return Task.objects.filter(
+            Q(creator_id=user_a_id, assignee_id=user_b_id)
+            | Q(creator_id=user_b_id, assignee_id=user_a_id)
+        )
+
+    @staticmethod
+    def is_pair_task(task: Task, user_a_id: int, user_b_id: int) -> bool:
+        """Задача общая для пары (в любую сторону)."""
+
+        return (task.creator_id, task.assignee_id) in (
+            (user_a_id, user_b_id),
+            (user_b_id, user_a_id),
+        )
+
+    @classmethod
+    def sync_task(cls, task: Task, old_assignee_id: Optional[int] = None) -> None:
+        """
+        Учитывает новую задачу или смену исполнителя: запоминает задачу как
+        последнюю общую и переносит её сообщения в диалог новой пары.
+        Диалогу прежней пары последняя общая задача пересчитывается.
+        """
+
+        conversation = None
+        if task.assignee_id:
+            conversation = cls.get_or_create_for_pair(task.creator_id, task.assignee_id)
+            cls.objects.filter(
+                Q(last_task__isnull=True) | Q(last_task_id__lt=task.pk), pk=conversation.pk
+            ).update(last_task=task)
+
+        if old_assignee_id is None:
+            return
+        previous = cls.for_pair(task.creator_id, old_assignee_id)
+        if previous is not None and previous.last_task_id == task.pk:
+            previous.refresh_last_task()
+        if conversation is None:
+            return
+
+        moved = TaskMessage.objects.filter(task=task).exclude(
+            conversation=conversation
+        ).update(conversation=conversation)
+        if moved:
+            conversation.refresh_last_message()
+            if previous is not None:
+                previous.refresh_last_message()
+
+    def other_user_id(self, user_id: int) -> int:
+        """Собеседник пользователя в этом диалоге."""
+
+        return self.user_high_id if user_id == self.user_low_id else self.user_low_id
+
+    def unread_field(self, user_id: int) -> str:
+        """Имя поля-счётчика непрочитанного для пользователя."""
+
+        return "unread_low" if user_id == self.user_low_id else "unread_high"
+
+    def unread_for(self, user_id: int) -> int:
+        """Сколько сообщений пользователь ещё не прочитал."""
+
+        return getattr(self, self.unread_field(user_id))
+
+    def register_message(self, message: TaskMessage) -> None:
+        """Сдвигает указатель на последнее сообщение и увеличивает непрочитанное получателям."""
+
+        is_newer = Q(last_message__isnull=True) | Q(last_message_id__lt=message.pk)
+        counters = {
+            field: F(field) + 1
+            for user_id, field in (
+                (self.user_low_id, "unread_low"),
+                (self.user_high_id, "unread_high"),
+            )
+            if user_id != message.sender_id
+        }
+        Conversation.objects.filter(pk=self.pk).update(
+            last_message=Case(
+                When(is_newer, then=message.pk),
+                default=F("last_message"),
+                output_field=models.BigIntegerField(),
+            ),
+            last_message_at=Case(
+                When(is_newer, then=message.created_at),
+                default=F("last_message_at"),
+                output_field=models.DateTimeField(),
+            ),
+            **counters,
+        )
+
+    def mark_read(self, user_id: int) -> None:
+        """Обнуляет счётчик непрочитанного пользователя (без записи, если он уже 0)."""
+
+        field = self.unread_field(user_id)
+        if getattr(self, field):
+            Conversation.objects.filter(pk=self.pk).update(**{field: 0})
+            setattr(self, field, 0)
+
+    def refresh_last_task(self) -> None:
+        """Пересчитывает последнюю общую задачу пары по таблице задач."""
+
+        last_task_id = (
+            self.pair_tasks(self.user_low_id, self.user_high_id)
+            .order_by("-id")
+            .values_list("id", flat=True)
+            .first()
+        )
+        Conversation.objects.filter(pk=self.pk).update(last_task_id=last_task_id)
+        self.last_task_id = last_task_id
+
+    def refresh_last_message(self) -> None:
+        """Пересчитывает указатель на последнее сообщение по таблице сообщений."""
+
+        last = self.messages.order_by("-id").values("id", "created_at").first()
+        Conversation.objects.filter(pk=self.pk).update(
+            last_message_id=last and last["id"],
+            last_message_at=last and last["created_at"],
+        )
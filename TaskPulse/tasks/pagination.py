@@ -0,0 +1,65 @@
+"""tasks/pagination.py"""
+
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class OptInCursorPagination(CursorPagination):
+    """
+    Keyset-пагинация, которая включается, только если клиент передал
+    cursor или page_size — без них список отдаётся целиком, как раньше.
+    """
+
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Пагинирует только по явному запросу клиента."""
+
+        params = request.query_params
+        if self.cursor_query_param not in params and self.page_size_query_param not in params:
+            return None
+        return super().paginate_queryset(queryset, request, view)
+
+
+class TaskCursorPagination(OptInCursorPagination):
+    """
+    Keyset-пагинация списка задач по (updated_at, id). При ?ordering=
+    по неуникальным полям (priority, status) к сортировке добавляется
+    -id: порядок внутри равных значений фиксирован, курсор не теряет
+    и не повторяет строки.
+    """
+
+    ordering = ("-updated_at", "-id")
+
+    def get_ordering(self, request, queryset, view):
+        ordering = tuple(super().get_ordering(request, queryset, view))
+        if not {"id", "-id", "pk", "-pk"} & set(ordering):
+            ordering += ("-id",)
+        return ordering
+
+
+class TaskSearchPagination(PageNumberPagination):
+    """
+    Постраничная выдача ?search= без ?ordering=: порядок — по релевантности,
+    курсор по search_rank не построить. Включается так же по запросу
+    клиента (page или page_size); ответ содержит count, next, previous.
+    """
+
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Пагинирует только по явному запросу клиента."""
+
+        params = request.query_params
+        if self.page_query_param not in params and self.page_size_query_param not in params:
+            return None
+        return super().paginate_queryset(queryset, request, view)
+
+
+class TaskMessageCursorPagination(OptInCursorPagination):
+    """Keyset-пагинация истории чата по (created_at, id): от новых к старым."""
+
+    ordering = ("-created_at", "-id")
@@ -6,7 +6,7 @@ from django.contrib.auth import get_user_model
 from rest_framework import serializers
 
 from integrations.models import TelegramProfile
-from .models import Task, TaskAttachment, TaskMessage
+from .models import Conversation, Task, TaskAttachment, TaskMessage
 
 User = get_user_model()
 
@@ -113,6 +113,42 @@ class TaskMessageSerializer(serializers.ModelSerializer):
         return TaskMessage.objects.create(**validated_data)
 
 
+class ConversationSerializer(serializers.ModelSerializer):
+    """Диалог во «входящих» текущего пользователя: собеседник, последнее сообщение, непрочитанное."""
+
+    user = serializers.SerializerMethodField(read_only=True)
+    last_message = serializers.SerializerMethodField(read_only=True)
+    unread_count = serializers.SerializerMethodField(read_only=True)
+
+    class Meta:
+        model = Conversation
+        fields = ("id", "user", "last_message", "last_message_at", "unread_count")
+        read_only_fields = fields
+
+    def _current_user_id(self) -> int:
+        return self.context["request"].user.id
+
+    def get_user(self, obj: Conversation) -> Dict[str, Any]:
+        other = obj.user_high if obj.user_low_id == self._current_user_id() else obj.user_low
+        return {"id": other.id, "email": other.email, "full_name": other.full_name}
+
+    def get_last_message(self, obj: Conversation) -> Optional[Dict[str, Any]]:
+        message = obj.last_message
+        if message is None:
+            return None
+        return {
+            "id": message.id,
+            "task": message.task_id,
+            "sender": message.sender_id,
+            "text": message.text,
+            "has_file": bool(message.file),
+            "created_at": serializers.DateTimeField().to_representation(message.created_at),
+        }
+
+    def get_unread_count(self, obj: Conversation) -> int:
+        return obj.unread_for(self._current_user_id())
+
+
 class TaskSerializer(serializers.ModelSerializer):
     """Сериализатор задачи для чтения.
     Отдаёт все ключевые поля задачи, а также связанные вложения.
@@ -189,6 +225,35 @@ class TaskSerializer(serializers.ModelSerializer):
         return attrs
 
 
+class TaskListSerializer(serializers.ModelSerializer):
+    """Облегчённое представление задачи для списков: без описания и вложений."""
+
+    creator_name = serializers.CharField(source="creator.full_name", read_only=True)
+    assignee_name = serializers.CharField(source="assignee.full_name", read_only=True, allow_null=True)
+    result_file = serializers.SerializerMethodField(read_only=True)
+
+    class Meta:
+        model = Task
+        fields = (
+            "id",
+            "title",
+            "priority",
+            "status",
+            "due_at",
+            "creator",
+            "creator_name",
+            "assignee",
+            "assignee_name",
+            "created_at",
+            "updated_at",
+            "result_file",
+        )
+        read_only_fields = fields
+
+    def get_result_file(self, obj: Task) -> Optional[str]:
+        return obj.last_result_file_url()
+
+
 class TaskUpsertSerializer(serializers.ModelSerializer):
     """Сериализатор задачи для создания и изменения."""
     attachment = serializers.FileField(
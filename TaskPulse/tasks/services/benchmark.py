@@ -0,0 +1,317 @@
+"""tasks/services/benchmark.py"""
+"""Сквозной бенчмарк API: задержка p50/p95, число SQL-запросов и размер ответа по эндпоинтам."""
+
+import json
+import math
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from tasks.models import Conversation, Task
+
+# Бюджеты откалиброваны на наборе `manage.py seed_load_data` с параметрами по умолчанию:
+# queries — максимум запросов на один вызов, p95_ms — 95-й перцентиль задержки,
+# bytes — максимальный размер тела ответа. Списки включают запрос свежести для ETag
+# (services.conditional); при включённом кэше кабинетов запросов меньше.
+DEFAULT_BUDGETS: Dict[str, Dict[str, float]] = {
+    "tasks.list": {"queries": 3, "p95_ms": 250, "bytes": 200_000},
+    "tasks.list_lean": {"queries": 2, "p95_ms": 150, "bytes": 60_000},
+    "tasks.retrieve": {"queries": 2, "p95_ms": 100, "bytes": 10_000},
+    "tasks.create": {"queries": 12, "p95_ms": 250, "bytes": 10_000},
+    "cabinet.creator_tasks": {"queries": 2, "p95_ms": 1500, "bytes": 3_000_000},
+    "cabinet.creator_stats": {"queries": 1, "p95_ms": 150, "bytes": 50_000},
+    "cabinet.executor_tasks": {"queries": 2, "p95_ms": 500, "bytes": 1_000_000},
+    "reports.monthly": {"queries": 2, "p95_ms": 150, "bytes": 5_000},
+    "chat.history": {"queries": 3, "p95_ms": 1000, "bytes": 2_000_000},
+    "chat.since": {"queries": 2, "p95_ms": 100, "bytes": 20_000},
+    "telegram.webhook": {"queries": 1, "p95_ms": 100, "bytes": 1_000},
+}
+
+
+@dataclass
+class Scenario:
+    """Один вызов API, который повторяется iterations раз."""
+
+    name: str
+    method: str
+    path: str
+    user: Optional[User] = None
+    data: Optional[Dict[str, Any]] = None
+    headers: Dict[str, str] = field(default_factory=dict)
+
+
+@dataclass
+class ScenarioResult:
+    """Метрики сценария и нарушенные бюджеты."""
+
+    name: str
+    method: str
+    path: str
+    requests: int
+    status_codes: List[int]
+    p50_ms: float
+    p95_ms: float
+    max_ms: float
+    queries: int
+    bytes: int
+    budget: Dict[str, float]
+    violations: List[str]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Перцентиль методом ближайшего ранга."""
+
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def pick_fixtures() -> Dict[str, Any]:
+    """
+    Выбирает данные для сценариев из текущей базы: самый «тяжёлый»
+    создатель, его самый загруженный исполнитель и их последняя задача.
+    """
+
+    top_creator = (
+        Task.objects.values("creator_id")
+        .annotate(n=Count("id"))
+        .order_by("-n")
+        .first()
+    )
+    if top_creator is None:
+        raise ValueError("В базе нет задач: сначала запустите seed_load_data.")
+    creator = User.objects.get(pk=top_creator["creator_id"])
+
+    top_executor = (
+        Task.objects.filter(creator=creator, assignee__isnull=False)
+        .values("assignee_id")
+        .annotate(n=Count("id"))
+        .order_by("-n")
+        .first()
+    )
+    if top_executor is None:
+        raise ValueError("У создателя нет задач с исполнителем.")
+    executor = User.objects.get(pk=top_executor["assignee_id"])
+
+    task = Task.objects.filter(creator=creator, assignee=executor).order_by("-id").first()
+    month_at = timezone.localtime(task.due_at or timezone.now())
+
+    conversation = Conversation.for_pair(creator.id, executor.id)
+    message_ids = (
+        list(conversation.messages.order_by("-id").values_list("id", flat=True)[:10])
+        if conversation
+        else []
+    )
+
+    return {
+        "creator": creator,
+        "executor": executor,
+        "task": task,
+        "month": f"{month_at.year:04d}-{month_at.month:02d}",
+        "since": message_ids[-1] if message_ids else 0,
+    }
+
+
+def build_scenarios(fixtures: Dict[str, Any]) -> List[Scenario]:
+    """Сценарии по всем ключевым эндпоинтам."""
+
+    creator = fixtures["creator"]
+    executor = fixtures["executor"]
+    task = fixtures["task"]
+    month = fixtures["month"]
+    secret = getattr(settings, "TELEGRAM_WEBHOOK_SECRET", None) or "benchmark"
+
+    return [
+        Scenario("tasks.list", "get", reverse("task-list") + "?page_size=50", creator),
+        Scenario(
+            "tasks.list_lean", "get", reverse("task-list") + "?page_size=50&lean=1", creator
+        ),
+        Scenario("tasks.retrieve", "get", reverse("task-detail", args=[task.pk]), creator),
+        Scenario(
+            "tasks.create",
+            "post",
+            reverse("task-list"),
+            creator,
+            data={
+                "title": "Бенчмарк",
+                "description": "Задача из бенчмарка",
+                "priority": Task.Priority.MEDIUM,
+                "assignee": executor.pk,
+                "due_at": (timezone.now() + timezone.timedelta(days=3)).isoformat(),
+            },
+        ),
+        Scenario("cabinet.creator_tasks", "get", reverse("creator-tasks"), creator),
+        Scenario(
+            "cabinet.creator_stats",
+            "get",
+            reverse("creator-stats-by-assignee") + f"?month={month}",
+            creator,
+        ),
+        Scenario("cabinet.executor_tasks", "get", reverse("executor-tasks"), executor),
+        Scenario(
+            "reports.monthly",
+            "get",
+            reverse("reports-monthly") + f"?user={executor.pk}&month={month}",
+            creator,
+        ),
+        Scenario(
+            "chat.history",
+            "get",
+            reverse("task-conversation-messages") + f"?user_id={executor.pk}",
+            creator,
+        ),
+        Scenario(
+            "chat.since",
+            "get",
+            reverse("task-conversation-messages")
+            + f"?user_id={executor.pk}&since={fixtures['since']}",
+            creator,
+        ),
+        Scenario(
+            "telegram.webhook",
+            "post",
+            reverse("telegram-webhook", args=[secret]),
+            data={"message": {"chat": {"id": 1}, "from": {"id": 1}, "text": "/help"}},
+        ),
+    ]
+
+
+def _request(client: APIClient, scenario: Scenario):
+    call: Callable = getattr(client, scenario.method)
+    if scenario.data is None:
+        return call(scenario.path, **scenario.headers)
+    return call(scenario.path, scenario.data, format="json", **scenario.headers)
+
+
+def check_budget(result: ScenarioResult, budget: Dict[str, float], metrics: Iterable[str]) -> List[str]:
+    """Список нарушений бюджета по выбранным метрикам."""
+
+    return [
+        f"{metric}={getattr(result, metric)} > {budget[metric]}"
+        for metric in metrics
+        if metric in budget and getattr(result, metric) > budget[metric]
+    ]
+
+
+def run_scenario(
+        client: APIClient,
+        scenario: Scenario,
+        iterations: int,
+        warmup: int,
+        budget: Dict[str, float],
+        metrics: Iterable[str],
+) -> ScenarioResult:
+    """Прогревает и замеряет сценарий."""
+
+    client.force_authenticate(scenario.user)
+    for _ in range(warmup):
+        _request(client, scenario)
+
+    timings, status_codes, queries, sizes = [], [], [], []
+    for _ in range(iterations):
+        with CaptureQueriesContext(connection) as ctx:
+            started = time.perf_counter()
+            response = _request(client, scenario)
+            timings.append((time.perf_counter() - started) * 1000)
+        status_codes.append(response.status_code)
+        queries.append(len(ctx.captured_queries))
+        sizes.append(len(response.content))
+
+    result = ScenarioResult(
+        name=scenario.name,
+        method=scenario.method.upper(),
+        path=scenario.path,
+        requests=iterations,
+        status_codes=sorted(set(status_codes)),
+        p50_ms=round(percentile(timings, 50), 2),
+        p95_ms=round(percentile(timings, 95), 2),
+        max_ms=round(max(timings), 2),
+        queries=max(queries),
+        bytes=max(sizes),
+        budget=budget,
+        violations=[],
+    )
+    result.violations = check_budget(result, budget, metrics)
+    if any(code >= 400 for code in result.status_codes):
+        result.violations.append(f"status={result.status_codes}")
+    return result
+
+
+def run_benchmarks(
+        iterations: int = 20,
+        warmup: int = 2,
+        budgets: Optional[Dict[str, Dict[str, float]]] = None,
+        only: Optional[Iterable[str]] = None,
+        metrics: Iterable[str] = ("queries", "p95_ms", "bytes"),
+) -> Dict[str, Any]:
+    """
+    Прогоняет сценарии тестовым клиентом в текущем процессе внутри
+    транзакции, которая затем откатывается:
+    создаваемые задачи и сообщения не остаются в базе, а on_commit-уведомления
+    (Celery, Telegram, события) не отправляются. Вебхук Telegram обрабатывается
+    синхронно, исходящие сообщения в Telegram отключены.
+    """
+
+    from TaskPulse.celery_app import celery_app  # pylint: disable=import-outside-toplevel
+
+    budgets = {**DEFAULT_BUDGETS, **(budgets or {})}
+    metrics = tuple(metrics)
+    only = set(only or ())
+    results: List[ScenarioResult] = []
+
+    eager = celery_app.conf.task_always_eager
+    celery_app.conf.task_always_eager = True
+    try:
+        with override_settings(
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+            TELEGRAM_BOT_TOKEN="",
+            TELEGRAM_WEBHOOK_SECRET="",
+        ), transaction.atomic():
+            fixtures = pick_fixtures()
+            client = APIClient()
+            for scenario in build_scenarios(fixtures):
+                if only and scenario.name not in only:
+                    continue
+                results.append(
+                    run_scenario(
+                        client,
+                        scenario,
+                        iterations,
+                        warmup,
+                        budgets.get(scenario.name, {}),
+                        metrics,
+                    )
+                )
+            transaction.set_rollback(True)
+    finally:
+        celery_app.conf.task_always_eager = eager
+
+    return {
+        "generated_at": timezone.now().isoformat(),
+        "database": connection.vendor,
+        "iterations": iterations,
+        "fixtures": {
+            "creator_id": fixtures["creator"].pk,
+            "executor_id": fixtures["executor"].pk,
+            "task_id": fixtures["task"].pk,
+            "month": fixtures["month"],
+        },
+        "passed": not any(result.violations for result in results),
+        "results": [asdict(result) for result in results],
+    }
+
+
+def dump_report(report: Dict[str, Any], path: str) -> None:
+    """Сохраняет отчёт бенчмарка в JSON."""
+
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(report, fh, ensure_ascii=False, indent=2)
@@ -0,0 +1,198 @@
+"""tasks/services/cache.py"""
+"""
+Кэш сериализованных ответов: карточка задачи и списки кабинетов.
+
+Ключи версионные, поэтому при инвалидации ничего не удаляется:
+- карточка — tasks:task:<id>:<версия задачи>:<вариант>;
+- список — tasks:list:<scope>:<user>:<поколение пользователя>:<параметры>.
+Версия задачи и поколения её создателя и исполнителя увеличиваются
+после коммита любых изменений задачи или её вложений, старые записи
+просто перестают читаться и истекают по TTL.
+"""
+
+import hashlib
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+# версии живут дольше ответов: потерянная версия лишь даёт новый ключ
+VERSION_TTL = 7 * 24 * 3600
+
+
+@dataclass
+class CachedPayload:
+    """Сохранённые данные ответа и пользователи, которым его можно отдать."""
+
+    data: Any
+    user_ids: Tuple[int, ...] = ()
+
+
+def cache_enabled() -> bool:
+    return getattr(settings, "TASKS_CACHE_ENABLED", False)
+
+
+def _cache():
+    return caches[getattr(settings, "TASKS_CACHE_ALIAS", "default")]
+
+
+def _new_version() -> int:
+    # время в микросекундах: после потери ключа версия не повторит старую
+    return time.time_ns() // 1000
+
+
+def _task_version_key(task_id: int) -> str:
+    return f"tasks:task:{task_id}:v"
+
+
+def _user_generation_key(user_id: int) -> str:
+    return f"tasks:user:{user_id}:gen"
+
+
+def _current_version(key: str) -> int:
+    cache = _cache()
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _new_version(), VERSION_TTL)
+        version = cache.get(key)
+    return version
+
+
+def _bump(keys: Iterable[str]) -> None:
+    cache = _cache()
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _new_version(), VERSION_TTL)
+
+
+def make_etag(key: str) -> str:
+    return '"' + hashlib.sha1(key.encode()).hexdigest()[:24] + '"'
+
+
+def request_variant(request) -> str:
+    """
+    Часть ключа, от которой зависит представление ответа:
+    хост (абсолютные ссылки на файлы) и формат рендерера.
+    """
+
+    renderer = getattr(request, "accepted_renderer", None)
+    return f"{request.get_host()}:{getattr(renderer, 'format', 'json')}"
+
+
+def task_key(task_id: Any, variant: str) -> Optional[str]:
+    """Ключ карточки задачи или None, если кэш выключен или недоступен."""
+
+    if not cache_enabled() or not str(task_id).isdigit():
+        return None
+    try:
+        version = _current_version(_task_version_key(int(task_id)))
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("Task cache unavailable: %s", exc)
+        return None
+    return f"tasks:task:{task_id}:{version}:{variant}"
+
+
+def list_key(scope: str, user_id: int, params: Iterable[Tuple[str, str]], variant: str) -> Optional[str]:
+    """Ключ страницы списка пользователя или None, если кэш выключен или недоступен."""
+
+    if not cache_enabled():
+        return None
+    try:
+        generation = _current_version(_user_generation_key(user_id))
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("Task cache unavailable: %s", exc)
+        return None
+    query = hashlib.sha1(repr(sorted(params)).encode()).hexdigest()[:16]
+    return f"tasks:list:{scope}:{user_id}:{generation}:{query}:{variant}"
+
+
+def _get(key: str) -> Optional[CachedPayload]:
+    try:
+        return _cache().get(key)
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("Task cache get failed: %s", exc)
+        return None
+
+
+def _set(key: str, payload: CachedPayload) -> None:
+    try:
+        _cache().set(key, payload, getattr(settings, "TASKS_CACHE_TTL", 300))
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("Task cache set failed: %s", exc)
+
+
+def _etag_matches(request, etag: str) -> bool:
+    header = request.META.get("HTTP_IF_NONE_MATCH", "")
+    return etag in (tag.strip() for tag in header.split(","))
+
+
+def cached_response(
+        request,
+        key: Optional[str],
+        build: Callable[[], Response],
+        audience: Optional[Callable[[Any], Iterable[Optional[int]]]] = None,
+) -> Response:
+    """
+    Отдаёт ответ из кэша или строит его через build() и кэширует.
+
+    audience(data) — кому можно отдать закэшированную карточку; без него
+    ключ уже личный (список пользователя), и If-None-Match с совпавшим
+    ETag даёт 304 без чтения кэша и базы.
+    """
+
+    if key is None:
+        return build()
+
+    etag = make_etag(key)
+    if audience is None and _etag_matches(request, etag):
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    payload = _get(key)
+    if payload is not None and (audience is None or request.user.id in payload.user_ids):
+        if _etag_matches(request, etag):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+        return Response(payload.data, headers={"ETag": etag})
+
+    response = build()
+    if response.status_code != status.HTTP_200_OK:
+        return response
+
+    user_ids = tuple(user_id for user_id in audience(response.data) if user_id) if audience else ()
+    _set(key, CachedPayload(response.data, user_ids))
+    response["ETag"] = etag
+    if _etag_matches(request, etag):
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return response
+
+
+def invalidate(task_ids: Iterable[int], user_ids: Iterable[Optional[int]]) -> None:
+    """Увеличивает версии задач и поколения списков пользователей."""
+
+    if not cache_enabled():
+        return
+    keys = [_task_version_key(task_id) for task_id in set(task_ids) if task_id]
+    keys += [_user_generation_key(user_id) for user_id in set(user_ids) if user_id]
+    try:
+        _bump(keys)
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("Task cache invalidation failed: %s", exc)
+
+
+def invalidate_on_commit(task_ids: Iterable[int], user_ids: Iterable[Optional[int]]) -> None:
+    """
+    Инвалидирует после коммита: запрос, прочитавший старые данные до коммита,
+    успеет положить их только под старой версией.
+    """
+
+    task_ids, user_ids = list(task_ids), list(user_ids)
+    transaction.on_commit(lambda: invalidate(task_ids, user_ids))
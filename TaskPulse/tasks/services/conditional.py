@@ -0,0 +1,99 @@
+"""tasks/services/conditional.py"""
+"""
+Условные GET-запросы (ETag) для списков и отчётов.
+
+Свежесть списка — count и max(updated_at) по тому же отфильтрованному
+queryset: один агрегирующий запрос по индексу вместо выборки и сериализации
+строк. Совпал If-None-Match — сразу 304. Last-Modified не отдаём:
+max(updated_at) не меняется, когда задачу удаляют или переназначают
+из списка, а ETag учитывает и count.
+"""
+
+import hashlib
+import json
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, Max, QuerySet
+from django.utils.cache import get_conditional_response
+
+from .cache import request_variant
+
+
+def freshness_aggregates(field: str = "updated_at") -> Dict[str, Any]:
+    """Агрегаты свежести по умолчанию: count и max(field)."""
+
+    return {"count": Count("pk"), "last": Max(field)}
+
+
+def queryset_freshness(queryset: QuerySet, aggregates: Dict[str, Any]) -> Dict[str, Any]:
+    """Значения агрегатов свежести отфильтрованного queryset одним запросом."""
+
+    return queryset.order_by().aggregate(**aggregates)
+
+
+def make_etag(*parts: Any) -> str:
+    raw = json.dumps(parts, cls=DjangoJSONEncoder, sort_keys=True, default=str)
+    return '"' + hashlib.sha1(raw.encode()).hexdigest()[:24] + '"'
+
+
+def query_params(request) -> Iterable[Tuple[str, str]]:
+    return sorted(request.query_params.items())
+
+
+def conditional_response(request, etag: str, build: Callable[[], Any]):
+    """
+    304 без вызова build(), если клиент прислал актуальный ETag,
+    иначе — ответ build() с заголовком ETag.
+    """
+
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        not_modified["ETag"] = etag
+        return not_modified
+
+    response = build()
+    if response.status_code == 200:
+        response["ETag"] = etag
+    return response
+
+
+def conditional_list_response(
+        request,
+        scope: str,
+        queryset: QuerySet,
+        build: Callable[[], Any],
+        aggregates: Optional[Dict[str, Any]] = None,
+):
+    """Условный ответ для списка: ETag из пользователя, параметров и свежести queryset."""
+
+    freshness = queryset_freshness(queryset, aggregates or freshness_aggregates())
+    etag = make_etag(
+        scope,
+        request.user.id,
+        list(query_params(request)),
+        request_variant(request),
+        sorted(freshness.items()),
+    )
+    return conditional_response(request, etag, build)
+
+
+class ConditionalListMixin:
+    """ListAPIView / ViewSet: условный GET списка по свежести отфильтрованного queryset."""
+
+    conditional_scope = ""
+
+    def get_freshness_queryset(self) -> QuerySet:
+        return self.filter_queryset(self.get_queryset())
+
+    def get_freshness_aggregates(self) -> Dict[str, Any]:
+        return freshness_aggregates()
+
+    def list(self, request, *args, **kwargs):
+        return conditional_list_response(
+            request,
+            self.conditional_scope,
+            self.get_freshness_queryset(),
+            lambda: super(ConditionalListMixin, self).list(request, *args, **kwargs),
+            self.get_freshness_aggregates(),
+        )
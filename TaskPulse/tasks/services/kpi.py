@@ -1,61 +1,221 @@
 """tasks/services/kpi.py"""
 """Сервисные функции для расчёта KPI по задачам."""
 
-from typing import Dict, Any, List
+from datetime import date, datetime
+from typing import Dict, Any, Iterable, List, Tuple
 
-from django.db.models import F, Q
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
 
 from accounts.models import User
-from tasks.models import Task
+from tasks.models import Task, TaskKpiMonthly
 
+DONE_Q = Q(status=Task.Status.DONE)
+DONE_ON_TIME_Q = DONE_Q & (Q(due_at__isnull=True) | Q(updated_at__lte=F("due_at")))
 
-def calc_user_month_kpi(user: User, year: int, month: int) -> Dict[str, Any]:
-    """Считает KPI по задачам пользователя за указанный месяц."""
 
-    # Берём задачи, у которых due_at попадает в нужный месяц
-    base_qs = Task.objects.filter(
-        assignee=user,
-        due_at__year=year,
-        due_at__month=month,
-    )
+def month_key(year: int, month: int) -> str:
+    """Ключ месяца в формате YYYY-MM, как он отдаётся в отчётах."""
 
-    total = base_qs.count()
-    done_qs = base_qs.filter(status=Task.Status.DONE)
-    done = done_qs.count()
+    return f"{year:04d}-{month:02d}"
 
-    done_on_time_qs = done_qs.filter(
-        Q(due_at__isnull=True) | Q(updated_at__lte=F("due_at"))
-    )
-    done_on_time = done_on_time_qs.count()
-    done_late = max(done - done_on_time, 0)
-
-    by_priority: List[Dict[str, Any]] = []
-    for priority_value, _label in Task.Priority.choices:
-        p_qs = base_qs.filter(priority=priority_value)
-        p_total = p_qs.count()
-        p_done_qs = p_qs.filter(status=Task.Status.DONE)
-        p_done = p_done_qs.count()
-        p_done_on_time = p_done_qs.filter(
-            Q(due_at__isnull=True) | Q(updated_at__lte=F("due_at"))
-        ).count()
-        p_done_late = max(p_done - p_done_on_time, 0)
-
-        by_priority.append(
+
+def month_bounds(year: int, month: int) -> Tuple[datetime, datetime]:
+    """
+    Полуоткрытый интервал [начало месяца; начало следующего месяца)
+    в текущем часовом поясе — так фильтр по due_at использует индексы.
+    """
+
+    start = timezone.make_aware(datetime(year, month, 1))
+    if month == 12:
+        end = timezone.make_aware(datetime(year + 1, 1, 1))
+    else:
+        end = timezone.make_aware(datetime(year, month + 1, 1))
+    return start, end
+
+
+def empty_kpi(user_id: int, year: int, month: int) -> Dict[str, Any]:
+    """KPI без задач: та же структура, что у calc_user_month_kpi, с нулями."""
+
+    return {
+        "user_id": user_id,
+        "month": month_key(year, month),
+        "total": 0,
+        "done": 0,
+        "done_on_time": 0,
+        "done_late": 0,
+        "by_priority": [
             {
                 "priority": priority_value,
-                "total": p_total,
-                "done": p_done,
-                "done_on_time": p_done_on_time,
-                "done_late": p_done_late,
+                "total": 0,
+                "done": 0,
+                "done_on_time": 0,
+                "done_late": 0,
             }
+            for priority_value, _label in Task.Priority.choices
+        ],
+    }
+
+
+def use_rollup() -> bool:
+    """Читать ли KPI из сводки TaskKpiMonthly (иначе — считаем по Task)."""
+
+    return getattr(settings, "TASKS_KPI_FROM_ROLLUP", True)
+
+
+def kpi_rows(
+        user_ids: Iterable[int],
+        months: Iterable[Tuple[int, int]],
+        **filters: Any,
+):
+    """
+    Один агрегирующий запрос: счётчики по (исполнитель, месяц, приоритет).
+    Дополнительные filters (например, creator=...) накладываются
+    на TaskKpiMonthly или на Task — поле creator есть в обоих.
+    """
+
+    months = sorted(set(months))
+    if use_rollup():
+        return (
+            TaskKpiMonthly.objects.filter(
+                assignee_id__in=list(user_ids),
+                month__in=[date(year, month, 1) for year, month in months],
+                **filters,
+            )
+            .values("assignee_id", "month", "priority")
+            .annotate(
+                total=Sum("total"),
+                done=Sum("done"),
+                done_on_time=Sum("done_on_time"),
+            )
+            .order_by()
         )
 
-    return {
-        "user_id": user.id,
-        "month": f"{year:04d}-{month:02d}",
-        "total": total,
-        "done": done,
-        "done_on_time": done_on_time,
-        "done_late": done_late,
-        "by_priority": by_priority,
+    start, _ = month_bounds(*months[0])
+    _, end = month_bounds(*months[-1])
+
+    return (
+        Task.objects.filter(
+            assignee_id__in=list(user_ids),
+            due_at__gte=start,
+            due_at__lt=end,
+            **filters,
+        )
+        .annotate(month=TruncMonth("due_at"))
+        .values("assignee_id", "month", "priority")
+        .annotate(
+            total=Count("id"),
+            done=Count("id", filter=DONE_Q),
+            done_on_time=Count("id", filter=DONE_ON_TIME_Q),
+        )
+        .order_by()
+    )
+
+
+def calc_users_months_kpi(
+        user_ids: Iterable[int],
+        months: Iterable[Tuple[int, int]],
+        **filters: Any,
+) -> Dict[Tuple[int, str], Dict[str, Any]]:
+    """
+    Считает KPI сразу для нескольких исполнителей и месяцев одним запросом.
+    Возвращает словарь {(user_id, "YYYY-MM"): kpi} — для каждой пары,
+    даже если задач нет, в формате calc_user_month_kpi.
+    """
+
+    user_ids = list(user_ids)
+    months = sorted(set(months))
+    if not user_ids or not months:
+        return {}
+
+    result: Dict[Tuple[int, str], Dict[str, Any]] = {
+        (user_id, month_key(year, month)): empty_kpi(user_id, year, month)
+        for user_id in user_ids
+        for year, month in months
     }
+    priority_index = {
+        priority_value: idx
+        for idx, (priority_value, _label) in enumerate(Task.Priority.choices)
+    }
+
+    for row in kpi_rows(user_ids, months, **filters):
+        row_month = row["month"]
+        if isinstance(row_month, datetime) and timezone.is_aware(row_month):
+            row_month = timezone.localtime(row_month)
+        data = result.get((row["assignee_id"], month_key(row_month.year, row_month.month)))
+        if data is None:
+            # месяц внутри общего диапазона, но не запрошен
+            continue
+
+        done_late = max(row["done"] - row["done_on_time"], 0)
+        for target in (data, data["by_priority"][priority_index[row["priority"]]]):
+            target["total"] += row["total"]
+            target["done"] += row["done"]
+            target["done_on_time"] += row["done_on_time"]
+            target["done_late"] += done_late
+
+    return result
+
+
+def calc_user_month_kpi(user: User, year: int, month: int) -> Dict[str, Any]:
+    """Считает KPI по задачам пользователя за указанный месяц."""
+
+    return calc_users_months_kpi([user.id], [(year, month)])[(user.id, month_key(year, month))]
+
+
+def iter_months(start: Tuple[int, int], end: Tuple[int, int]) -> List[Tuple[int, int]]:
+    """Список (year, month) от start до end включительно."""
+
+    year, month = start
+    months: List[Tuple[int, int]] = []
+    while (year, month) <= end:
+        months.append((year, month))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+def rebuild_kpi_rollup() -> int:
+    """
+    Полностью пересобирает TaskKpiMonthly по текущим задачам.
+    Возвращает количество строк сводки.
+    """
+
+    rows = (
+        Task.objects.filter(assignee__isnull=False)
+        .annotate(month=TruncMonth("due_at"))
+        .values("creator_id", "assignee_id", "month", "priority")
+        .annotate(
+            total=Count("id"),
+            done=Count("id", filter=DONE_Q),
+            done_on_time=Count("id", filter=DONE_ON_TIME_Q),
+        )
+        .order_by()
+    )
+
+    objs = []
+    for row in rows:
+        row_month = row["month"]
+        if row_month is not None:
+            if timezone.is_aware(row_month):
+                row_month = timezone.localtime(row_month)
+            row_month = row_month.date()
+        objs.append(
+            TaskKpiMonthly(
+                creator_id=row["creator_id"],
+                assignee_id=row["assignee_id"],
+                month=row_month,
+                priority=row["priority"],
+                total=row["total"],
+                done=row["done"],
+                done_on_time=row["done_on_time"],
+                done_late=max(row["done"] - row["done_on_time"], 0),
+            )
+        )
+
+    with transaction.atomic():
+        TaskKpiMonthly.objects.all().delete()
+        TaskKpiMonthly.objects.bulk_create(objs, batch_size=1000)
+    return len(objs)
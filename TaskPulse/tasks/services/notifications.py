@@ -5,7 +5,11 @@ from __future__ import annotations
 from typing import Optional, Iterable
 
 from integrations.models import TelegramProfile
-from integrations.utils_telegram import send_telegram_message, build_task_link
+from integrations.utils_telegram import (
+    TelegramSendResult,
+    build_task_link,
+    send_telegram_message,
+)
 from tasks.models import Task, TaskMessage
 
 
@@ -80,15 +84,8 @@ def notify_task_assigned(task: Task) -> None:
     send_telegram_message(profile.chat_id, text, reply_markup=reply_markup)
 
 
-def notify_task_due_soon(task: Task) -> None:
-    """Отправляет напоминание за ~24 часа до дедлайна."""
-
-    if task.assignee_id is None:
-        return
-
-    profile = _get_profile_safe(task.assignee_id)
-    if profile is None:
-        return
+def build_task_due_soon_message(task: Task) -> tuple[str, dict]:
+    """Текст и клавиатура напоминания о дедлайне."""
 
     link = build_task_link(task.id)
 
@@ -123,8 +120,27 @@ def notify_task_due_soon(task: Task) -> None:
             ]
         ]
     }
+    return text, reply_markup
 
-    send_telegram_message(profile.chat_id, text, reply_markup=reply_markup)
+
+def notify_task_due_soon(
+        task: Task, profile: Optional[TelegramProfile] = None
+) -> Optional[TelegramSendResult]:
+    """
+    Отправляет напоминание за ~24 часа до дедлайна.
+    profile можно передать заранее (пакетная рассылка), чтобы не читать его из БД.
+    """
+
+    if task.assignee_id is None:
+        return None
+
+    if profile is None:
+        profile = _get_profile_safe(task.assignee_id)
+    if profile is None:
+        return None
+
+    text, reply_markup = build_task_due_soon_message(task)
+    return send_telegram_message(profile.chat_id, text, reply_markup=reply_markup)
 
 
 def notify_task_completed(task: Task) -> None:
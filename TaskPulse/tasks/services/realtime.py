@@ -0,0 +1,194 @@
+"""tasks/services/realtime.py"""
+"""Канал событий для веб-клиента: новые сообщения в чате и изменения задач."""
+
+import json
+import logging
+import re
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import redis
+import redis.asyncio
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+# сколько последних событий хранится на пользователя
+STREAM_MAXLEN = 200
+# сколько событий максимум отдаётся за один ответ
+READ_BATCH = 100
+
+Event = Tuple[str, Dict[str, Any]]
+
+
+class LocalEventBroker:
+    """Брокер событий в памяти процесса — для тестов и запуска без Redis."""
+
+    def __init__(self, maxlen: int = STREAM_MAXLEN) -> None:
+        self.maxlen = maxlen
+        self.streams: Dict[int, deque] = {}
+        self.seq = 0
+        self.cond = threading.Condition()
+
+    @staticmethod
+    def _parse(cursor: str) -> int:
+        if not cursor.isdigit():
+            raise ValueError(f"Некорректный курсор: {cursor!r}")
+        return int(cursor)
+
+    def publish(self, user_id: int, event: Dict[str, Any]) -> str:
+        with self.cond:
+            self.seq += 1
+            stream = self.streams.setdefault(user_id, deque(maxlen=self.maxlen))
+            stream.append((str(self.seq), event))
+            self.cond.notify_all()
+            return str(self.seq)
+
+    def last_id(self, user_id: int) -> str:
+        with self.cond:
+            stream = self.streams.get(user_id)
+            return stream[-1][0] if stream else "0"
+
+    def read(self, user_id: int, cursor: str, timeout: float) -> List[Event]:
+        after = self._parse(cursor)
+        deadline = time.monotonic() + timeout
+        with self.cond:
+            while True:
+                events = [
+                    (event_id, event)
+                    for event_id, event in self.streams.get(user_id, ())
+                    if int(event_id) > after
+                ]
+                if events:
+                    return events[:READ_BATCH]
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return []
+                self.cond.wait(remaining)
+
+    async def aread(self, user_id: int, cursor: str, timeout: float) -> List[Event]:
+        """read() для async-view: ждёт в отдельном потоке (брокер только для тестов и dev)."""
+
+        return await sync_to_async(self.read, thread_sensitive=False)(user_id, cursor, timeout)
+
+
+class RedisEventBroker:
+    """
+    События в Redis Stream на каждого пользователя: XADD при публикации,
+    XREAD BLOCK при ожидании. В отличие от PUBLISH, события между двумя
+    запросами клиента не теряются — он продолжает с последнего id.
+    """
+
+    CURSOR_RE = re.compile(r"^\d+(-\d+)?$")
+
+    def __init__(self, url: str, maxlen: int = STREAM_MAXLEN) -> None:
+        self.url = url
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self.maxlen = maxlen
+
+    @staticmethod
+    def _key(user_id: int) -> str:
+        return f"taskpulse:events:{user_id}"
+
+    def publish(self, user_id: int, event: Dict[str, Any]) -> str:
+        return self.client.xadd(
+            self._key(user_id),
+            {"data": json.dumps(event)},
+            maxlen=self.maxlen,
+            approximate=True,
+        )
+
+    def last_id(self, user_id: int) -> str:
+        entries = self.client.xrevrange(self._key(user_id), count=1)
+        return entries[0][0] if entries else "0-0"
+
+    def _xread_args(self, user_id: int, cursor: str, timeout: float) -> Dict[str, Any]:
+        if not self.CURSOR_RE.match(cursor):
+            raise ValueError(f"Некорректный курсор: {cursor!r}")
+
+        # block=0 в Redis — ждать бесконечно, поэтому минимум 1 мс
+        return {
+            "streams": {self._key(user_id): cursor},
+            "count": READ_BATCH,
+            "block": max(int(timeout * 1000), 1),
+        }
+
+    @staticmethod
+    def _events(response: Any) -> List[Event]:
+        return [
+            (event_id, json.loads(fields["data"]))
+            for _stream, entries in response or []
+            for event_id, fields in entries
+        ]
+
+    def read(self, user_id: int, cursor: str, timeout: float) -> List[Event]:
+        return self._events(self.client.xread(**self._xread_args(user_id, cursor, timeout)))
+
+    async def aread(self, user_id: int, cursor: str, timeout: float) -> List[Event]:
+        """
+        XREAD BLOCK без занятого потока: ожидание событий — корутина в event loop.
+        Клиент — на вызов: asyncio-соединения привязаны к своему loop (под WSGI
+        у каждого async_to_sync он новый), а блокирующий XREAD всё равно
+        занимает отдельное соединение на всё ожидание.
+        """
+
+        args = self._xread_args(user_id, cursor, timeout)
+        async with redis.asyncio.Redis.from_url(self.url, decode_responses=True) as client:
+            return self._events(await client.xread(**args))
+
+
+_broker: Optional[Any] = None
+_broker_key: Optional[Tuple[str, str]] = None
+_broker_lock = threading.Lock()
+
+
+def get_event_broker():
+    """Общий на процесс брокер событий (TASKS_EVENTS_BACKEND: redis или local)."""
+
+    global _broker, _broker_key  # pylint: disable=global-statement
+
+    backend = getattr(settings, "TASKS_EVENTS_BACKEND", "redis")
+    url = getattr(settings, "TASKS_EVENTS_REDIS_URL", settings.CELERY_BROKER_URL)
+    key = (backend, url)
+
+    if _broker is None or _broker_key != key:
+        with _broker_lock:
+            if _broker is None or _broker_key != key:
+                _broker = LocalEventBroker() if backend == "local" else RedisEventBroker(url)
+                _broker_key = key
+    return _broker
+
+
+def publish_event(user_ids: Iterable[Optional[int]], event: Dict[str, Any]) -> None:
+    """Отправляет событие каждому из пользователей. Ошибки брокера только логируются."""
+
+    broker = get_event_broker()
+    for user_id in {user_id for user_id in user_ids if user_id}:
+        try:
+            broker.publish(user_id, event)
+        except Exception:  # noqa: BLE001
+            logger.exception("Failed to publish %s to user %s", event.get("type"), user_id)
+
+
+def publish_events_on_commit(
+        events: Iterable[Tuple[Iterable[Optional[int]], Dict[str, Any]]],
+) -> None:
+    """Публикует пачку событий [(получатели, событие), ...] после коммита транзакции."""
+
+    events = [(list(user_ids), event) for user_ids, event in events]
+
+    def publish_all() -> None:
+        for user_ids, event in events:
+            publish_event(user_ids, event)
+
+    transaction.on_commit(publish_all)
+
+
+def publish_event_on_commit(user_ids: Iterable[Optional[int]], event: Dict[str, Any]) -> None:
+    """Публикует событие после коммита текущей транзакции."""
+
+    publish_events_on_commit([(user_ids, event)])
@@ -0,0 +1,80 @@
+"""tasks/services/search.py"""
+"""Полнотекстовый поиск по задачам и сообщениям (Postgres tsvector + GIN)."""
+
+import re
+from typing import Iterable, Optional, Tuple
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db.models import F, QuerySet
+
+# Тексты смешанные: ищем сразу по русской и английской морфологии.
+SEARCH_CONFIGS = ("russian", "english")
+
+# Поля задачи и их веса: A — название, B — описание, C — комментарий исполнителя.
+TASK_SEARCH_WEIGHTS: Tuple[Tuple[str, str], ...] = (
+    ("title", "A"),
+    ("description", "B"),
+    ("executor_comment", "C"),
+)
+TASK_SEARCH_FIELDS = tuple(field for field, _weight in TASK_SEARCH_WEIGHTS)
+
+WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def build_search_vector(fields: Iterable[Tuple[str, Optional[str]]]) -> SearchVector:
+    """tsvector по полям во всех SEARCH_CONFIGS (выражение для GeneratedField)."""
+
+    vector = None
+    for field, weight in fields:
+        for config in SEARCH_CONFIGS:
+            part = SearchVector(field, config=config, weight=weight)
+            vector = part if vector is None else vector + part
+    return vector
+
+
+def task_search_vector() -> SearchVector:
+    return build_search_vector(TASK_SEARCH_WEIGHTS)
+
+
+def message_search_vector() -> SearchVector:
+    return build_search_vector([("text", None)])
+
+
+def build_search_query(text: str, weights: str = "") -> Optional[SearchQuery]:
+    """
+    Запрос «все слова по префиксу» (word:* & ...) во всех конфигурациях:
+    «отч» находит «отчёт», как раньше icontains. weights ограничивает
+    поиск полями с указанными весами (например, "A" — только название).
+    None — в строке нет ни одного слова.
+    """
+
+    words = WORD_RE.findall(text or "")
+    if not words:
+        return None
+
+    raw = " & ".join(f"{word}:*{weights}" for word in words)
+    query = None
+    for config in SEARCH_CONFIGS:
+        part = SearchQuery(raw, config=config, search_type="raw")
+        query = part if query is None else query | part
+    return query
+
+
+def search_queryset(
+        queryset: QuerySet, text: str, weights: str = "", ranked: bool = True
+) -> QuerySet:
+    """
+    Фильтрует queryset модели с полем search_vector по тексту.
+    При ranked=True сортирует по релевантности (поле search_rank).
+    """
+
+    query = build_search_query(text, weights)
+    if query is None:
+        return queryset.none()
+
+    queryset = queryset.filter(search_vector=query)
+    if ranked:
+        queryset = queryset.annotate(
+            search_rank=SearchRank(F("search_vector"), query)
+        ).order_by("-search_rank", "-id")
+    return queryset
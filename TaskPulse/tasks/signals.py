@@ -2,15 +2,49 @@
 
 from __future__ import annotations
 
-from django.db.models.signals import pre_save, post_save
+import logging
+from typing import Callable
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, pre_save, post_save
 from django.dispatch import receiver
 
-from tasks.models import Task, TaskMessage
+from tasks.models import Task, TaskAttachment, TaskKpiMonthly, TaskMessage
+from tasks.services.cache import invalidate_on_commit
 from tasks.services.notifications import (
     notify_task_assigned,
     notify_task_completed,
     notify_task_message,
 )
+from tasks.services.realtime import publish_event_on_commit
+from tasks.tasks_reminders import (
+    send_new_task_message_notification,
+    send_task_assigned_notification,
+    send_task_completed_notification,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _deliver(celery_task, object_id: int, sync_call: Callable[[], None]) -> None:
+    """
+    Отправляет уведомление вне HTTP-запроса: ставит Celery-задачу
+    после коммита транзакции. При TASKS_NOTIFICATIONS_ASYNC=False
+    уведомление отправляется синхронно, как раньше.
+    """
+
+    if not getattr(settings, "TASKS_NOTIFICATIONS_ASYNC", True):
+        sync_call()
+        return
+
+    def enqueue() -> None:
+        try:
+            celery_task.delay(object_id)
+        except Exception:  # noqa: BLE001
+            logger.exception("Failed to enqueue %s(%s) to Celery", celery_task.name, object_id)
+
+    transaction.on_commit(enqueue)
 
 
 @receiver(pre_save, sender=Task)
@@ -18,18 +52,14 @@ def store_old_status(sender, instance: Task, **kwargs) -> None:  # noqa: ANN001
     """
     Перед сохранением задачи запоминаем старый статус,
     чтобы в post_save понять, был ли переход в DONE.
+    Статус берётся из снимка, сделанного при загрузке задачи, без запроса в БД.
     """
 
     if not instance.pk:
         instance._old_status = None  # type: ignore[attr-defined]
         return
 
-    try:
-        old = sender.objects.get(pk=instance.pk)
-    except sender.DoesNotExist:  # type: ignore[attr-defined]
-        instance._old_status = None  # type: ignore[attr-defined]
-    else:
-        instance._old_status = old.status  # type: ignore[attr-defined]
+    instance._old_status = instance.get_original_value("status")  # type: ignore[attr-defined]
 
 
 @receiver(post_save, sender=Task)
@@ -37,18 +67,68 @@ def task_post_save(sender, instance: Task, created: bool, **kwargs) -> None:  #
     """
     - При создании задачи с исполнителем → уведомляем исполнителя.
     - При смене статуса на DONE → уведомляем создателя.
-    Все уведомления отправляются синхронно, без Celery.
+    Уведомления уходят через Celery после коммита (см. _deliver).
+    Веб-клиентам обеих сторон уходит событие task.created / task.updated;
+    при переназначении его получает и прежний исполнитель — задача уходит из его списка.
     """
 
+    # прежний исполнитель из снимка: None при создании и без переназначения
+    audience = (
+        instance.creator_id,
+        instance.assignee_id,
+        instance.get_original_value("assignee_id"),
+    )
+    invalidate_on_commit([instance.pk], audience)
+    publish_event_on_commit(
+        audience,
+        {
+            "type": "task.created" if created else "task.updated",
+            "task_id": instance.pk,
+            "status": instance.status,
+        },
+    )
+
     if created and instance.assignee_id:
-        notify_task_assigned(instance)
+        _deliver(
+            send_task_assigned_notification,
+            instance.pk,
+            lambda: notify_task_assigned(instance),
+        )
         return
 
     if not created:
         old_status = getattr(instance, "_old_status", None)
         new_status = instance.status
         if old_status != new_status and new_status == Task.Status.DONE:
-            notify_task_completed(instance)
+            _deliver(
+                send_task_completed_notification,
+                instance.pk,
+                lambda: notify_task_completed(instance),
+            )
+
+
+@receiver(post_delete, sender=Task)
+def task_post_delete(sender, instance: Task, **kwargs) -> None:  # noqa: ANN001
+    """Убирает удалённую задачу из KPI-сводки и сообщает об удалении веб-клиентам."""
+
+    invalidate_on_commit([instance.pk], (instance.creator_id, instance.assignee_id))
+
+    publish_event_on_commit(
+        (instance.creator_id, instance.assignee_id),
+        {"type": "task.deleted", "task_id": instance.pk},
+    )
+
+    old_bucket = Task.kpi_bucket(instance.__dict__.get("_original_values", {}))
+    if old_bucket is not None:
+        TaskKpiMonthly.apply_change(old_bucket, None)
+
+
+@receiver(post_save, sender=TaskAttachment)
+@receiver(post_delete, sender=TaskAttachment)
+def task_attachment_changed(sender, instance: TaskAttachment, **kwargs) -> None:  # noqa: ANN001
+    """Вложения есть только в карточке задачи, списки кабинетов не меняются."""
+
+    invalidate_on_commit([instance.task_id], ())
 
 
 @receiver(post_save, sender=TaskMessage)
@@ -57,10 +137,26 @@ def task_message_post_save(
 ) -> None:
     """
     При создании нового сообщения в чате по задаче
-    отправляем уведомление второй стороне (создателю или исполнителю).
+    отправляем уведомление второй стороне (создателю или исполнителю),
+    а веб-клиентам обеих сторон — событие message.created.
     """
 
     if not created:
         return
 
-    notify_task_message(instance)
+    task = instance.task
+    publish_event_on_commit(
+        (task.creator_id, task.assignee_id),
+        {
+            "type": "message.created",
+            "message_id": instance.pk,
+            "task_id": task.pk,
+            "sender_id": instance.sender_id,
+        },
+    )
+
+    _deliver(
+        send_new_task_message_notification,
+        instance.pk,
+        lambda: notify_task_message(instance),
+    )
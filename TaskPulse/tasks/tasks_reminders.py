@@ -2,19 +2,36 @@
 
 from __future__ import annotations
 
-from datetime import timedelta
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
 
+from asgiref.sync import async_to_sync
 from celery import shared_task
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
 from django.utils import timezone
 
-from tasks.models import Task, TaskMessage
+from integrations.models import TelegramProfile
+from integrations.utils_telegram import (
+    TelegramSendResult,
+    asend_telegram_message,
+    new_async_telegram_client,
+)
+from tasks.models import Task, TaskChangeLog, TaskMessage
+from tasks.services.cache import invalidate_on_commit
+from tasks.services.realtime import publish_events_on_commit
 from tasks.services.notifications import (
+    build_task_due_soon_message,
     notify_task_assigned,
-    notify_task_due_soon,
     notify_task_completed,
     notify_task_message,
 )
 
+logger = logging.getLogger(__name__)
+
 
 @shared_task
 def send_task_assigned_notification(task_id: int) -> None:
@@ -39,7 +56,7 @@ def send_task_completed_notification(task_id: int) -> None:
     """
 
     try:
-        task = Task.objects.get(pk=task_id)
+        task = Task.objects.select_related("assignee").get(pk=task_id)
     except Task.DoesNotExist:
         return
 
@@ -63,36 +80,231 @@ def send_new_task_message_notification(message_id: int) -> None:
     notify_task_message(msg)
 
 
+def _is_final_result(result: Optional[TelegramSendResult]) -> bool:
+    """
+    Можно ли больше не напоминать по задаче: сообщение ушло,
+    профиля нет или ошибка постоянная (4xx, кроме 429).
+    Временные ошибки оставляем на следующий запуск.
+    """
+
+    if result is None or result.ok:
+        return True
+    return result.status_code is not None and result.status_code < 500 and result.status_code != 429
+
+
+def claim_due_soon_tasks(
+        start, end, limit: int, exclude_ids=(), lease=None, now=None
+) -> tuple[list[Task], datetime]:
+    """
+    Атомарно арендует до limit задач-кандидатов: SELECT ... FOR UPDATE SKIP LOCKED
+    и сразу UPDATE reminder_claimed_at в одной транзакции. Строки, которые
+    в этот момент забирает другой воркер, пропускаются, а после коммита
+    аренда не даёт взять их второй раз — одно напоминание не уйдёт дважды.
+    Если воркер упал, не успев отправить, аренда истекает через lease
+    (TASKS_REMINDER_LEASE_MINUTES) и задачу заберёт следующий запуск,
+    пока она остаётся в окне. reminder_sent_at ставится только после отправки.
+    Аренда отсчитывается от момента этой заявки (now, по умолчанию — текущее
+    время), а не от начала запуска: иначе поздние пачки долгого запуска
+    получали бы уже истёкшую аренду и их забирал бы параллельный запуск.
+    Возвращает (задачи, момент заявки) — его ждёт dispatch_due_soon_batch.
+    """
+
+    if lease is None:
+        lease = timedelta(minutes=getattr(settings, "TASKS_REMINDER_LEASE_MINUTES", 5))
+    now = now or timezone.now()
+
+    with transaction.atomic():
+        tasks = list(
+            Task.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(reminder_claimed_at__isnull=True) | Q(reminder_claimed_at__lt=now - lease),
+                assignee__isnull=False,
+                due_at__gte=start,
+                due_at__lte=end,
+                reminder_sent_at__isnull=True,
+            )
+            .exclude(id__in=exclude_ids)
+            .only("id", "title", "assignee_id")
+            .order_by("id")[:limit]
+        )
+        if tasks:
+            Task.objects.filter(id__in=[task.id for task in tasks]).update(
+                reminder_claimed_at=now
+            )
+    return tasks, now
+
+
+async def _send_due_soon(
+        to_send: list[tuple[Task, TelegramProfile]],
+) -> list[TelegramSendResult]:
+    """
+    Отправляет напоминания корутинами через один асинхронный клиент:
+    не больше TASKS_REMINDER_CONCURRENCY запросов к Bot API одновременно,
+    ожидание ответов и лимитов не занимает потоки.
+    """
+
+    client = new_async_telegram_client()
+    semaphore = asyncio.Semaphore(max(1, getattr(settings, "TASKS_REMINDER_CONCURRENCY", 32)))
+
+    async def send(task: Task, profile: TelegramProfile) -> TelegramSendResult:
+        text, reply_markup = build_task_due_soon_message(task)
+        async with semaphore:
+            return await asend_telegram_message(
+                profile.chat_id, text, reply_markup=reply_markup, client=client
+            )
+
+    try:
+        return await asyncio.gather(*(send(task, profile) for task, profile in to_send))
+    finally:
+        if client is not None:
+            await client.aclose()
+
+
+def dispatch_due_soon_batch(tasks: list[Task], claimed_at) -> tuple[int, list[int]]:
+    """
+    Рассылает напоминания по пачке уже заявленных задач:
+    - профили Telegram всех исполнителей читаются одним запросом,
+    - сообщения отправляются конкурентно асинхронным клиентом,
+    - отправленным и закрытым задачам ставится reminder_sent_at,
+      при временной ошибке аренда снимается (reminder_claimed_at = NULL) —
+      по одному UPDATE, следующий запуск попробует ещё раз.
+    claimed_at — момент заявки пачки из claim_due_soon_tasks.
+    Возвращает (количество отправленных/закрытых задач, id снятых заявок).
+    """
+
+    if not tasks:
+        return 0, []
+
+    profiles = {
+        profile.user_id: profile
+        for profile in TelegramProfile.objects.filter(
+            user_id__in={task.assignee_id for task in tasks}
+        )
+    }
+
+    to_send = [
+        (task, profiles[task.assignee_id])
+        for task in tasks
+        if task.assignee_id in profiles
+    ]
+
+    results = async_to_sync(_send_due_soon)(to_send) if to_send else []
+    retry_ids = [
+        task.id
+        for (task, _profile), result in zip(to_send, results)
+        if not _is_final_result(result)
+    ]
+
+    retry_set = set(retry_ids)
+    final_ids = [task.id for task in tasks if task.id not in retry_set]
+    # только свои аренды: истёкшую мог уже забрать другой воркер
+    if final_ids:
+        Task.objects.filter(id__in=final_ids, reminder_claimed_at=claimed_at).update(
+            reminder_sent_at=claimed_at
+        )
+    if retry_ids:
+        Task.objects.filter(id__in=retry_ids, reminder_claimed_at=claimed_at).update(
+            reminder_claimed_at=None
+        )
+    return len(tasks) - len(retry_ids), retry_ids
+
+
 @shared_task
-def send_due_soon_reminders(window_minutes: int = 15) -> int:
+def send_due_soon_reminders(window_minutes: int = 15, batch_size: int = 500) -> int:
     """
     Периодическая задача (раз в 10–15 минут):
     - ищет задачи, у которых дедлайн через ~24 часа
       в окне [24ч; 24ч + window_minutes],
     - у которых reminder_sent_at ещё не проставлен,
     - и есть исполнитель,
-    - отправляет им Telegram-напоминание,
-    - ставит reminder_sent_at, чтобы не слать повторно.
-    Возвращает количество отправленных уведомлений.
+    - заявляет их пачками по batch_size (см. claim_due_soon_tasks),
+      поэтому параллельные запуски на разных воркерах делят работу,
+    - отправляет им Telegram-напоминание.
+    Без TELEGRAM_BOT_TOKEN ничего не заявляет: иначе каждый запуск брал бы
+    и снимал все задачи окна как временную ошибку. Напоминания уйдут,
+    когда токен настроят, пока задачи остаются в окне.
+    Возвращает количество обработанных задач.
     """
 
+    if not getattr(settings, "TELEGRAM_BOT_TOKEN", None):
+        logger.warning("TELEGRAM_BOT_TOKEN не настроен, напоминания о дедлайнах не отправляются")
+        return 0
+
+    # начало запуска задаёт только окно; аренда каждой пачки — от её заявки
     now = timezone.now()
     start = now + timedelta(hours=24)
     end = start + timedelta(minutes=window_minutes)
 
-    qs = Task.objects.filter(
-        assignee__isnull=False,
-        due_at__gte=start,
-        due_at__lte=end,
-        reminder_sent_at__isnull=True,
-    )
-
     sent_count = 0
-
-    for task in qs:
-        notify_task_due_soon(task)
-        task.reminder_sent_at = now
-        task.save(update_fields=["reminder_sent_at"])
-        sent_count += 1
+    released: set[int] = set()
+    while True:
+        batch, claimed_at = claim_due_soon_tasks(start, end, batch_size, exclude_ids=released)
+        if not batch:
+            break
+        done, retry_ids = dispatch_due_soon_batch(batch, claimed_at)
+        sent_count += done
+        # в этом запуске снятые заявки больше не берём
+        released.update(retry_ids)
 
     return sent_count
+
+
+@shared_task
+def mark_overdue_tasks(batch_size: int = 1000) -> int:
+    """
+    Периодическая задача: переводит в OVERDUE все незавершённые задачи
+    с прошедшим дедлайном. Работает пачками по batch_size: на пачку —
+    SELECT ... FOR UPDATE SKIP LOCKED, один UPDATE и один bulk_create
+    записей TaskChangeLog. KPI-сводку не трогает: статус меняется
+    между «не выполненными», флаги done/on-time не меняются.
+    Возвращает количество помеченных задач.
+    """
+
+    now = timezone.now()
+    marked = 0
+
+    while True:
+        with transaction.atomic():
+            rows = list(
+                Task.objects.select_for_update(skip_locked=True)
+                .filter(
+                    due_at__lt=now,
+                    status__in=[Task.Status.NEW, Task.Status.IN_PROGRESS],
+                )
+                .order_by("id")
+                .values_list("id", "status", "creator_id", "assignee_id")[:batch_size]
+            )
+            if not rows:
+                break
+
+            ids = [task_id for task_id, *_rest in rows]
+            Task.objects.filter(id__in=ids).update(
+                status=Task.Status.OVERDUE,
+                updated_at=now,
+            )
+            TaskChangeLog.objects.bulk_create(
+                [
+                    TaskChangeLog(
+                        task_id=task_id,
+                        field="status",
+                        old_value=old_status,
+                        new_value=Task.Status.OVERDUE,
+                        reason="Автоматическая пометка просрочки",
+                    )
+                    for task_id, old_status, _creator_id, _assignee_id in rows
+                ]
+            )
+            invalidate_on_commit(
+                ids,
+                [user_id for _id, _status, *user_ids in rows for user_id in user_ids],
+            )
+            publish_events_on_commit(
+                (
+                    (creator_id, assignee_id),
+                    {"type": "task.updated", "task_id": task_id, "status": Task.Status.OVERDUE},
+                )
+                for task_id, _old_status, creator_id, assignee_id in rows
+            )
+        marked += len(rows)
+
+    return marked
@@ -1,4 +1,1666 @@
-"""tasks/tests.pyq"""
+"""tasks/tests.py"""
 
-# Create your tests here.
+import json
+from datetime import datetime, timedelta
+from io import StringIO
+from unittest import mock, skipUnless
 
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .models import Conversation, Task, TaskAttachment, TaskChangeLog, TaskMessage
+
+User = get_user_model()
+
+# кэш в памяти процесса при любом раннере (manage.py test, pytest, IDE):
+# тестам не нужен Redis, и ключи прошлых прогонов до них не доживают
+LOCMEM_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+def _clear_caches() -> None:
+    from accounts.authentication import local_tokens
+
+    cache.clear()
+    local_tokens.clear()
+
+
+class UserFixturesMixin:
+    """Создание тестовых пользователей с общим паролем и подтверждённой почтой."""
+
+    PASSWORD = "Test1234!"
+
+    @classmethod
+    def create_user(cls, name: str, role=User.Role.EXECUTOR, **extra):
+        extra.setdefault("email_verified", True)
+        return User.objects.create_user(
+            email=f"{name}@example.com", password=cls.PASSWORD, role=role, **extra
+        )
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class TaskPulseTestCase(UserFixturesMixin, TestCase):
+    """
+    База тестов: кэш в памяти, очищается перед каждым тестом.
+    Создатель и исполнитель создаются один раз на класс.
+    """
+
+    def setUp(self):
+        super().setUp()
+        _clear_caches()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.creator = cls.create_user("creator", User.Role.CREATOR)
+        cls.executor = cls.create_user("executor")
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class TaskPulseTransactionTestCase(UserFixturesMixin, TransactionTestCase):
+    """То же для тестов, которым нужны настоящие транзакции."""
+
+    def setUp(self):
+        super().setUp()
+        _clear_caches()
+
+
+class CreatorStatsByAssigneeQueryCountTests(TaskPulseTestCase):
+    """Сводка по сотрудникам не должна делать запросов пропорционально их числу."""
+
+    url = reverse("creator-stats-by-assignee")
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(self.creator)
+        self.executors_count = 0
+
+    def _add_executors(self, count: int) -> None:
+        """Добавляет исполнителей, у каждого — задачи всех статусов в марте 2026."""
+
+        due_at = timezone.make_aware(datetime(2026, 3, 15))
+        for _ in range(count):
+            self.executors_count += 1
+            executor = self.create_user(f"executor{self.executors_count}")
+            for task_status in Task.Status.values:
+                Task.objects.create(
+                    title=f"Задача {task_status}",
+                    creator=self.creator,
+                    assignee=executor,
+                    status=task_status,
+                    due_at=due_at,
+                )
+
+    def _assert_constant_queries(self) -> None:
+        for count in (1, 10):
+            self._add_executors(count)
+            with self.assertNumQueries(1):
+                response = self.client.get(self.url, {"month": "2026-03"})
+            self.assertEqual(response.status_code, 200)
+            results = response.json()["results"]
+            self.assertEqual(len(results), self.executors_count)
+            for row in results:
+                self.assertEqual(row["total"], len(Task.Status.values))
+                self.assertEqual(row["done"], 1)
+
+    @override_settings(TASKS_KPI_FROM_ROLLUP=False)
+    def test_live_aggregation_is_single_query(self):
+        self._assert_constant_queries()
+
+    @override_settings(TASKS_KPI_FROM_ROLLUP=True)
+    def test_rollup_is_single_query(self):
+        self._assert_constant_queries()
+
+    @override_settings(TASKS_KPI_FROM_ROLLUP=False)
+    def test_month_range_is_half_open(self):
+        self._add_executors(1)
+        executor = User.objects.get(email="executor1@example.com")
+        Task.objects.create(
+            title="Следующий месяц",
+            creator=self.creator,
+            assignee=executor,
+            due_at=timezone.make_aware(datetime(2026, 4, 1)),
+        )
+
+        response = self.client.get(self.url, {"month": "2026-03"})
+
+        self.assertEqual(response.json()["results"][0]["total"], len(Task.Status.values))
+
+
+class UsersMonthsKpiTests(TaskPulseTestCase):
+    """Пакетный расчёт KPI совпадает с расчётом по одному пользователю и месяцу."""
+
+    def setUp(self):
+        super().setUp()
+        self.executors = [self.create_user(f"executor{index}") for index in range(2)]
+        # месяцы — от текущей даты: прошедший месяц, следующий за ним (пустой у второго
+        # исполнителя) и дедлайн через 60 дней. Выполненные задачи с прошедшим дедлайном
+        # считаются просроченными, с будущим — выполненными в срок
+        today = timezone.localdate()
+        past = (today.replace(day=1) - timedelta(days=60)).replace(day=1)
+        past_next = (past + timedelta(days=32)).replace(day=1)
+        future = today + timedelta(days=60)
+        for executor, due_dates in zip(
+                self.executors,
+                (
+                    [
+                        datetime(past.year, past.month, 10),
+                        datetime(past_next.year, past_next.month, 1) - timedelta(hours=1),
+                    ],
+                    [datetime(future.year, future.month, future.day, 12)],
+                ),
+        ):
+            for due_at in due_dates:
+                for task_status, priority in (
+                        (Task.Status.DONE, Task.Priority.HIGH),
+                        (Task.Status.NEW, Task.Priority.LOW),
+                ):
+                    Task.objects.create(
+                        title="Задача",
+                        creator=self.creator,
+                        assignee=executor,
+                        status=task_status,
+                        priority=priority,
+                        due_at=timezone.make_aware(due_at),
+                    )
+        self.months = [
+            (past.year, past.month),
+            (past_next.year, past_next.month),
+            (future.year, future.month),
+        ]
+
+    def _assert_matches_single(self) -> None:
+        from .services.kpi import calc_user_month_kpi, calc_users_months_kpi, month_key
+
+        batch = calc_users_months_kpi([executor.id for executor in self.executors], self.months)
+
+        self.assertEqual(len(batch), len(self.executors) * len(self.months))
+        for executor in self.executors:
+            for year, month in self.months:
+                with self.subTest(user=executor.id, month=(year, month)):
+                    self.assertEqual(
+                        batch[(executor.id, month_key(year, month))],
+                        calc_user_month_kpi(executor, year, month),
+                    )
+
+        past, past_next, future = (month_key(year, month) for year, month in self.months)
+        overdue = batch[(self.executors[0].id, past)]
+        self.assertEqual(
+            (overdue["total"], overdue["done"], overdue["done_on_time"], overdue["done_late"]),
+            (4, 2, 0, 2),
+        )
+        upcoming = batch[(self.executors[1].id, future)]
+        self.assertEqual((upcoming["total"], upcoming["done_on_time"]), (2, 1))
+        self.assertEqual(batch[(self.executors[1].id, past_next)]["total"], 0)
+
+    @override_settings(TASKS_KPI_FROM_ROLLUP=False)
+    def test_live_aggregation(self):
+        self._assert_matches_single()
+
+    @override_settings(TASKS_KPI_FROM_ROLLUP=True)
+    def test_rollup(self):
+        self._assert_matches_single()
+
+
+class TeamReportTests(TaskPulseTestCase):
+    """Командный отчёт: только исполнители Создателя, CSV отдаётся потоком."""
+
+    url = reverse("reports-monthly-team")
+
+    def setUp(self):
+        super().setUp()
+        self.own, self.foreign = (
+            self.create_user(name, company=company, full_name=name)
+            for name, company in (("own", "Pulse"), ("foreign", "Other"))
+        )
+        self.foreign_creator = self.create_user(
+            "foreign-creator", User.Role.CREATOR, company="Other"
+        )
+        for creator, executor in ((self.creator, self.own), (self.foreign_creator, self.foreign)):
+            Task.objects.create(
+                title="Задача",
+                creator=creator,
+                assignee=executor,
+                status=Task.Status.DONE,
+                due_at=timezone.make_aware(datetime(2026, 3, 15)),
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(self.creator)
+
+    def test_scoped_to_creators_executors(self):
+        response = self.client.get(self.url, {"month_from": "2026-02", "month_to": "2026-03"})
+
+        self.assertEqual(response.status_code, 200)
+        results = response.json()["results"]
+        self.assertEqual({item["user_id"] for item in results}, {self.own.id})
+        self.assertEqual([item["month"] for item in results], ["2026-02", "2026-03"])
+        self.assertEqual(results[1]["done"], 1)
+
+    def test_blank_company_does_not_leak_other_tenants(self):
+        lonely = self.create_user("lonely", User.Role.CREATOR)
+        User.objects.filter(pk__in=[self.own.pk, self.foreign.pk]).update(company="")
+        self.client.force_authenticate(lonely)
+
+        response = self.client.get(self.url, {"month": "2026-03"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["results"], [])
+
+    def test_csv_is_streamed(self):
+        response = self.client.get(self.url, {"month": "2026-03", "format": "csv"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertIn("attachment;", response["Content-Disposition"])
+        rows = b"".join(response.streaming_content).decode().splitlines()
+        self.assertTrue(rows[0].startswith("user_id,user_email"))
+        # итоговая строка + по строке на каждый приоритет
+        self.assertEqual(len(rows), 1 + 1 + len(Task.Priority.values))
+        self.assertTrue(all(row.startswith(f"{self.own.id},") for row in rows[1:]))
+
+    def test_executor_forbidden(self):
+        self.client.force_authenticate(self.own)
+
+        response = self.client.get(self.url, {"month": "2026-03"})
+
+        self.assertEqual(response.status_code, 403)
+
+
+class TaskKpiRollupTests(TaskPulseTestCase):
+    """Инкрементальная KPI-сводка совпадает с полной пересборкой после любых изменений."""
+
+    def setUp(self):
+        super().setUp()
+        self.first, self.second = (self.create_user(f"executor{index}") for index in range(2))
+        self.task = Task.objects.create(
+            title="Задача",
+            creator=self.creator,
+            assignee=self.first,
+            due_at=timezone.make_aware(datetime(2026, 3, 15)),
+        )
+
+    @staticmethod
+    def _rollup() -> set:
+        from .models import TaskKpiMonthly
+
+        # пустые ячейки после переноса задачи не мешают: в отчётах они дают нули
+        return set(
+            TaskKpiMonthly.objects.filter(total__gt=0).values_list(
+                "creator_id", "assignee_id", "month", "priority",
+                "total", "done", "done_on_time", "done_late",
+            )
+        )
+
+    def _assert_matches_rebuild(self) -> None:
+        from .services.kpi import rebuild_kpi_rollup
+
+        incremental = self._rollup()
+        rebuild_kpi_rollup()
+        self.assertEqual(incremental, self._rollup())
+
+    def test_changes_move_task_between_cells(self):
+        self._assert_matches_rebuild()
+
+        steps = {
+            "status": lambda task: setattr(task, "status", Task.Status.DONE),
+            "due_at": lambda task: setattr(task, "due_at", timezone.make_aware(datetime(2027, 1, 10))),
+            "assignee": lambda task: setattr(task, "assignee", self.second),
+            "priority": lambda task: setattr(task, "priority", Task.Priority.HIGH),
+            "unassign": lambda task: setattr(task, "assignee", None),
+        }
+        for name, change in steps.items():
+            with self.subTest(step=name):
+                task = Task.objects.get(pk=self.task.pk)
+                change(task)
+                task.save()
+                self._assert_matches_rebuild()
+
+    def test_delete_removes_task(self):
+        self.task.status = Task.Status.DONE
+        self.task.save()
+
+        Task.objects.get(pk=self.task.pk).delete()
+
+        self.assertEqual(self._rollup(), set())
+        self._assert_matches_rebuild()
+
+
+class TaskChangeLogTests(TaskPulseTestCase):
+    """Журнал изменений пишется по снимку, сделанному при загрузке задачи."""
+
+    def setUp(self):
+        super().setUp()
+        Task.objects.create(title="Задача", creator=self.creator)
+
+    def test_one_row_per_changed_field_without_select(self):
+        task = Task.objects.get(title="Задача")
+        task.priority = Task.Priority.HIGH
+        task.status = Task.Status.IN_PROGRESS
+        task.due_at = timezone.make_aware(datetime(2026, 3, 15))
+
+        with CaptureQueriesContext(connection) as ctx:
+            task.save(changed_by=self.creator)
+
+        task_selects = [
+            query["sql"]
+            for query in ctx.captured_queries
+            if query["sql"].startswith("SELECT") and 'FROM "tasks_task"' in query["sql"]
+        ]
+        self.assertEqual(task_selects, [])
+        changes = {change.field: change for change in TaskChangeLog.objects.filter(task=task)}
+        self.assertEqual(set(changes), {"priority", "status", "due_at"})
+        self.assertEqual(changes["status"].new_value, Task.Status.IN_PROGRESS)
+        self.assertEqual(changes["priority"].changed_by, self.creator)
+
+        # повторное сохранение без изменений журнал не пополняет
+        task.save()
+        self.assertEqual(TaskChangeLog.objects.filter(task=task).count(), 3)
+
+    def test_update_fields_limits_logged_fields(self):
+        task = Task.objects.get(title="Задача")
+        task.priority = Task.Priority.HIGH
+        task.status = Task.Status.DONE
+        task.save(update_fields=["status", "updated_at"], change_reason="Готово")
+
+        change = TaskChangeLog.objects.get(task=task)
+        self.assertEqual((change.field, change.reason), ("status", "Готово"))
+
+
+@override_settings(TASKS_NOTIFICATIONS_ASYNC=True, TASKS_EVENTS_BACKEND="local")
+class TaskNotificationDeliveryTests(TaskPulseTestCase):
+    """Уведомления ставятся в Celery только после коммита, а не внутри транзакции."""
+
+    def test_assignment_is_enqueued_on_commit(self):
+        from . import signals
+
+        with mock.patch.object(signals.send_task_assigned_notification, "delay") as delay:
+            with self.captureOnCommitCallbacks(execute=False) as callbacks:
+                task = Task.objects.create(
+                    title="Задача", creator=self.creator, assignee=self.executor
+                )
+            delay.assert_not_called()
+
+            for callback in callbacks:
+                callback()
+
+        delay.assert_called_once_with(task.pk)
+
+    def test_message_is_enqueued_on_commit(self):
+        from . import signals
+
+        task = Task.objects.create(title="Задача", creator=self.creator, assignee=self.executor)
+        with mock.patch.object(signals.send_new_task_message_notification, "delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                message = TaskMessage.objects.create(task=task, sender=self.creator, text="привет")
+                delay.assert_not_called()
+
+        delay.assert_called_once_with(message.pk)
+
+
+class DueSoonReminderClaimTests(TaskPulseTestCase):
+    """Аренда напоминаний: пересекающиеся заявки не делят задачи, упавшая аренда истекает."""
+
+    def setUp(self):
+        super().setUp()
+        self.now = timezone.now()
+        self.start = self.now + timedelta(hours=24)
+        self.end = self.start + timedelta(minutes=15)
+        Task.objects.bulk_create(
+            [
+                Task(
+                    title=f"Задача {index}",
+                    creator=self.creator,
+                    assignee=self.executor,
+                    due_at=self.start + timedelta(minutes=5),
+                )
+                for index in range(5)
+            ]
+        )
+
+    def test_overlapping_claims_are_disjoint(self):
+        from .tasks_reminders import claim_due_soon_tasks
+
+        first, _claimed_at = claim_due_soon_tasks(self.start, self.end, limit=2)
+        second, _claimed_at = claim_due_soon_tasks(self.start, self.end, limit=10)
+
+        self.assertEqual(len(first), 2)
+        self.assertEqual(len(second), 3)
+        self.assertFalse({task.id for task in first} & {task.id for task in second})
+        self.assertEqual(claim_due_soon_tasks(self.start, self.end, limit=10)[0], [])
+
+    def test_expired_lease_is_reclaimed_and_sent_once(self):
+        from .tasks_reminders import claim_due_soon_tasks, dispatch_due_soon_batch
+
+        # воркер заявил задачи и упал, не отправив: reminder_sent_at не проставлен
+        claim_due_soon_tasks(self.start, self.end, limit=10, now=self.now)
+        self.assertFalse(Task.objects.filter(reminder_sent_at__isnull=False).exists())
+
+        later = self.now + timedelta(minutes=6)
+        reclaimed, claimed_at = claim_due_soon_tasks(self.start, self.end, limit=10, now=later)
+        self.assertEqual((len(reclaimed), claimed_at), (5, later))
+
+        # профиля Telegram нет — напоминание закрывается без отправки
+        done, retry_ids = dispatch_due_soon_batch(reclaimed, claimed_at)
+
+        self.assertEqual((done, retry_ids), (5, []))
+        self.assertEqual(Task.objects.filter(reminder_sent_at=later).count(), 5)
+        self.assertEqual(
+            claim_due_soon_tasks(
+                self.start, self.end, limit=10, now=later + timedelta(minutes=10)
+            )[0],
+            [],
+        )
+
+    @override_settings(TELEGRAM_BOT_TOKEN="")
+    def test_nothing_is_claimed_without_bot_token(self):
+        from .tasks_reminders import send_due_soon_reminders
+
+        with self.assertLogs("tasks.tasks_reminders", level="WARNING"):
+            self.assertEqual(send_due_soon_reminders(), 0)
+
+        self.assertFalse(Task.objects.filter(reminder_claimed_at__isnull=False).exists())
+
+    @override_settings(TELEGRAM_BOT_TOKEN="token")
+    def test_late_batch_lease_counts_from_its_claim(self):
+        from . import tasks_reminders
+
+        # часы долгого запуска: начало — self.now, каждая пачка заявляется через 4 минуты после предыдущей
+        clock = (self.now + timedelta(minutes=4 * step) for step in range(100))
+        dispatch = tasks_reminders.dispatch_due_soon_batch
+        overlapping = []
+
+        def dispatch_with_overlap(batch, claimed_at):
+            if len(batch) == 1:
+                # последняя пачка ещё уходит, а параллельный запуск стартует позже
+                # аренды, отсчитанной от начала первого запуска
+                overlapping.extend(
+                    tasks_reminders.claim_due_soon_tasks(
+                        self.start, self.end, limit=10, now=self.now + timedelta(minutes=14)
+                    )[0]
+                )
+            return dispatch(batch, claimed_at)
+
+        with (
+            mock.patch.object(tasks_reminders.timezone, "now", side_effect=lambda: next(clock)),
+            mock.patch.object(
+                tasks_reminders, "dispatch_due_soon_batch", side_effect=dispatch_with_overlap
+            ),
+        ):
+            sent = tasks_reminders.send_due_soon_reminders(batch_size=2)
+
+        self.assertEqual(sent, 5)
+        self.assertEqual(overlapping, [])
+        self.assertEqual(
+            sorted(Task.objects.values_list("reminder_sent_at", flat=True)),
+            [self.now + timedelta(minutes=4 * step) for step in (1, 1, 2, 2, 3)],
+        )
+
+
+class DueSoonReminderDispatchTests(TaskPulseTestCase):
+    """Пакетная рассылка: профили одним запросом, отметки — по одному UPDATE, временные ошибки — на повтор."""
+
+    def setUp(self):
+        from integrations.models import TelegramProfile
+
+        super().setUp()
+        self.now = timezone.now()
+        self.tasks = []
+        for index in range(4):
+            executor = self.create_user(f"executor{index}")
+            # у последнего исполнителя Telegram не привязан
+            if index < 3:
+                TelegramProfile.objects.create(
+                    user=executor, telegram_user_id=100 + index, chat_id=100 + index
+                )
+            self.tasks.append(
+                Task.objects.create(
+                    title=f"Задача {index}",
+                    creator=self.creator,
+                    assignee=executor,
+                    due_at=self.now + timedelta(hours=24, minutes=5),
+                )
+            )
+        Task.objects.update(reminder_claimed_at=self.now)
+
+    def test_batch_dispatch(self):
+        from integrations.utils_telegram import TelegramSendResult
+
+        from .tasks_reminders import dispatch_due_soon_batch
+
+        async def send(chat_id, text, reply_markup=None, client=None):
+            # чат 102 — временная ошибка Bot API
+            if chat_id == 102:
+                return TelegramSendResult(ok=False, status_code=502)
+            return TelegramSendResult(ok=True, message_id=chat_id)
+
+        tasks = list(Task.objects.filter(id__in=[task.id for task in self.tasks]).order_by("id"))
+        with (
+            mock.patch("tasks.tasks_reminders.asend_telegram_message", side_effect=send) as sender,
+            CaptureQueriesContext(connection) as ctx,
+        ):
+            done, retry_ids = dispatch_due_soon_batch(tasks, self.now)
+
+        self.assertEqual((done, retry_ids), (3, [self.tasks[2].id]))
+        self.assertEqual(sorted(call.args[0] for call in sender.call_args_list), [100, 101, 102])
+        # все отправки — через один клиент пачки
+        self.assertEqual(len({id(call.kwargs["client"]) for call in sender.call_args_list}), 1)
+
+        sql = [query["sql"] for query in ctx.captured_queries]
+        self.assertEqual(sum('FROM "integrations_telegramprofile"' in q for q in sql), 1)
+        self.assertEqual(sum(q.startswith('UPDATE "tasks_task"') for q in sql), 2)
+
+        sent = set(Task.objects.filter(reminder_sent_at=self.now).values_list("id", flat=True))
+        self.assertEqual(sent, {self.tasks[0].id, self.tasks[1].id, self.tasks[3].id})
+        retry = Task.objects.get(id=self.tasks[2].id)
+        self.assertEqual((retry.reminder_sent_at, retry.reminder_claimed_at), (None, None))
+
+
+class DueSoonReminderConcurrentClaimTests(TaskPulseTransactionTestCase):
+    """Заявка пропускает строки, заблокированные параллельной транзакцией другого воркера."""
+
+    def test_locked_rows_are_skipped(self):
+        import threading
+
+        from django.db import connections, transaction
+
+        from .tasks_reminders import claim_due_soon_tasks
+
+        creator = self.create_user("creator", User.Role.CREATOR)
+        now = timezone.now()
+        start, end = now + timedelta(hours=24), now + timedelta(hours=24, minutes=15)
+        Task.objects.bulk_create(
+            [
+                Task(title=f"Задача {index}", creator=creator, assignee=creator,
+                     due_at=start + timedelta(minutes=1))
+                for index in range(4)
+            ]
+        )
+
+        claimed, release = threading.Event(), threading.Event()
+        other: list = []
+
+        def other_worker():
+            try:
+                with transaction.atomic():
+                    other.extend(claim_due_soon_tasks(start, end, limit=2, now=now)[0])
+                    # держим блокировки строк, пока основной поток делает свою заявку
+                    claimed.set()
+                    release.wait(10)
+            finally:
+                connections.close_all()
+
+        thread = threading.Thread(target=other_worker)
+        thread.start()
+        try:
+            self.assertTrue(claimed.wait(10))
+            mine, _claimed_at = claim_due_soon_tasks(start, end, limit=10, now=now)
+        finally:
+            release.set()
+            thread.join()
+
+        self.assertEqual((len(other), len(mine)), (2, 2))
+        self.assertFalse({task.id for task in other} & {task.id for task in mine})
+
+
+class MarkOverdueTasksTests(TaskPulseTestCase):
+    """Пометка просрочки пачками: один UPDATE на пачку и запись в журнале на каждую задачу."""
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.creator
+        past = timezone.now() - timedelta(days=1)
+        statuses = [Task.Status.NEW, Task.Status.IN_PROGRESS] * 2 + [Task.Status.NEW]
+        self.overdue = Task.objects.bulk_create(
+            [
+                Task(title=f"Просрочена {index}", creator=self.user, assignee=self.user,
+                     status=status, due_at=past)
+                for index, status in enumerate(statuses)
+            ]
+        )
+        self.untouched = Task.objects.bulk_create(
+            [
+                Task(title="Выполнена", creator=self.user, status=Task.Status.DONE, due_at=past),
+                Task(title="В срок", creator=self.user, due_at=timezone.now() + timedelta(days=1)),
+                Task(title="Без дедлайна", creator=self.user),
+            ]
+        )
+        self.old_statuses = {task.id: task.status for task in self.overdue}
+
+    def test_marks_in_batches_with_change_log(self):
+        from .tasks_reminders import mark_overdue_tasks
+
+        with CaptureQueriesContext(connection) as ctx:
+            marked = mark_overdue_tasks(batch_size=2)
+
+        self.assertEqual(marked, 5)
+        updates = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith('UPDATE "tasks_task"')]
+        self.assertEqual(len(updates), 3)
+
+        self.assertEqual(
+            set(Task.objects.filter(status=Task.Status.OVERDUE).values_list("id", flat=True)),
+            set(self.old_statuses),
+        )
+        self.assertEqual(
+            [task.status for task in Task.objects.filter(id__in=[t.id for t in self.untouched]).order_by("id")],
+            [Task.Status.DONE, Task.Status.NEW, Task.Status.NEW],
+        )
+
+        logs = TaskChangeLog.objects.filter(field="status")
+        self.assertEqual(
+            {(log.task_id, log.old_value, log.new_value) for log in logs},
+            {(task_id, status, Task.Status.OVERDUE) for task_id, status in self.old_statuses.items()},
+        )
+        self.assertEqual(logs.count(), 5)
+
+        # повторный запуск ничего не находит и журнал не дублирует
+        self.assertEqual(mark_overdue_tasks(batch_size=2), 0)
+        self.assertEqual(TaskChangeLog.objects.count(), 5)
+
+
+class TaskListResultFileQueryCountTests(TaskPulseTestCase):
+    """Бенчмарк GET /api/tasks/: число запросов не зависит от количества задач."""
+
+    url = reverse("task-list")
+    # свежесть для ETag, задачи (+ result_file подзапросом), attachments
+    EXPECTED_QUERIES = 3
+    # lean-режим: свежесть и задачи
+    EXPECTED_LEAN_QUERIES = 2
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(self.creator)
+
+    def _seed(self, total: int) -> None:
+        """Доводит число задач до total, у каждой — файл-результат."""
+
+        missing = total - Task.objects.count()
+        tasks = Task.objects.bulk_create(
+            [Task(title=f"Задача {i}", creator=self.creator) for i in range(missing)]
+        )
+        TaskAttachment.objects.bulk_create(
+            [
+                TaskAttachment(
+                    task=task,
+                    file=f"task_attachments/{task.pk}/result.txt",
+                    kind=TaskAttachment.Kind.RESULT,
+                )
+                for task in tasks
+            ]
+        )
+
+    def test_query_count_is_constant(self):
+        for total in (10, 100, 1000):
+            with self.subTest(total=total):
+                self._seed(total)
+                with self.assertNumQueries(self.EXPECTED_QUERIES):
+                    response = self.client.get(self.url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.json()), total)
+                self.assertTrue(
+                    all(item["result_file"].endswith("/result.txt") for item in response.json())
+                )
+
+                with self.assertNumQueries(self.EXPECTED_LEAN_QUERIES):
+                    response = self.client.get(self.url, {"lean": "1"})
+                self.assertEqual(len(response.json()), total)
+                self.assertNotIn("attachments", response.json()[0])
+
+    def test_cursor_pagination_walks_all_tasks(self):
+        self._seed(25)
+
+        seen = []
+        response = self.client.get(self.url, {"page_size": 10, "lean": "1"})
+        while True:
+            page = response.json()
+            seen.extend(item["id"] for item in page["results"])
+            if not page["next"]:
+                break
+            response = self.client.get(page["next"])
+
+        self.assertEqual(len(seen), 25)
+        self.assertEqual(len(set(seen)), 25)
+
+    def test_cursor_pagination_on_non_unique_ordering(self):
+        priorities = list(Task.Priority)
+        statuses = [Task.Status.NEW, Task.Status.IN_PROGRESS]
+        Task.objects.bulk_create(
+            [
+                Task(
+                    title=f"Задача {i}",
+                    creator=self.creator,
+                    priority=priorities[i % len(priorities)],
+                    status=statuses[i % len(statuses)],
+                )
+                for i in range(25)
+            ]
+        )
+
+        for field in ("priority", "-status"):
+            with self.subTest(ordering=field):
+                seen = []
+                response = self.client.get(
+                    self.url, {"page_size": 4, "lean": "1", "ordering": field}
+                )
+                while True:
+                    page = response.json()
+                    seen.extend(item["id"] for item in page["results"])
+                    if not page["next"]:
+                        break
+                    response = self.client.get(page["next"])
+
+                # внутри равных значений — по убыванию id
+                expected = Task.objects.order_by(field, "-id").values_list("id", flat=True)
+                self.assertEqual(seen, list(expected))
+
+
+class ConversationMessagesPollingTests(TaskPulseTestCase):
+    """Опрос чата: since отдаёт только новые сообщения, история — страницами."""
+
+    url = reverse("task-conversation-messages")
+
+    def setUp(self):
+        super().setUp()
+        self.task = Task.objects.create(
+            title="Задача", creator=self.creator, assignee=self.executor
+        )
+        self.conversation = Conversation.for_pair(self.creator.pk, self.executor.pk)
+        TaskMessage.objects.bulk_create(
+            [
+                TaskMessage(
+                    task=self.task,
+                    conversation=self.conversation,
+                    sender=self.executor,
+                    text=f"msg {i}",
+                )
+                for i in range(30)
+            ]
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.creator)
+
+    def test_since_returns_only_new_messages(self):
+        last_id = TaskMessage.objects.order_by("-id").values_list("id", flat=True)[0]
+        new_message = TaskMessage.objects.create(
+            task=self.task, sender=self.executor, text="новое"
+        )
+
+        response = self.client.get(
+            self.url, {"user_id": self.executor.pk, "since": last_id}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item["id"] for item in response.json()], [new_message.pk])
+
+    def test_without_params_returns_full_history(self):
+        # диалог, свежесть для ETag, сообщения
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url, {"user_id": self.executor.pk})
+
+        self.assertEqual(len(response.json()), 30)
+
+    def test_cursor_pagination_walks_history(self):
+        seen = []
+        response = self.client.get(
+            self.url, {"user_id": self.executor.pk, "page_size": 10}
+        )
+        while True:
+            page = response.json()
+            seen.extend(item["id"] for item in page["results"])
+            if not page["next"]:
+                break
+            response = self.client.get(page["next"])
+
+        self.assertEqual(len(set(seen)), 30)
+        self.assertEqual(seen, sorted(seen, reverse=True))
+
+
+class ConversationInboxTests(TaskPulseTestCase):
+    """Диалог пары ведётся при создании задач и сообщений."""
+
+    def setUp(self):
+        super().setUp()
+        self.first_task = Task.objects.create(
+            title="Первая", creator=self.creator, assignee=self.executor
+        )
+        self.last_task = Task.objects.create(
+            title="Вторая", creator=self.creator, assignee=self.executor
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.creator)
+
+    def test_send_uses_last_common_task_and_updates_inbox(self):
+        response = self.client.post(
+            reverse("task-conversation-messages"),
+            {"user_id": self.executor.pk, "text": "привет"},
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["task"], self.last_task.pk)
+
+        self.client.force_authenticate(self.executor)
+        inbox = self.client.get(reverse("task-conversations")).json()
+        self.assertEqual(len(inbox), 1)
+        self.assertEqual(inbox[0]["user"]["id"], self.creator.pk)
+        self.assertEqual(inbox[0]["last_message"]["id"], response.json()["id"])
+        self.assertEqual(inbox[0]["unread_count"], 1)
+
+        self.client.get(
+            reverse("task-conversation-messages"), {"user_id": self.creator.pk}
+        )
+        inbox = self.client.get(reverse("task-conversations")).json()
+        self.assertEqual(inbox[0]["unread_count"], 0)
+
+    def test_reassigned_task_moves_messages(self):
+        other_executor = self.create_user("other")
+        message = TaskMessage.objects.create(
+            task=self.first_task, sender=self.creator, text="до переназначения"
+        )
+
+        self.first_task.assignee = other_executor
+        self.first_task.save()
+
+        message.refresh_from_db()
+        self.assertEqual(
+            message.conversation, Conversation.for_pair(self.creator.pk, other_executor.pk)
+        )
+        old_conversation = Conversation.for_pair(self.creator.pk, self.executor.pk)
+        self.assertIsNone(old_conversation.last_message_id)
+
+    def test_send_after_reassigning_last_task(self):
+        other_executor = self.create_user("other")
+        self.last_task.assignee = other_executor
+        self.last_task.save()
+
+        conversation = Conversation.for_pair(self.creator.pk, self.executor.pk)
+        self.assertEqual(conversation.last_task_id, self.first_task.pk)
+
+        response = self.client.post(
+            reverse("task-conversation-messages"),
+            {"user_id": self.executor.pk, "text": "по первой задаче"},
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["task"], self.first_task.pk)
+
+        # снятие исполнителя: общих задач с прежним исполнителем не осталось
+        self.first_task.assignee = None
+        self.first_task.save()
+        self.assertIsNone(Conversation.for_pair(self.creator.pk, self.executor.pk).last_task_id)
+        response = self.client.post(
+            reverse("task-conversation-messages"),
+            {"user_id": self.executor.pk, "text": "привет"},
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_send_with_stale_last_task_pointer(self):
+        other_executor = self.create_user("other")
+        # указатель, устаревший до исправления: задача уже у другого исполнителя
+        Task.objects.filter(pk=self.last_task.pk).update(assignee=other_executor)
+
+        response = self.client.post(
+            reverse("task-conversation-messages"),
+            {"user_id": self.executor.pk, "text": "привет"},
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["task"], self.first_task.pk)
+
+
+@override_settings(TASKS_EVENTS_BACKEND="local", TASKS_EVENTS_LONGPOLL_TIMEOUT=1)
+class TaskEventsLongPollTests(TaskPulseTestCase):
+    """Long-poll канал получает события из post_save после коммита."""
+
+    url = reverse("task-events")
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(self.executor)
+
+    def test_message_and_status_change_are_delivered(self):
+        cursor = self.client.get(self.url).json()["cursor"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            task = Task.objects.create(
+                title="Задача", creator=self.creator, assignee=self.executor
+            )
+        with self.captureOnCommitCallbacks(execute=True):
+            message = TaskMessage.objects.create(
+                task=task, sender=self.creator, text="привет"
+            )
+
+        response = self.client.get(self.url, {"cursor": cursor})
+
+        self.assertEqual(response.status_code, 200)
+        events = response.json()["events"]
+        self.assertEqual(
+            [event["type"] for event in events], ["task.created", "message.created"]
+        )
+        self.assertEqual(events[1]["message_id"], message.pk)
+        self.assertEqual(response.json()["cursor"], events[-1]["id"])
+
+    def test_reassignment_notifies_previous_assignee(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            task = Task.objects.create(
+                title="Задача", creator=self.creator, assignee=self.executor
+            )
+        cursor = self.client.get(self.url).json()["cursor"]
+
+        other_executor = self.create_user("other")
+        task.assignee = other_executor
+        with self.captureOnCommitCallbacks(execute=True):
+            task.save()
+
+        events = self.client.get(self.url, {"cursor": cursor}).json()["events"]
+        self.assertEqual(
+            [(event["type"], event["task_id"]) for event in events], [("task.updated", task.pk)]
+        )
+
+    def test_empty_poll_returns_same_cursor(self):
+        cursor = self.client.get(self.url).json()["cursor"]
+
+        response = self.client.get(self.url, {"cursor": cursor, "timeout": 0})
+
+        self.assertEqual(response.json(), {"cursor": cursor, "events": []})
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.url, {"cursor": "abc"})
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_redis_broker_closes_async_client(self):
+        from asgiref.sync import async_to_sync
+
+        from .services.realtime import RedisEventBroker
+
+        client = mock.AsyncMock()
+        client.__aenter__.return_value = client
+        client.xread.return_value = [
+            ("taskpulse:events:1", [("5-0", {"data": json.dumps({"type": "task.updated"})})])
+        ]
+        with mock.patch("redis.asyncio.Redis.from_url", return_value=client):
+            events = async_to_sync(RedisEventBroker("redis://localhost:6379/0").aread)(1, "0-0", 0)
+
+        self.assertEqual(events, [("5-0", {"type": "task.updated"})])
+        client.__aexit__.assert_awaited_once()
+
+    @override_settings(TASKS_EVENTS_LONGPOLL_TIMEOUT=25, TASKS_EVENTS_LONGPOLL_WSGI_TIMEOUT=0)
+    def test_wsgi_does_not_hold_worker(self):
+        broker = mock.Mock()
+        broker.aread = mock.AsyncMock(return_value=[])
+        with mock.patch("tasks.views.get_event_broker", return_value=broker):
+            response = self.client.get(self.url, {"cursor": "0-0", "timeout": 20})
+
+        self.assertEqual(response.json(), {"cursor": "0-0", "events": []})
+        broker.aread.assert_awaited_once_with(self.executor.pk, "0-0", 0)
+
+
+class TaskFullTextSearchTests(TaskPulseTestCase):
+    """Поиск по search_vector: префиксы, русская морфология, ранжирование."""
+
+    url = reverse("task-list")
+
+    def setUp(self):
+        super().setUp()
+        self.in_description = Task.objects.create(
+            title="Созвон с клиентом",
+            description="Подготовить квартальные отчёты",
+            creator=self.creator,
+        )
+        self.in_title = Task.objects.create(
+            title="Квартальный отчёт",
+            description="Собрать цифры",
+            creator=self.creator,
+        )
+        Task.objects.create(title="Обновить сайт", creator=self.creator)
+        self.client = APIClient()
+        self.client.force_authenticate(self.creator)
+
+    def test_search_is_ranked_and_stemmed(self):
+        response = self.client.get(self.url, {"search": "отчёты", "lean": "1"})
+
+        self.assertEqual(
+            [item["id"] for item in response.json()],
+            [self.in_title.pk, self.in_description.pk],
+        )
+
+    def test_paginated_search_keeps_rank_order(self):
+        response = self.client.get(self.url, {"search": "отчёты", "lean": "1", "page_size": 1})
+
+        page = response.json()
+        self.assertEqual(page["count"], 2)
+        self.assertEqual([item["id"] for item in page["results"]], [self.in_title.pk])
+
+        page = self.client.get(page["next"]).json()
+        self.assertEqual([item["id"] for item in page["results"]], [self.in_description.pk])
+        self.assertIsNone(page["next"])
+
+    def test_name_filter_matches_title_prefix_only(self):
+        response = self.client.get(self.url, {"name": "кварт", "lean": "1"})
+
+        self.assertEqual([item["id"] for item in response.json()], [self.in_title.pk])
+
+    def test_vector_follows_updates(self):
+        self.in_title.executor_comment = "Report sent"
+        self.in_title.save()
+
+        self.assertEqual(list(Task.objects.search("reports")), [self.in_title])
+
+
+@skipUnless(connection.vendor == "postgresql", "планы запросов проверяются на Postgres")
+class TaskListQueryPlanTests(TaskPulseTestCase):
+    """
+    EXPLAIN всех списков задач на засеянной базе:
+    ни один запрос не должен читать tasks_task через Seq Scan.
+    """
+
+    CREATORS = 20
+    EXECUTORS = 100
+    TASKS = 20_000
+
+    @classmethod
+    def setUpTestData(cls):
+        creators = User.objects.bulk_create(
+            [
+                User(email=f"creator{i}@example.com", role=User.Role.CREATOR)
+                for i in range(cls.CREATORS)
+            ]
+        )
+        executors = User.objects.bulk_create(
+            [
+                User(email=f"executor{i}@example.com", role=User.Role.EXECUTOR)
+                for i in range(cls.EXECUTORS)
+            ]
+        )
+        statuses = Task.Status.values
+        priorities = Task.Priority.values
+        start = timezone.now() - timedelta(days=365)
+        Task.objects.bulk_create(
+            [
+                Task(
+                    title=f"Задача {i}",
+                    description="Подготовить отчёт" if i % 50 == 0 else "",
+                    creator=creators[i % cls.CREATORS],
+                    assignee=executors[i % cls.EXECUTORS] if i % 10 else None,
+                    status=statuses[i % len(statuses)],
+                    priority=priorities[i % len(priorities)],
+                    due_at=start + timedelta(hours=i),
+                )
+                for i in range(cls.TASKS)
+            ],
+            batch_size=2000,
+        )
+        with connection.cursor() as cursor:
+            # как после autovacuum: свежие строки не висят в pending list GIN-индекса
+            cursor.execute("SELECT gin_clean_pending_list('idx_task_search'::regclass)")
+            cursor.execute("ANALYZE tasks_task")
+            cursor.execute("ANALYZE accounts_user")
+
+        cls.creator = creators[0]
+        cls.executor = executors[1]
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+
+    @staticmethod
+    def _seq_scanned_tables(plan: dict) -> list:
+        """Таблицы, которые план читает последовательным сканированием."""
+
+        tables = []
+        if plan.get("Node Type") == "Seq Scan":
+            tables.append(plan.get("Relation Name"))
+        for child in plan.get("Plans", []):
+            tables.extend(TaskListQueryPlanTests._seq_scanned_tables(child))
+        return tables
+
+    def _explain(self, sql: str) -> dict:
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}")
+            raw = cursor.fetchone()[0]
+        plan = raw if isinstance(raw, list) else json.loads(raw)
+        return plan[0]["Plan"]
+
+    def _assert_no_task_seq_scan(self, user, url: str, params: dict) -> None:
+        self.client.force_authenticate(user)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+
+        task_queries = [
+            query["sql"]
+            for query in ctx.captured_queries
+            if query["sql"].startswith("SELECT") and '"tasks_task"' in query["sql"]
+        ]
+        self.assertTrue(task_queries)
+        for sql in task_queries:
+            self.assertNotIn("tasks_task", self._seq_scanned_tables(self._explain(sql)), sql)
+
+    def test_creator_cabinet(self):
+        url = reverse("creator-tasks")
+        for params in (
+                {},
+                {"status": Task.Status.IN_PROGRESS},
+                {"status": Task.Status.DONE, "ordering": "-updated_at"},
+                {"assignee": self.executor.pk},
+                {"assignee": "none"},
+                {"ordering": "due_at"},
+                {"ordering": "-priority"},
+        ):
+            with self.subTest(params=params):
+                self._assert_no_task_seq_scan(self.creator, url, params)
+
+    def test_executor_cabinet(self):
+        url = reverse("executor-tasks")
+        for params in (
+                {},
+                {"status": Task.Status.NEW},
+                {"ordering": "due_at"},
+                {"ordering": "-updated_at"},
+        ):
+            with self.subTest(params=params):
+                self._assert_no_task_seq_scan(self.executor, url, params)
+
+    @override_settings(TASKS_KPI_FROM_ROLLUP=False)
+    def test_creator_stats(self):
+        self._assert_no_task_seq_scan(
+            self.creator, reverse("creator-stats-by-assignee"), {"month": "2026-03"}
+        )
+
+    def test_task_list(self):
+        url = reverse("task-list")
+        for params in (
+                {"page_size": 50, "lean": "1"},
+                {"search": "отчёт", "lean": "1"},
+                {"name": "задача 1999", "lean": "1", "page_size": 50},
+        ):
+            with self.subTest(params=params):
+                self._assert_no_task_seq_scan(self.creator, url, params)
+        self._assert_no_task_seq_scan(self.executor, url, {"page_size": 50, "lean": "1"})
+
+    def test_overdue_sweep(self):
+        qs = (
+            Task.objects.filter(
+                due_at__lt=timezone.now(),
+                status__in=[Task.Status.NEW, Task.Status.IN_PROGRESS],
+            )
+            .order_by("id")
+            .values_list("id", "status", "creator_id", "assignee_id")[:1000]
+        )
+        plan = json.loads(qs.explain(format="json"))[0]["Plan"]
+        self.assertNotIn("tasks_task", self._seq_scanned_tables(plan))
+
+
+class TaskVisibilityTests(TaskPulseTestCase):
+    """Список и карточки задач видны только создателю и исполнителю."""
+
+    def setUp(self):
+        super().setUp()
+        self.stranger = self.create_user("stranger", User.Role.CREATOR)
+        self.own = Task.objects.create(title="Своя", creator=self.creator)
+        self.assigned = Task.objects.create(
+            title="Назначенная", creator=self.creator, assignee=self.executor
+        )
+        self.foreign = Task.objects.create(title="Чужая", creator=self.stranger)
+        self.client = APIClient()
+
+    def _list_ids(self, user) -> set:
+        self.client.force_authenticate(user)
+        response = self.client.get(reverse("task-list"), {"lean": "1"})
+        self.assertEqual(response.status_code, 200)
+        return {item["id"] for item in response.json()}
+
+    def test_list_is_scoped(self):
+        self.assertEqual(self._list_ids(self.creator), {self.own.pk, self.assigned.pk})
+        self.assertEqual(self._list_ids(self.executor), {self.assigned.pk})
+        self.assertEqual(self._list_ids(self.stranger), {self.foreign.pk})
+
+    def test_foreign_task_is_not_found(self):
+        self.client.force_authenticate(self.executor)
+        self.assertEqual(
+            self.client.get(reverse("task-detail", args=[self.assigned.pk])).status_code, 200
+        )
+        self.assertEqual(
+            self.client.get(reverse("task-detail", args=[self.own.pk])).status_code, 404
+        )
+        response = self.client.patch(
+            reverse("task-detail", args=[self.foreign.pk]), {"title": "x"}, format="json"
+        )
+        self.assertEqual(response.status_code, 404)
+
+
+class ApiBenchmarkBudgetTests(TaskPulseTestCase):
+    """Бенчмарк API на малом наборе seed_load_data укладывается в бюджеты по запросам."""
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command(
+            "seed_load_data",
+            companies=1,
+            creators=1,
+            executors=3,
+            tasks=300,
+            messages=3,
+            stdout=StringIO(),
+        )
+
+    def test_query_budgets(self):
+        from .services.benchmark import DEFAULT_BUDGETS, run_benchmarks
+
+        tasks_before = Task.objects.count()
+        report = run_benchmarks(iterations=2, warmup=1, metrics=("queries",))
+
+        self.assertEqual(
+            [result["name"] for result in report["results"]], list(DEFAULT_BUDGETS)
+        )
+        for result in report["results"]:
+            with self.subTest(scenario=result["name"]):
+                self.assertEqual(result["violations"], [])
+                self.assertGreater(result["bytes"], 0)
+        self.assertTrue(report["passed"])
+        # созданные бенчмарком задачи откатываются
+        self.assertEqual(Task.objects.count(), tasks_before)
+
+
+@override_settings(REQUEST_METRICS_ENABLED=True, REQUEST_METRICS_SAMPLE_RATE=1.0)
+class RequestMetricsMiddlewareTests(TaskPulseTestCase):
+    """Метрики запроса: Server-Timing, строка лога и поиск повторяющихся SQL."""
+
+    def setUp(self):
+        super().setUp()
+        Task.objects.create(title="Задача", creator=self.creator)
+        self.client = APIClient()
+        self.client.force_authenticate(self.creator)
+
+    def test_server_timing_and_log_line(self):
+        with self.assertLogs("taskpulse.requests", level="INFO") as logs:
+            response = self.client.get(reverse("creator-tasks"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("total;dur=", response["Server-Timing"])
+        self.assertIn("db;dur=", response["Server-Timing"])
+
+        record = logs.records[0]
+        self.assertEqual(record.request_metrics["view"], "creator-tasks")
+        self.assertEqual(record.request_metrics["status"], 200)
+        self.assertGreaterEqual(record.request_metrics["queries"], 1)
+
+    @override_settings(REQUEST_METRICS_ENABLED=False)
+    def test_disabled(self):
+        response = self.client.get(reverse("creator-tasks"))
+        self.assertNotIn("Server-Timing", response)
+
+    def test_duplicate_queries_and_outbound(self):
+        from TaskPulse.instrumentation import (
+            RequestMetrics,
+            _current,
+            fingerprint,
+            install_query_hook,
+            timed_outbound,
+        )
+
+        self.assertEqual(
+            fingerprint('SELECT 1 FROM "t" WHERE "id" IN (%s, %s, %s) LIMIT 21'),
+            'SELECT ? FROM "t" WHERE "id" IN (%s...) LIMIT ?',
+        )
+
+        install_query_hook(connection)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            for task in Task.objects.all()[:1]:
+                for _ in range(3):
+                    User.objects.get(pk=task.creator_id)
+            with timed_outbound("telegram"):
+                pass
+        finally:
+            _current.reset(token)
+
+        self.assertEqual(metrics.queries, 4)
+        self.assertEqual(len(metrics.duplicates(3)), 1)
+        self.assertEqual(metrics.outbound_calls["telegram"], 1)
+        self.assertIn('telegram;dur=', metrics.server_timing(1))
+
+
+@override_settings(
+    TASKS_CACHE_ENABLED=True,
+    TASKS_EVENTS_BACKEND="local",
+)
+class TaskResponseCacheTests(TaskPulseTestCase):
+    """Кэш карточки задачи и списков кабинетов: попадания без SQL, 304 и инвалидация."""
+
+    def setUp(self):
+        super().setUp()
+        self.stranger = self.create_user("stranger", User.Role.CREATOR)
+        self.task = Task.objects.create(
+            title="Отчёт", creator=self.creator, assignee=self.executor
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.creator)
+        self.detail_url = reverse("task-detail", args=[self.task.pk])
+
+    def test_task_detail_hit_and_not_modified(self):
+        first = self.client.get(self.detail_url)
+        self.assertEqual(first.status_code, 200)
+        etag = first["ETag"]
+
+        with self.assertNumQueries(0):
+            second = self.client.get(self.detail_url)
+        self.assertEqual(second.json(), first.json())
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self.client.force_authenticate(self.stranger)
+        self.assertEqual(self.client.get(self.detail_url).status_code, 404)
+
+    def test_task_detail_invalidated_on_update(self):
+        etag = self.client.get(self.detail_url)["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(self.detail_url, {"title": "Отчёт за март"}, format="json")
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["title"], "Отчёт за март")
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_cabinet_lists_invalidated_for_both_sides(self):
+        creator_url = reverse("creator-tasks")
+        executor_url = reverse("executor-tasks")
+
+        creator_etag = self.client.get(creator_url)["ETag"]
+        with self.assertNumQueries(0):
+            response = self.client.get(creator_url, HTTP_IF_NONE_MATCH=creator_etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertNotEqual(self.client.get(creator_url, {"status": "done"})["ETag"], creator_etag)
+
+        self.client.force_authenticate(self.executor)
+        executor_etag = self.client.get(executor_url)["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Task.objects.create(title="Новая", creator=self.creator, assignee=self.executor)
+
+        response = self.client.get(executor_url, HTTP_IF_NONE_MATCH=executor_etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 2)
+
+        self.client.force_authenticate(self.creator)
+        response = self.client.get(creator_url, HTTP_IF_NONE_MATCH=creator_etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 2)
+
+
+@override_settings(TASKS_CACHE_ENABLED=False, TASKS_EVENTS_BACKEND="local")
+class ConditionalGetTests(TaskPulseTestCase):
+    """ETag: 304 до сериализации и новый ETag после изменений."""
+
+    def setUp(self):
+        super().setUp()
+        self.task = Task.objects.create(
+            title="Отчёт",
+            creator=self.creator,
+            assignee=self.executor,
+            due_at=timezone.make_aware(datetime(2026, 3, 15)),
+        )
+        TaskMessage.objects.create(task=self.task, sender=self.creator, text="привет")
+        self.client = APIClient()
+        self.client.force_authenticate(self.creator)
+
+    def _assert_not_modified_until_change(self, url, params, change, queries):
+        first = self.client.get(url, params)
+        self.assertEqual(first.status_code, 200)
+        etag = first["ETag"]
+
+        with self.assertNumQueries(queries):
+            response = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+        change()
+        response = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def _rename(self):
+        self.task.title = "Отчёт за март"
+        self.task.save()
+
+    def test_task_list(self):
+        # 304 — только запрос свежести
+        self._assert_not_modified_until_change(reverse("task-list"), {"lean": "1"}, self._rename, 1)
+
+    def test_task_list_tracks_attachments(self):
+        self._assert_not_modified_until_change(
+            reverse("task-list"),
+            {},
+            lambda: TaskAttachment.objects.create(task=self.task, file="task_attachments/a.txt"),
+            1,
+        )
+
+    def test_lean_task_list_tracks_result_file(self):
+        import shutil
+        import tempfile
+
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+
+        def upload_result():
+            with self.settings(MEDIA_ROOT=media_root):
+                response = self.client.post(
+                    reverse("task-upload-attachment", args=[self.task.pk]),
+                    {"file": SimpleUploadedFile("result.txt", b"done"), "kind": "result"},
+                    format="multipart",
+                )
+            self.assertEqual(response.status_code, 201)
+
+        self._assert_not_modified_until_change(reverse("task-list"), {"lean": "1"}, upload_result, 1)
+        response = self.client.get(reverse("task-list"), {"lean": "1"})
+        self.assertTrue(response.json()[0]["result_file"].endswith("result.txt"))
+
+    def test_cabinet_list_revalidates_after_delete(self):
+        url = reverse("creator-tasks")
+        older = Task.objects.create(title="Старая", creator=self.creator, assignee=self.executor)
+        Task.objects.filter(pk=older.pk).update(updated_at=timezone.now() - timedelta(days=1))
+        response = self.client.get(url)
+        # max(updated_at) после удаления не изменится — по дате списки не сверяем
+        self.assertNotIn("Last-Modified", response)
+
+        self._assert_not_modified_until_change(url, {}, older.delete, 1)
+
+    def test_conversation_messages(self):
+        self._assert_not_modified_until_change(
+            reverse("task-conversation-messages"),
+            {"user_id": self.executor.pk},
+            lambda: TaskMessage.objects.create(task=self.task, sender=self.executor, text="ответ"),
+            # диалог, свежесть (непрочитанных нет — mark_read без запроса)
+            2,
+        )
+
+    @override_settings(TASKS_KPI_FROM_ROLLUP=False)
+    def test_monthly_report(self):
+        def complete():
+            self.task.status = Task.Status.DONE
+            self.task.save()
+
+        self._assert_not_modified_until_change(
+            reverse("reports-monthly"),
+            {"user": self.executor.pk, "month": "2026-03"},
+            complete,
+            # исполнитель, агрегат KPI
+            2,
+        )
+
+
+class CachedTokenAuthenticationTests(TaskPulseTestCase):
+    """Token-аутентификация из кэша: без SQL на попадании, сброс при смене пароля, деактивации, удалении токена."""
+
+    def setUp(self):
+        from rest_framework.authtoken.models import Token
+
+        super().setUp()
+        self.user = self.creator
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+        self.url = reverse("accounts:auth-profile")
+
+    def _auth_queries(self) -> int:
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(self.url)
+        return sum('"authtoken_token"' in query["sql"] for query in ctx.captured_queries)
+
+    def test_cache_hit_skips_token_query(self):
+        self.assertEqual(self._auth_queries(), 1)
+        self.assertEqual(self._auth_queries(), 0)
+
+    def test_shared_cache_survives_local_eviction(self):
+        from accounts.authentication import local_tokens
+
+        self._auth_queries()
+        local_tokens.clear()
+        self.assertEqual(self._auth_queries(), 0)
+
+    def test_password_change_invalidates(self):
+        self._auth_queries()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("accounts:auth-change-password"),
+                {"current_password": self.PASSWORD, "new_password": "N3w-Passw0rd!x"},
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self._auth_queries(), 1)
+
+    def test_deactivation_rejects_token(self):
+        self._auth_queries()
+        self.user.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    def test_deleted_token_rejected(self):
+        self._auth_queries()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.token.delete()
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    def test_invalidation_waits_for_commit(self):
+        self._auth_queries()
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.user.full_name = "Иван"
+            self.user.save()
+            # до коммита кэш не тронут
+            self.assertEqual(self._auth_queries(), 0)
+
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self._auth_queries(), 1)
+
+    def test_shared_cache_has_no_password(self):
+        from accounts.authentication import _cache_key, local_tokens
+
+        self._auth_queries()
+        state = cache.get(_cache_key(self.token.key))
+        self.assertNotIn("password", state)
+        self.assertEqual((state["id"], state["role"]), (self.user.pk, User.Role.CREATOR))
+
+        local_tokens.clear()
+        self.assertEqual(self._auth_queries(), 0)
+        response = self.client.get(self.url)
+        self.assertEqual(response.json()["email"], "creator@example.com")
+
+        # пароль пользователя из общего кэша догружается из базы
+        local_tokens.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("accounts:auth-change-password"),
+                {"current_password": self.PASSWORD, "new_password": "N3w-Passw0rd!x"},
+            )
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password("N3w-Passw0rd!x"))
+
+
+@override_settings(
+    TASKS_EVENTS_BACKEND="local",
+    REQUEST_METRICS_ENABLED=True,
+    REQUEST_METRICS_SAMPLE_RATE=1.0,
+)
+class AsgiModeTests(TaskPulseTransactionTestCase):
+    """
+    ASGI: async long-poll под метриками запроса и асинхронный клиент Bot API.
+    TransactionTestCase — ASGI-обработчик ходит в базу из своего потока.
+    """
+
+    def setUp(self):
+        from rest_framework.authtoken.models import Token
+
+        super().setUp()
+        self.executor = self.create_user("executor")
+        self.token = Token.objects.create(user=self.executor)
+
+    async def test_events_long_poll_over_asgi(self):
+        from django.test import AsyncClient
+
+        client = AsyncClient()
+        headers = {"Authorization": f"Token {self.token.key}"}
+        with self.assertLogs("taskpulse.requests", level="INFO") as logs:
+            response = await client.get(reverse("task-events"), headers=headers)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("db;dur=", response["Server-Timing"])
+        # аутентификация выполняется в потоке sync_to_async и всё равно попадает в метрики
+        self.assertGreaterEqual(logs.records[0].request_metrics["queries"], 1)
+
+        cursor = response.json()["cursor"]
+        response = await client.get(
+            reverse("task-events"), {"cursor": cursor, "timeout": 0}, headers=headers
+        )
+        self.assertEqual(response.json(), {"cursor": cursor, "events": []})
+
+    @override_settings(TASKS_EVENTS_LONGPOLL_TIMEOUT=25, TASKS_EVENTS_LONGPOLL_WSGI_TIMEOUT=0)
+    async def test_asgi_long_poll_is_not_capped(self):
+        from django.test import AsyncClient
+
+        broker = mock.Mock()
+        broker.aread = mock.AsyncMock(return_value=[])
+        with mock.patch("tasks.views.get_event_broker", return_value=broker):
+            response = await AsyncClient().get(
+                reverse("task-events"),
+                {"cursor": "0-0", "timeout": 20},
+                headers={"Authorization": f"Token {self.token.key}"},
+            )
+
+        self.assertEqual(response.status_code, 200)
+        broker.aread.assert_awaited_once_with(self.executor.pk, "0-0", 20)
+
+    async def test_async_telegram_client_retries_429(self):
+        import httpx
+
+        from integrations.utils_telegram import AsyncTelegramClient
+
+        statuses = iter([429, 200])
+
+        def handler(request):
+            status_code = next(statuses)
+            if status_code == 429:
+                return httpx.Response(429, json={"ok": False, "parameters": {"retry_after": 0}})
+            return httpx.Response(200, json={"ok": True, "result": {"message_id": 7}})
+
+        client = AsyncTelegramClient("token", backoff=0)
+        client.http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        try:
+            result = await client.send_message(1, "привет")
+        finally:
+            await client.aclose()
+
+        self.assertTrue(result.ok)
+        self.assertEqual((result.attempts, result.message_id), (2, 7))
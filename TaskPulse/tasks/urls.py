@@ -3,24 +3,39 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
-from .views import TaskViewSet, ConversationMessagesView
+from .views import (
+    ConversationListView,
+    ConversationMessagesView,
+    TaskEventsView,
+    TaskViewSet,
+)
 from .views_cabinet import (
     CreatorTasksView,
     CreatorStatsByAssigneeView,
     ExecutorTasksView,
     ExecutorTaskDetailView,
 )
-from .views_reports import monthly_report
+from .views_reports import monthly_report, team_report
 
 router = DefaultRouter()
 router.register("", TaskViewSet, basename="task")
 
 urlpatterns = [
+    path(
+        "conversations/",
+        ConversationListView.as_view(),
+        name="task-conversations",
+    ),
     path(
         "conversation-messages/",
         ConversationMessagesView.as_view(),
         name="task-conversation-messages",
     ),
+    path(
+        "events/",
+        TaskEventsView.as_view(),
+        name="task-events",
+    ),
 
     path(
         "cabinet/creator/tasks/",
@@ -49,6 +64,11 @@ urlpatterns = [
         monthly_report,
         name="reports-monthly",
     ),
+    path(
+        "reports/monthly/team/",
+        team_report,
+        name="reports-monthly-team",
+    ),
 
     path("", include(router.urls)),
 ]
@@ -2,58 +2,102 @@
 
 from datetime import timedelta
 
+from adrf.views import APIView as AsyncAPIView
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db.models import Q
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Count, F, Max, Q
 from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import permissions, status, viewsets
 from rest_framework.decorators import action
-from rest_framework.filters import OrderingFilter, SearchFilter
+from rest_framework.filters import OrderingFilter
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from .filters import TaskFilter
-from .models import Task, TaskChangeLog, TaskMessage
+from .filters import FullTextSearchFilter, TaskFilter, is_ranked_search
+from .models import Conversation, Task, TaskAttachment, TaskChangeLog, TaskMessage
+from .pagination import TaskCursorPagination, TaskMessageCursorPagination, TaskSearchPagination
 from .permissions import IsCreatorOrAssignee
 from .serializers import (
+    ConversationSerializer,
     TaskActionSerializer,
     TaskAttachmentSerializer,
+    TaskListSerializer,
     TaskSerializer,
     TaskUpsertSerializer,
     TaskMessageSerializer,
 )
+from .services import cache as response_cache
+from .services.conditional import (
+    ConditionalListMixin,
+    conditional_list_response,
+    freshness_aggregates,
+)
+from .services.realtime import get_event_broker
+from .services.search import search_queryset
 
 User = get_user_model()
 
 
-class TaskViewSet(viewsets.ModelViewSet):
+class TaskViewSet(ConditionalListMixin, viewsets.ModelViewSet):
     """Полноценный вьюсет для задач:"""
 
-    queryset = Task.objects.select_related("creator", "assignee").prefetch_related(
-        "attachments"
-    )
+    queryset = Task.objects.select_related("creator", "assignee")
     permission_classes = [permissions.IsAuthenticated, IsCreatorOrAssignee]
     serializer_class = TaskSerializer
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, OrderingFilter, FullTextSearchFilter]
     filterset_class = TaskFilter
-    search_fields = ["title", "description"]
+    pagination_class = TaskCursorPagination
     ordering_fields = ["due_at", "updated_at", "created_at", "priority", "status"]
-    ordering = ["-updated_at"]
+    ordering = ["-updated_at", "-id"]
+    conditional_scope = "tasks"
+
+    def _is_lean_list(self) -> bool:
+        """GET /api/tasks/?lean=1 — облегчённый список без вложений."""
+
+        return self.action == "list" and self.request.query_params.get("lean") in ("1", "true")
+
+    @property
+    def paginator(self):
+        """Поиск по релевантности — постранично (курсор сбросил бы ранжирование), иначе курсор."""
+
+        if not hasattr(self, "_paginator"):
+            ranked = self.action == "list" and is_ranked_search(self.request)
+            self._paginator = TaskSearchPagination() if ranked else self.pagination_class()
+        return self._paginator
 
     def get_queryset(self):
-        qs = (
-            super()
-            .get_queryset()
-            .select_related("creator", "assignee")
-            .prefetch_related("attachments", "changes", "actions")
-        )
+        # только задачи, где пользователь — создатель или исполнитель
+        qs = super().get_queryset().visible_to(self.request.user).with_result_file()
+        if not self._is_lean_list():
+            qs = qs.prefetch_related("attachments")
         return qs
 
+    def get_freshness_aggregates(self):
+        # вложения не меняют updated_at задачи — учитываем их отдельно
+        aggregates = freshness_aggregates()
+        aggregates["count"] = Count("pk", distinct=True)
+        if self._is_lean_list():
+            # в lean-списке из вложений есть только result_file
+            aggregates["last_result_id"] = Max(
+                "attachments__id", filter=Q(attachments__kind=TaskAttachment.Kind.RESULT)
+            )
+        else:
+            aggregates.update(
+                attachment_count=Count("attachments"),
+                last_attachment_id=Max("attachments__id"),
+            )
+        return aggregates
+
     def get_serializer_class(self):
         """Возвращает сериализатор в зависимости от действия"""
 
         if self.action in ("create", "update", "partial_update"):
             return TaskUpsertSerializer
+        if self._is_lean_list():
+            return TaskListSerializer
         return TaskSerializer
 
     def get_permissions(self):
@@ -63,6 +107,16 @@ class TaskViewSet(viewsets.ModelViewSet):
             return [permissions.IsAuthenticated()]
         return [permissions.IsAuthenticated(), IsCreatorOrAssignee()]
 
+    def retrieve(self, request, *args, **kwargs):
+        """Карточка задачи из кэша; отдаётся только создателю и исполнителю."""
+
+        return response_cache.cached_response(
+            request,
+            response_cache.task_key(kwargs.get("pk"), response_cache.request_variant(request)),
+            lambda: super(TaskViewSet, self).retrieve(request, *args, **kwargs),
+            audience=lambda data: (data["creator"], data["assignee"]),
+        )
+
     def create(self, request, *args, **kwargs):
         """
         Создаёт задачу через upsert-сериализатор,
@@ -130,28 +184,43 @@ class TaskViewSet(viewsets.ModelViewSet):
         )
         ser.is_valid(raise_exception=True)
 
-        old_due = task.due_at.isoformat() if task.due_at else None
         task.due_at = (task.due_at or timezone.now()) + timedelta(days=1)
-        task.save(update_fields=["due_at", "updated_at"])
-
-        TaskChangeLog.log(
-            task=task,
+        task.save(
+            update_fields=["due_at", "updated_at"],
             changed_by=request.user,
-            field="due_at",
-            old_value=old_due,
-            new_value=task.due_at.isoformat(),
-            reason=ser.validated_data["comment"],
+            change_reason=ser.validated_data["comment"],
         )
+
         return Response(
             TaskSerializer(task, context={"request": request}).data,
             status=status.HTTP_200_OK,
         )
 
 
+class ConversationListView(APIView):
+    """«Входящие»: диалоги текущего пользователя, свежие сверху."""
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        user = request.user
+        conversations = (
+            Conversation.objects.filter(Q(user_low=user) | Q(user_high=user))
+            .select_related("user_low", "user_high", "last_message")
+            .order_by(F("last_message_at").desc(nulls_last=True), "-id")
+        )
+        serializer = ConversationSerializer(
+            conversations, many=True, context={"request": request}
+        )
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
 class ConversationMessagesView(APIView):
     """
     Общий диалог между текущим пользователем и другим пользователем (создатель ↔ исполнитель)
     по всем задачам сразу.
+    GET: ?since=<id> — только новые сообщения; ?cursor=/?page_size= — история страницами;
+    ?search= — поиск по тексту сообщений.
     """
 
     permission_classes = [permissions.IsAuthenticated]
@@ -178,9 +247,8 @@ class ConversationMessagesView(APIView):
             )
             return Response(serializer.data, status=status.HTTP_200_OK)
 
-        try:
-            other = User.objects.get(pk=other_id_int)
-        except User.DoesNotExist:
+        conversation = Conversation.for_pair(user.id, other_id_int)
+        if conversation is None:
             serializer = TaskMessageSerializer(
                 TaskMessage.objects.none(),
                 many=True,
@@ -188,19 +256,57 @@ class ConversationMessagesView(APIView):
             )
             return Response(serializer.data, status=status.HTTP_200_OK)
 
-        qs = (
-            TaskMessage.objects.filter(
-                Q(task__creator=user, task__assignee=other)
-                | Q(task__creator=other, task__assignee=user)
+        conversation.mark_read(user.id)
+        qs = conversation.messages.select_related("sender", "task")
+
+        # ?search=... — поиск по тексту сообщений диалога, по релевантности
+        search = request.query_params.get("search", "").strip()
+        if search:
+            found = search_queryset(qs, search)[: TaskMessageCursorPagination.max_page_size]
+            serializer = TaskMessageSerializer(
+                found, many=True, context={"request": request}
             )
-            .select_related("sender", "task")
-            .order_by("created_at", "id")
-        )
+            return Response(serializer.data, status=status.HTTP_200_OK)
 
-        serializer = TaskMessageSerializer(
-            qs, many=True, context={"request": request}
+        # ?since=<id> — только новые сообщения (для опроса), старые вперёд
+        since = request.query_params.get("since")
+        if since is not None:
+            try:
+                since_id = int(since)
+            except (TypeError, ValueError):
+                return Response(
+                    {"detail": "Некорректный since."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            new_messages = qs.filter(id__gt=since_id).order_by("created_at", "id")[
+                : TaskMessageCursorPagination.max_page_size
+            ]
+            serializer = TaskMessageSerializer(
+                new_messages, many=True, context={"request": request}
+            )
+            return Response(serializer.data, status=status.HTTP_200_OK)
+
+        paginator = TaskMessageCursorPagination()
+        page = paginator.paginate_queryset(qs, request, view=self)
+        if page is not None:
+            serializer = TaskMessageSerializer(
+                page, many=True, context={"request": request}
+            )
+            return paginator.get_paginated_response(serializer.data)
+
+        return conditional_list_response(
+            request,
+            "conversation-messages",
+            qs,
+            lambda: Response(
+                TaskMessageSerializer(
+                    qs.order_by("created_at", "id"), many=True, context={"request": request}
+                ).data,
+                status=status.HTTP_200_OK,
+            ),
+            # сообщения не редактируются; task_updated — название задачи в сообщениях
+            {**freshness_aggregates("created_at"), "task_updated": Max("task__updated_at")},
         )
-        return Response(serializer.data, status=status.HTTP_200_OK)
 
     def post(self, request):
         user = request.user
@@ -240,44 +346,29 @@ class ConversationMessagesView(APIView):
                     status=status.HTTP_400_BAD_REQUEST,
                 )
             try:
-                task = Task.objects.get(pk=task_id_int)
-            except Task.DoesNotExist:
-                return Response(
-                    {"detail": "Задача не найдена."},
-                    status=status.HTTP_404_NOT_FOUND,
-                )
-        if task_id:
-            try:
-                task_id_int = int(task_id)
-            except (TypeError, ValueError):
-                return Response(
-                    {"detail": "Некорректный task."},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-            try:
-                task = Task.objects.get(pk=task_id_int)
+                task = Task.objects.visible_to(user).get(pk=task_id_int)
             except Task.DoesNotExist:
                 return Response(
                     {"detail": "Задача не найдена."},
                     status=status.HTTP_404_NOT_FOUND,
                 )
         else:
-            tasks_qs = Task.objects.filter(
-                Q(creator=user, assignee=other)
-                | Q(creator=other, assignee=user)
-            ).order_by("-created_at")
-
-            task = tasks_qs.first()
+            conversation = Conversation.for_pair(user.id, other.id)
+            task = conversation.last_task if conversation is not None else None
+            if task is None or not Conversation.is_pair_task(task, user.id, other.id):
+                # указатель потерян (задачу удалили) или устарел — ищем по задачам
+                task = (
+                    Conversation.pair_tasks(user.id, other.id)
+                    .order_by("-created_at")
+                    .first()
+                )
             if task is None:
                 return Response(
                     {"detail": "Нет общей задачи для чата."},
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-        if not (
-                (task.creator_id == user.id and task.assignee_id == other.id)
-                or (task.creator_id == other.id and task.assignee_id == user.id)
-        ):
+        if not Conversation.is_pair_task(task, user.id, other.id):
             return Response(
                 {"detail": "Нет доступа к чату по этой задаче."},
                 status=status.HTTP_403_FORBIDDEN,
@@ -292,3 +383,57 @@ class ConversationMessagesView(APIView):
 
         out = TaskMessageSerializer(message, context={"request": request})
         return Response(out.data, status=status.HTTP_201_CREATED)
+
+
+class TaskEventsView(AsyncAPIView):
+    """
+    Long-poll канал событий текущего пользователя (message.created, task.*).
+    GET без cursor сразу возвращает текущий курсор; с cursor — ждёт новых
+    событий до timeout секунд и отдаёт их вместе со следующим курсором.
+    Асинхронный: под ASGI ожидание не занимает поток воркера. Под WSGI
+    ожидание держало бы синхронный воркер целиком, поэтому timeout там
+    ограничен TASKS_EVENTS_LONGPOLL_WSGI_TIMEOUT (короткий опрос).
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    async def get(self, request):
+        broker = get_event_broker()
+        user_id = request.user.pk
+        cursor = request.query_params.get("cursor")
+
+        if not cursor:
+            last_id = await sync_to_async(broker.last_id, thread_sensitive=False)(user_id)
+            return Response(
+                {"cursor": last_id, "events": []},
+                status=status.HTTP_200_OK,
+            )
+
+        max_timeout = getattr(settings, "TASKS_EVENTS_LONGPOLL_TIMEOUT", 25)
+        if not isinstance(request._request, ASGIRequest):
+            max_timeout = min(
+                max_timeout, getattr(settings, "TASKS_EVENTS_LONGPOLL_WSGI_TIMEOUT", 1)
+            )
+        try:
+            timeout = float(request.query_params.get("timeout", max_timeout))
+        except (TypeError, ValueError):
+            timeout = max_timeout
+        timeout = min(max(timeout, 0), max_timeout)
+
+        try:
+            events = await broker.aread(user_id, cursor, timeout)
+        except ValueError:
+            return Response(
+                {"detail": "Некорректный cursor."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if events:
+            cursor = events[-1][0]
+        return Response(
+            {
+                "cursor": cursor,
+                "events": [{"id": event_id, **event} for event_id, event in events],
+            },
+            status=status.HTTP_200_OK,
+        )
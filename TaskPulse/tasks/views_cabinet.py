@@ -1,8 +1,9 @@
 """tasks/views_cabinet.py"""
 
+from datetime import date
 from typing import Any, Dict, List
 
-from django.db.models import Count, Q, F
+from django.db.models import Count, Sum
 from rest_framework import status
 from rest_framework.generics import ListAPIView, RetrieveAPIView
 from rest_framework.permissions import IsAuthenticated
@@ -10,12 +11,39 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from accounts.models import User  # твой кастомный User
-from .models import Task
+from .models import Task, TaskKpiMonthly
 from .serializers_cabinet import (
     CreatorTaskListSerializer,
     ExecutorTaskListSerializer,
     ExecutorTaskDetailSerializer,
 )
+from .services import cache as response_cache
+from .services.conditional import ConditionalListMixin
+from .services.kpi import DONE_ON_TIME_Q, DONE_Q, month_bounds, use_rollup
+
+
+class CachedListMixin(ConditionalListMixin):
+    """
+    Список кабинета из кэша по поколению пользователя (см. services.cache).
+    Без кэша — условный GET по свежести queryset.
+    """
+
+    cache_scope = ""
+
+    def list(self, request, *args, **kwargs):
+        key = response_cache.list_key(
+            self.cache_scope,
+            request.user.id,
+            request.query_params.items(),
+            response_cache.request_variant(request),
+        )
+        if key is None:
+            return super().list(request, *args, **kwargs)
+        return response_cache.cached_response(
+            request,
+            key,
+            lambda: super(ConditionalListMixin, self).list(request, *args, **kwargs),
+        )
 
 
 class CreatorOnlyMixin:
@@ -30,11 +58,12 @@ class CreatorOnlyMixin:
         return None
 
 
-class CreatorTasksView(CreatorOnlyMixin, ListAPIView):
+class CreatorTasksView(CreatorOnlyMixin, CachedListMixin, ListAPIView):
     """Кабинет Создателя: список собственных задач."""
 
     permission_classes = [IsAuthenticated]
     serializer_class = CreatorTaskListSerializer
+    cache_scope = conditional_scope = "creator-tasks"
 
     def get(self, request, *args, **kwargs):
         err = self._ensure_creator(request)
@@ -90,72 +119,104 @@ class CreatorStatsByAssigneeView(CreatorOnlyMixin, APIView):
 
         month_str = request.query_params.get("month")
 
-        qs = Task.objects.filter(creator=request.user, assignee__isnull=False)
-
-        # фильтр по месяцу дедлайна (как и в отчётах)
+        year = month = None
         if month_str:
             try:
                 year_str, month_num_str = month_str.split("-")
                 year = int(year_str)
                 month = int(month_num_str)
-                if 1 <= month <= 12:
-                    qs = qs.filter(due_at__year=year, due_at__month=month)
             except (ValueError, AttributeError):
                 return Response(
                     {"detail": "month должен быть в формате YYYY-MM."},
                     status=status.HTTP_400_BAD_REQUEST,
                 )
+            if not 1 <= month <= 12:
+                year = month = None
 
-        base = (
-            qs.values("assignee_id", "assignee__email", "assignee__full_name")
-            .annotate(total=Count("id"))
-            .order_by("assignee__full_name")
-        )
+        if use_rollup():
+            return Response(
+                {"results": self._stats_from_rollup(request.user, year, month)},
+                status=status.HTTP_200_OK,
+            )
 
-        done_qs = qs.filter(status=Task.Status.DONE)
-        done_on_time_qs = done_qs.filter(
-            Q(due_at__isnull=True) | Q(updated_at__lte=F("due_at"))
-        )
-        done_late_qs = done_qs.filter(
-            Q(due_at__isnull=False) & Q(updated_at__gt=F("due_at"))
+        return Response(
+            {"results": self._stats_from_tasks(request.user, year, month)},
+            status=status.HTTP_200_OK,
         )
 
-        done_map = {
-            row["assignee_id"]: row["cnt"]
-            for row in done_qs.values("assignee_id").annotate(cnt=Count("id"))
-        }
-        done_on_time_map = {
-            row["assignee_id"]: row["cnt"]
-            for row in done_on_time_qs.values("assignee_id").annotate(cnt=Count("id"))
-        }
-        done_late_map = {
-            row["assignee_id"]: row["cnt"]
-            for row in done_late_qs.values("assignee_id").annotate(cnt=Count("id"))
-        }
+    def _stats_from_tasks(self, user, year, month) -> List[Dict[str, Any]]:
+        """
+        Сводка по сотрудникам напрямую из Task: один запрос
+        с условной агрегацией, месяц — полуоткрытый диапазон due_at.
+        """
 
-        result: List[Dict[str, Any]] = []
-        for row in base:
-            aid = row["assignee_id"]
-            result.append(
-                {
-                    "assignee_id": aid,
-                    "assignee_email": row["assignee__email"],
-                    "assignee_name": row["assignee__full_name"],
-                    "total": row["total"],
-                    "done": done_map.get(aid, 0),
-                    "done_on_time": done_on_time_map.get(aid, 0),
-                    "done_late": done_late_map.get(aid, 0),
-                }
-            )
-
-        return Response({"results": result}, status=status.HTTP_200_OK)
+        qs = Task.objects.filter(creator=user, assignee__isnull=False)
 
+        # фильтр по месяцу дедлайна (как и в отчётах)
+        if month is not None:
+            start, end = month_bounds(year, month)
+            qs = qs.filter(due_at__gte=start, due_at__lt=end)
 
-class ExecutorTasksView(ListAPIView):
+        rows = (
+            qs.values("assignee_id", "assignee__email", "assignee__full_name")
+            .annotate(
+                total=Count("id"),
+                done=Count("id", filter=DONE_Q),
+                done_on_time=Count("id", filter=DONE_ON_TIME_Q),
+            )
+            .order_by("assignee__full_name")
+        )
+        return [
+            {
+                "assignee_id": row["assignee_id"],
+                "assignee_email": row["assignee__email"],
+                "assignee_name": row["assignee__full_name"],
+                "total": row["total"],
+                "done": row["done"],
+                "done_on_time": row["done_on_time"],
+                "done_late": row["done"] - row["done_on_time"],
+            }
+            for row in rows
+        ]
+
+    def _stats_from_rollup(self, user, year, month) -> List[Dict[str, Any]]:
+        """Сводка по сотрудникам из TaskKpiMonthly: один запрос, O(строк сводки)."""
+
+        qs = TaskKpiMonthly.objects.filter(creator=user)
+        if month is not None:
+            qs = qs.filter(month=date(year, month, 1))
+
+        rows = (
+            qs.values("assignee_id", "assignee__email", "assignee__full_name")
+            .annotate(
+                total_sum=Sum("total"),
+                done_sum=Sum("done"),
+                done_on_time_sum=Sum("done_on_time"),
+                done_late_sum=Sum("done_late"),
+            )
+            .filter(total_sum__gt=0)
+            .order_by("assignee__full_name")
+        )
+        return [
+            {
+                "assignee_id": row["assignee_id"],
+                "assignee_email": row["assignee__email"],
+                "assignee_name": row["assignee__full_name"],
+                "total": row["total_sum"],
+                "done": row["done_sum"],
+                "done_on_time": row["done_on_time_sum"],
+                "done_late": row["done_late_sum"],
+            }
+            for row in rows
+        ]
+
+
+class ExecutorTasksView(CachedListMixin, ListAPIView):
     """Кабинет Исполнителя: список назначенных задач."""
 
     permission_classes = [IsAuthenticated]
     serializer_class = ExecutorTaskListSerializer
+    cache_scope = conditional_scope = "executor-tasks"
 
     def get_queryset(self):
         user = self.request.user
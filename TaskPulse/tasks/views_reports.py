@@ -3,17 +3,24 @@
 import csv
 
 from django.contrib.auth import get_user_model
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes, renderer_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.renderers import JSONRenderer, BrowsableAPIRenderer, BaseRenderer
 from rest_framework.response import Response
 
-from .services.kpi import calc_user_month_kpi
+from .models import Task
+from .services.conditional import conditional_response, make_etag, query_params
+from .services.kpi import calc_user_month_kpi, calc_users_months_kpi, iter_months, month_key
 
 User = get_user_model()
 
+# Максимальная длина диапазона месяцев в командном отчёте.
+TEAM_REPORT_MAX_MONTHS = 24
+
+KPI_COUNTERS = ("total", "done", "done_on_time", "done_late")
+
 
 class CSVRenderer(BaseRenderer):
     """
@@ -50,6 +57,13 @@ def _parse_month(month_str: str):
     return year, month
 
 
+class _Echo:
+    """Псевдо-файл для csv.writer: возвращает строку вместо записи в буфер."""
+
+    def write(self, value):
+        return value
+
+
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 @renderer_classes([JSONRenderer, BrowsableAPIRenderer, CSVRenderer])
@@ -93,6 +107,14 @@ def monthly_report(request):
 
     data = calc_user_month_kpi(target_user, year, month)
 
+    # отчёт — уже посчитанный агрегат: ETag из данных, 304 без сборки JSON/CSV
+    etag = make_etag("monthly-report", list(query_params(request)), data)
+    return conditional_response(request, etag, lambda: _monthly_report_response(data, fmt))
+
+
+def _monthly_report_response(data, fmt: str):
+    """Ответ monthly_report в JSON или CSV."""
+
     if fmt == "csv":
         # CSV-ответ
         response = HttpResponse(content_type="text/csv")
@@ -125,3 +147,105 @@ def monthly_report(request):
 
     # JSON-ответ
     return Response(data, status=status.HTTP_200_OK)
+
+
+def _iter_team_csv(results):
+    """Построчно генерирует CSV командного отчёта (итоги + разбивка по приоритетам)."""
+
+    writer = csv.writer(_Echo())
+    yield writer.writerow(["user_id", "user_email", "user_name", "month", "priority", *KPI_COUNTERS])
+    for item in results:
+        prefix = [item["user_id"], item["user_email"], item["user_name"], item["month"]]
+        yield writer.writerow([*prefix, "all", *(item[key] for key in KPI_COUNTERS)])
+        for p_item in item["by_priority"]:
+            yield writer.writerow(
+                [*prefix, p_item["priority"], *(p_item[key] for key in KPI_COUNTERS)]
+            )
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+@renderer_classes([JSONRenderer, BrowsableAPIRenderer, CSVRenderer])
+def team_report(request):
+    """
+    Отчёт по всем исполнителям Создателя за месяц или диапазон месяцев.
+    Исполнители — те, кому Создатель назначал задачи (поле company у
+    пользователя необязательное, по нему арендаторов не разделить).
+    Параметры: month=YYYY-MM или month_from=YYYY-MM&month_to=YYYY-MM.
+    KPI считаются одним агрегирующим запросом, элементы results
+    в формате monthly_report (+ user_email, user_name).
+    """
+
+    current_user = request.user
+    if getattr(current_user, "role", None) != "CREATOR":
+        return Response(
+            {"detail": "Доступ к отчётам есть только у пользователей с ролью CREATOR."},
+            status=status.HTTP_403_FORBIDDEN,
+        )
+
+    month_str = request.query_params.get("month")
+    month_from_str = request.query_params.get("month_from") or month_str
+    month_to_str = request.query_params.get("month_to") or month_from_str
+    fmt = request.query_params.get("format", "json").lower()
+
+    if not month_from_str:
+        return Response(
+            {"detail": "Нужно указать month или month_from/month_to (формат YYYY-MM)."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    start = _parse_month(month_from_str)
+    end = _parse_month(month_to_str)
+    if start[0] is None or end[0] is None or start > end:
+        return Response(
+            {"detail": "Месяцы должны быть в формате YYYY-MM, month_from <= month_to."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    months = iter_months(start, end)
+    if len(months) > TEAM_REPORT_MAX_MONTHS:
+        return Response(
+            {"detail": f"Диапазон не может быть больше {TEAM_REPORT_MAX_MONTHS} месяцев."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    executors = list(
+        User.objects.filter(
+            role=User.Role.EXECUTOR,
+            id__in=Task.objects.filter(creator=current_user).values("assignee_id"),
+        )
+        .order_by("full_name", "id")
+        .values("id", "email", "full_name")
+    )
+
+    kpis = calc_users_months_kpi([executor["id"] for executor in executors], months)
+
+    results = []
+    for executor in executors:
+        for year, month in months:
+            item = kpis[(executor["id"], month_key(year, month))]
+            item["user_email"] = executor["email"]
+            item["user_name"] = executor["full_name"]
+            results.append(item)
+
+    etag = make_etag("team-report", current_user.id, list(query_params(request)), results)
+    return conditional_response(request, etag, lambda: _team_report_response(results, months, fmt))
+
+
+def _team_report_response(results, months, fmt: str):
+    """Ответ team_report в JSON или потоковом CSV."""
+
+    if fmt == "csv":
+        response = StreamingHttpResponse(_iter_team_csv(results), content_type="text/csv")
+        filename = f"team_report_{month_key(*months[0])}_{month_key(*months[-1])}.csv"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+    return Response(
+        {
+            "month_from": month_key(*months[0]),
+            "month_to": month_key(*months[-1]),
+            "results": results,
+        },
+        status=status.HTTP_200_OK,
+    )